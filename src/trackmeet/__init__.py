@@ -3,8 +3,13 @@
 __version__ = '1.13.9a1'
 
 import sys
+from time import perf_counter
+
+_IMPORT_START = perf_counter()
+
 import gi
 import logging
+import importlib
 import metarace
 from metarace import htlib
 import csv
@@ -37,32 +42,61 @@ from metarace.standards import _CONFIG_SCHEMA as _STANDARDS_SCHEMA
 from .sender import sender, OVERLAY_CLOCK, OVERLAY_IMAGE, OVERLAY_BLANK, _CONFIG_SCHEMA as _SENDER_SCHEMA
 from .gemini import gemini
 from .lapscore import lapscore
-from .eventdb import Event, EventDb, sub_autospec, sub_depend, event_type, _CONFIG_SCHEMA as _EVENT_SCHEMA
+from .txtpage import txtpage
+from .standings import standings
+from .riderindex import riderindex
+from .references import references
+from .logqueue import logqueue
+from .archive import archive
+from .watchdog import watchdog
+from .eventdb import Event, EventDb, event_type, _CONFIG_SCHEMA as _EVENT_SCHEMA
 from .databridge import DataBridge, _CONFIG_SCHEMA as _DB_SCHEMA
 from . import uiutil
 from . import scbwin
-from . import race
-from . import ps
-from . import f200
-from . import ittt
-from . import sprnd
-from . import classification
-from . import aggregate
-from . import hourrec
+from . import render
+from . import metrics
 
 PRGNAME = 'org._6_v.trackmeet'
 APPNAME = 'Trackmeet'
 LOGFILE = 'event.log'
 LOGFILE_LEVEL = logging.DEBUG
+TRACEFILE = 'timing.log'  # compact timer trace
 CONFIGFILE = 'config.json'
 TRACKMEET_ID = 'trackmeet-2.1'  # configuration versioning
 EXPORTPATH = 'export'
 MAXREP = 10000  # communique max number
 SESSBREAKTHRESH = 0.075  # forced page break threshold
 ANNOUNCE_LINELEN = 80  # length of lines on text-only DHI announcer
+ANNOUNCE_KEYFRAME = 30  # seconds between full announcer page redraws
 MAX_AUTORECURSE = 8  # maximum levels of autostart dependency
 RECOVER_TIMEOUT = 8  # ignore previous impulses that are too old
+SCB_LAGWARN = 0.5  # report scoreboard sender lag over this many seconds
 PROGRAM_INTRO = 'introduction.json'  # Program introduction sections
+# Event handler module and class by event type
+_HANDLERS = {
+    'indiv tt': ('ittt', 'ittt'),
+    'indiv pursuit': ('ittt', 'ittt'),
+    'pursuit race': ('ittt', 'ittt'),
+    'team sprint': ('ittt', 'ittt'),
+    'team sprint race': ('ittt', 'ittt'),
+    'team pursuit': ('ittt', 'ittt'),
+    'team pursuit race': ('ittt', 'ittt'),
+    'scratch': ('ps', 'ps'),
+    'points': ('ps', 'ps'),
+    'madison': ('ps', 'ps'),
+    'omnium': ('ps', 'ps'),
+    'tempo': ('ps', 'ps'),
+    'progressive': ('ps', 'ps'),
+    'classification': ('classification', 'Classification'),
+    'flying 200': ('f200', 'f200'),
+    'flying lap': ('f200', 'f200'),
+    'sprint round': ('sprnd', 'sprnd'),
+    'sprint final': ('sprnd', 'sprnd'),
+    'hour': ('hourrec', 'UCIHour'),
+    'team aggregate': ('aggregate', 'teamagg'),
+    'indiv aggregate': ('aggregate', 'indivagg'),
+}
+_DEFAULT_HANDLER = ('race', 'race')
 PRINT_TYPES = {
     'save': 'Save to PDF',
     'pdfpreview': 'Preview and Save to PDF',
@@ -277,6 +311,15 @@ _CONFIG_SCHEMA = {
         'hint': 'Base topic for announcer messages',
         'attr': 'anntopic',
     },
+    'annbatch': {
+        'prompt': '',
+        'control': 'check',
+        'type': 'bool',
+        'subtext': 'Batch text updates?',
+        'hint': 'Send changed announcer rows in a single message',
+        'attr': 'annbatch',
+        'default': False,
+    },
     'sechw': {
         'control': 'section',
         'prompt': 'Hardware',
@@ -298,7 +341,7 @@ _CONFIG_SCHEMA = {
     },
     'scbport': {
         'prompt': 'Scoreboard:',
-        'hint': 'Caprica/DHI scoreboard eg: DEFAULT',
+        'hint': 'Scoreboard ports eg: DEFAULT, dak@/dev/ttyUSB0',
         'defer': True,
         'attr': 'scbport',
     },
@@ -314,6 +357,12 @@ _CONFIG_SCHEMA = {
         'defer': True,
         'attr': 'lapport',
     },
+    'metricsport': {
+        'prompt': 'Metrics:',
+        'hint': 'Local metrics HTTP port eg: 9101 or 0.0.0.0:9101',
+        'defer': True,
+        'attr': 'metricsport',
+    },
     'secexp': {
         'control': 'section',
         'prompt': 'Export',
@@ -460,49 +509,24 @@ _ADD_BREAK_SCHEMA = {
 
 
 def mkrace(meet, ev, ui=True):
-    """Create a new object of the correct type for the provided event handle."""
-    ret = None
-    etype = ev['type']
-    if etype in (
-            'indiv tt',
-            'indiv pursuit',
-            'pursuit race',
-            'team sprint',
-            'team sprint race',
-            'team pursuit',
-            'team pursuit race',
-    ):
-        ret = ittt.ittt(meet=meet, event=ev, ui=ui)
-    elif etype in (
-            'scratch',
-            'points',
-            'madison',
-            'omnium',
-            'tempo',
-            'progressive',
-    ):
-        ret = ps.ps(meet=meet, event=ev, ui=ui)
-    elif etype == 'classification':
-        ret = classification.Classification(meet=meet, event=ev, ui=ui)
-    elif etype in (
-            'flying 200',
-            'flying lap',
-    ):
-        ret = f200.f200(meet=meet, event=ev, ui=ui)
-    elif etype in (
-            'sprint round',
-            'sprint final',
-    ):
-        ret = sprnd.sprnd(meet=meet, event=ev, ui=ui)
-    elif etype == 'hour':
-        ret = hourrec.UCIHour(meet=meet, event=ev, ui=ui)
-    elif etype == 'team aggregate':
-        ret = aggregate.teamagg(meet=meet, event=ev, ui=ui)
-    elif etype == 'indiv aggregate':
-        ret = aggregate.indivagg(meet=meet, event=ev, ui=ui)
-    else:
-        ret = race.race(meet=meet, event=ev, ui=ui)
-    return ret
+    """Create a new object of the correct type for the provided event handle.
+
+    Handler modules are imported on first use.
+    """
+    modname, clsname = _HANDLERS.get(ev['type'], _DEFAULT_HANDLER)
+    fullname = '.'.join((__name__, modname))
+    if fullname not in sys.modules:
+        st = perf_counter()
+        importlib.import_module(fullname)
+        _log.debug('Loaded %s handler in %0.3fs', modname, perf_counter() - st)
+    return getattr(sys.modules[fullname], clsname)(meet=meet, event=ev, ui=ui)
+
+
+def _phase(timing, label, st):
+    """Append time elapsed since st to timing and return a new start."""
+    nt = perf_counter()
+    timing.append((label, nt - st))
+    return nt
 
 
 class trackmeet:
@@ -674,6 +698,10 @@ class trackmeet:
                 self.lapspy.setcb(self._lapscore_cb)
                 self.lapspy.start()
 
+        # restart metrics endpoint
+        if res['metricsport'][0]:
+            metrics.serve(self.metricsport)
+
         # always re-set title
         self.set_title()
 
@@ -737,23 +765,19 @@ class trackmeet:
                 _log.debug('Report: save to file %r', exportfile)
                 rep.canonical = os.path.join(self.linkbase,
                                              exportfile + '.json')
-                ofile = os.path.join(EXPORTPATH, exportfile + '.pdf')
-                with metarace.savefile(ofile, mode='b') as f:
-                    rep.output_pdf(f)
-                ofile = os.path.join(EXPORTPATH, exportfile + '.xlsx')
-                with metarace.savefile(ofile, mode='b') as f:
-                    rep.output_xlsx(f)
-                ofile = os.path.join(EXPORTPATH, exportfile + '.json')
-                with metarace.savefile(ofile) as f:
-                    rep.output_json(f)
                 lb = ''
                 lt = []
                 if self.mirrorpath:
                     lb = os.path.join(self.linkbase, exportfile)
-                    lt = ['pdf', 'xlsx']
-                ofile = os.path.join(EXPORTPATH, exportfile + '.html')
-                with metarace.savefile(ofile) as f:
-                    rep.output_html(f, linkbase=lb, linktypes=lt)
+                    lt = render.linktypes()
+                render.output(rep,
+                              os.path.join(EXPORTPATH, exportfile),
+                              template,
+                              htmlargs={
+                                  'linkbase': lb,
+                                  'linktypes': lt
+                              },
+                              pdf=True)
             else:
                 _log.debug(
                     'Report: save to file skipped, no filename provided')
@@ -1367,20 +1391,14 @@ class trackmeet:
                     if specvec[1].endswith('-'):
                         allafter = True
                     if evno in self.edb:
-                        e = self.edb[evno]
-                        h = mkrace(self, e, False)
-                        h.loadconfig()
-                        isFinal = h.standingstr() == 'Result'
+                        isFinal, fin, res = self.standings.result(evno)
                         if not final or isFinal:
-                            for ri in h.result_gen():
-                                if isinstance(ri[1], int):
-                                    rank = ri[1]
-                                    if rank in placeset or (rank > lastplace
-                                                            and allafter):
-                                        if rank not in places:
-                                            places[rank] = []
-                                        places[rank].append(ri[0])
-                        h = None
+                            for bib, rank in res:
+                                if rank in placeset or (rank > lastplace
+                                                        and allafter):
+                                    if rank not in places:
+                                        places[rank] = []
+                                    places[rank].append(bib)
                     else:
                         _log.warning('Autospec event not found: %r', evno)
                     self.autorecurse.remove(evno)
@@ -1516,6 +1534,7 @@ class trackmeet:
             self.race_box.remove(delevent.frame)
             delevent.event.set_value('dirty', True)  # mark event exportable
             delevent.saveconfig()
+            self.standings.changed(delevent.evno)
             delevent = None
 
     ## Data menu callbacks.
@@ -1541,8 +1560,11 @@ class trackmeet:
 
         self.rdb.clear()
         self.edb.clear()
+        self.references.recover()
+        self.references.clear()
         self.edb.load('events.csv')
         self.rdb.load('riders.csv')
+        self.riderindex.load()
 
         if cureventno:
             if cureventno in self.edb:
@@ -1561,16 +1583,18 @@ class trackmeet:
         provisional = self.provisional  # may be overridden below
         sections = []
         lastsess = None
+        evcount = 0
+        hitcount = 0
         for e in self.edb:
             if e['result']:  # include in result
-                e['dirty'] = True  # force all to be recalculated on next export
-                r = mkrace(self, e, False)
+                # force all to be recalculated on next export
+                e.set_value('dirty', True)
                 nsess = e['sess']
                 if nsess != lastsess:
                     sections.append(
                         report.pagebreak(SESSBREAKTHRESH))  # force break
                 lastsess = nsess
-                if r.evtype in ('break', 'session'):
+                if e['type'] in ('break', 'session'):
                     sec = report.section()
                     sec.heading = ' '.join([e['pref'], e['info']]).strip()
                     sec.subheading = '\t'.join((
@@ -1580,14 +1604,15 @@ class trackmeet:
                     )).strip()
                     sections.append(sec)
                 else:
-                    r.loadconfig()
-                    if r.onestart:  # in progress or done...
-                        rep = r.result_report()
-                    else:
-                        rep = r.startlist_report()
+                    rep, hit = self.standings.sections(e, 'result',
+                                                       self._result_sections)
+                    evcount += 1
+                    if hit:
+                        hitcount += 1
                     if len(rep) > 0:
                         sections.extend(rep)
-                r = None
+        _log.info('Result sections re-used: %d/%d', hitcount, evcount)
+        self.delayed_export()
 
         filebase = 'result'
         self.print_report(sections,
@@ -1635,10 +1660,7 @@ class trackmeet:
                                   'team aggregate', 'indiv aggregate'):
                 series = ev['series'].lower()
                 if not series.startswith('t'):  # skip team events
-                    rl = mkrace(meet=self, ev=ev, ui=False)
-                    rl.loadconfig()
-                    for rno in rl.get_startlist().split():
-                        rno = rno.upper()
+                    for rno in self.riderindex.startlist(ev['evid']):
                         bibser = strops.bibser2bibstr(rno, series)
                         inmap.add(bibser)
         _log.debug('Marked %d riders listed on meet program', len(inmap))
@@ -1713,19 +1735,42 @@ class trackmeet:
 
         filebase = 'number_collect'
         r.canonical = os.path.join(self.linkbase, filebase + '.json')
-        ofile = os.path.join(EXPORTPATH, filebase + '.pdf')
-        with metarace.savefile(ofile, mode='b') as f:
-            r.output_pdf(f, docover=True)
-            _log.info('Exported pdf program to %r', ofile)
-        ofile = os.path.join(EXPORTPATH, filebase + '.html')
-        with metarace.savefile(ofile) as f:
-            r.output_html(f)
-        ofile = os.path.join(EXPORTPATH, filebase + '.xlsx')
-        with metarace.savefile(ofile, mode='b') as f:
-            r.output_xlsx(f)
-        ofile = os.path.join(EXPORTPATH, filebase + '.json')
-        with metarace.savefile(ofile) as f:
-            r.output_json(f)
+        render.output(r,
+                      os.path.join(EXPORTPATH, filebase),
+                      pdfargs={'docover': True})
+        _log.info('Exported number collection to %r', filebase)
+
+    def _section_riders(self, h):
+        """Return the set of rider ids that handler h may report."""
+        ret = set()
+        for bib in h.get_startlist().split():
+            rh = self.rdb.get_rider(bib, h.series)
+            if rh is not None:
+                ret.add(rh.get_id())
+                pr = self.rdb.get_pilot(rh)
+                if pr is not None:
+                    ret.add(pr.get_id())
+                for member in rh['members'].split():
+                    trh = self.rdb.fetch_bibstr(member)
+                    if trh is not None:
+                        ret.add(trh.get_id())
+        return ret
+
+    def _program_sections(self, e):
+        """Build program sections for event e."""
+        h = mkrace(self, e, False)
+        h.loadconfig()
+        return (h.startlist_report(program=True), self._section_riders(h))
+
+    def _result_sections(self, e):
+        """Build result or startlist sections for event e."""
+        h = mkrace(self, e, False)
+        h.loadconfig()
+        if h.onestart:  # in progress or done...
+            secs = h.result_report()
+        else:
+            secs = h.startlist_report()
+        return (secs, self._section_riders(h))
 
     def printprogram(self):
         self.check_export_path()
@@ -1819,34 +1864,30 @@ class trackmeet:
                 r.add_section(report.pagebreak(0.01))
 
         cursess = None
+        evcount = 0
+        hitcount = 0
         for e in self.edb:
             if e['program']:  # include this event in program
                 if e['session']:  # add harder break for new session
                     if cursess and cursess != e['sess']:
                         r.add_section(report.pagebreak(SESSBREAKTHRESH))
                     cursess = e['sess']
-                h = mkrace(self, e, False)
-                h.loadconfig()
-                s = h.startlist_report(program=True)
+                s, hit = self.standings.sections(e, 'program',
+                                                 self._program_sections)
+                evcount += 1
+                if hit:
+                    hitcount += 1
                 for sec in s:
                     r.add_section(sec)
-                h = None
+        _log.info('Program sections re-used: %d/%d', hitcount, evcount)
 
         filebase = 'program'
         r.canonical = os.path.join(self.linkbase, filebase + '.json')
-        ofile = os.path.join(EXPORTPATH, filebase + '.pdf')
-        with metarace.savefile(ofile, mode='b') as f:
-            r.output_pdf(f, docover=True)
-            _log.info('Exported pdf program to %r', ofile)
-        ofile = os.path.join(EXPORTPATH, filebase + '.html')
-        with metarace.savefile(ofile) as f:
-            r.output_html(f)
-        ofile = os.path.join(EXPORTPATH, filebase + '.xlsx')
-        with metarace.savefile(ofile, mode='b') as f:
-            r.output_xlsx(f)
-        ofile = os.path.join(EXPORTPATH, filebase + '.json')
-        with metarace.savefile(ofile) as f:
-            r.output_json(f)
+        render.output(r,
+                      os.path.join(EXPORTPATH, filebase),
+                      template,
+                      pdfargs={'docover': True})
+        _log.info('Exported program to %r', filebase)
 
     def menu_data_program_activate_cb(self, menuitem, data=None):
         """Export race program."""
@@ -2206,6 +2247,8 @@ class trackmeet:
                                  remotepath=self.mirrorpath,
                                  mirrorcmd=self.mirrorcmd)
             self.mirror.start()
+            self._mirrorstart = perf_counter()
+            metrics.count('mirror_runs')
         return False  # for idle_add
 
     def menu_data_export_activate_cb(self, menuitem, data=None):
@@ -2275,6 +2318,7 @@ class trackmeet:
 
     def __run_data_export(self):
         try:
+            st = perf_counter()
             self._exportBlocked.clear()
             _log.debug('Begin data export')
             self.check_export_path()
@@ -2289,6 +2333,7 @@ class trackmeet:
                     dmap[evno] = e
             dcnt = len(dmap)
             _log.debug('Marked %d event%s dirty', dcnt, strops.plural(dcnt))
+            metrics.gauge('export_queue', dcnt)
 
             dirty = {}
             for evno, e in dmap.items():
@@ -2298,10 +2343,13 @@ class trackmeet:
                 doexport = e['result']
                 e.set_value('dirty', False)
                 _log.debug('Data export event %r', evno)
-                r = mkrace(meet=self, ev=e, ui=False)
-
-                # load event and populate all data bridge elements
-                r.loadconfig()
+                if etype == 'omnium':
+                    # re-use standings from the omnium service
+                    r = self.standings.handler(evno)
+                else:
+                    # load event and populate all data bridge elements
+                    r = mkrace(meet=self, ev=e, ui=False)
+                    r.loadconfig()
                 startrep = r.startlist_report()
                 resrep = r.result_report()
 
@@ -2375,30 +2423,19 @@ class trackmeet:
                             if not drep.empty():
                                 drep.canonical = os.path.join(
                                     self.linkbase, exportfile + '.json')
-                                ofile = os.path.join(EXPORTPATH,
-                                                     exportfile + '.pdf')
-                                with metarace.savefile(ofile, mode='b') as f:
-                                    drep.output_pdf(f)
-                                ofile = os.path.join(EXPORTPATH,
-                                                     exportfile + '.xlsx')
-                                with metarace.savefile(ofile, mode='b') as f:
-                                    drep.output_xlsx(f)
-                                ofile = os.path.join(EXPORTPATH,
-                                                     exportfile + '.json')
-                                with metarace.savefile(ofile) as f:
-                                    drep.output_json(f)
                                 lb = ''
                                 lt = []
                                 if self.mirrorpath:
                                     lb = os.path.join(self.linkbase,
                                                       exportfile)
-                                    lt = ['pdf', 'xlsx']
-                                ofile = os.path.join(EXPORTPATH,
-                                                     exportfile + '.html')
-                                with metarace.savefile(ofile) as f:
-                                    drep.output_html(f,
-                                                     linkbase=lb,
-                                                     linktypes=lt)
+                                    lt = render.linktypes()
+                                render.output(drep,
+                                              os.path.join(
+                                                  EXPORTPATH, exportfile),
+                                              htmlargs={
+                                                  'linkbase': lb,
+                                                  'linktypes': lt
+                                              })
                             sleep(0)
 
                 # if required, bridge data startlist/result & subfrags
@@ -2409,6 +2446,8 @@ class trackmeet:
                 r = None
             if self.mirrorpath:
                 GLib.idle_add(self.mirror_start)
+            metrics.observe('export', perf_counter() - st)
+            metrics.gauge('export_queue', 0)
             _log.debug('End data export thread[%s]', self.exporter.native_id)
             if self._exportBlocked.is_set():
                 # queue another export in case request came in during this run
@@ -2480,6 +2519,7 @@ class trackmeet:
         """Force a reconnect to scoreboards."""
         self.scb.setport(self.scbport)
         self.announce.reconnect()
+        GLib.idle_add(self.txt_keyframe)
         _log.debug('Re-connect scoreboard')
         if self.gemport != '':
             self.gemini.setport(self.gemport)
@@ -2494,6 +2534,14 @@ class trackmeet:
         self.main_timer.dumpall()
         _log.info('Dump timer memory')
 
+    def menu_timing_watchdog_activate_cb(self, menuitem, data=None):
+        """Display main loop tick histogram and recent stalls."""
+        uiutil.messagedlg(window=self.window,
+                          message='Main loop timing',
+                          message_type=Gtk.MessageType.INFO,
+                          subtext=self.watchdog.summary(),
+                          title='Trackmeet: Main Loop')
+
     def menu_timing_reconnect_activate_cb(self, menuitem, data=None):
         """Reconnect timer and initialise."""
         self.main_timer.setport(self.timerport)
@@ -2538,9 +2586,16 @@ class trackmeet:
         if not self.running:
             return False
 
-        nt = tod.now().meridiem()
+        nt = tod.now()
+        if self.anntopic:
+            if nt - self._txtkeyframe > ANNOUNCE_KEYFRAME:
+                self.txt_keyframe()
+        nt = nt.meridiem()
         if self.scb.connected():
-            self.rfustat.update('ok', nt)
+            if self.sender_status():
+                self.rfustat.update('activity', nt)
+            else:
+                self.rfustat.update('ok', nt)
         else:
             self.rfustat.update('idle', nt)
 
@@ -2548,6 +2603,7 @@ class trackmeet:
         if self.mirror is not None:
             if not self.mirror.is_alive():
                 _log.debug('Removing completed mirror')
+                metrics.observe('mirror', perf_counter() - self._mirrorstart)
                 self.mirror = None
 
         if self.exporter is not None:
@@ -2557,10 +2613,32 @@ class trackmeet:
 
         return True
 
+    def sender_status(self):
+        """Report scoreboard queue statistics, return True if lagging."""
+        ret = False
+        tip = []
+        senders = [(st['port'] or 'DHI', st) for st in self.scb.portstats()]
+        senders.append(('Gemini', self.gemini.stats()))
+        for label, st in senders:
+            tip.append(
+                '%s: depth %d, lag %0.2fs, write %0.3fs, %d B/s, coalesced %d, dropped %d'
+                % (label, st['depth'], st['lag'], st.get('wtime', 0.0),
+                   st.get('rate', 0), st['coalesced'], st['drops']))
+            drops = st['drops'] - self._scbdrops.get(label, 0)
+            self._scbdrops[label] = st['drops']
+            if drops > 0 or st['lag'] > SCB_LAGWARN:
+                ret = True
+                self.sh.push_status(
+                    '%s scoreboard lag %0.1fs, %d queued, %d dropped' %
+                    (label, st['lag'], st['depth'], drops), logging.WARNING)
+        self.rfustat.set_tooltip_text('\n'.join(tip))
+        return ret
+
     def timeout(self):
         """Update internal state and call into race timeout."""
         if not self.running:
             return False
+        self.watchdog.tick()
 
         try:
             if self.curevent is not None:
@@ -2738,10 +2816,38 @@ class trackmeet:
             self.announce.publish(msg, topic)
 
     def txt_announce(self, umsg):
-        """Announce the unt4 message to the text-only DHI announcer."""
+        """Draw the unt4 message on the text-only DHI announcer page."""
         if self.anntopic:
+            if self.txtpage.write(umsg):
+                if not self._txtflush:
+                    self._txtflush = True
+                    GLib.idle_add(self.txt_flush)
+            else:
+                # send buffered rows first to keep messages in order
+                self.txt_publish(self.txtpage.flush())
+                self.txt_publish([umsg])
+
+    def txt_publish(self, msgs):
+        """Publish a list of unt4 messages to the text announcer."""
+        if self.anntopic and msgs:
             topic = '/'.join((self.anntopic, 'text'))
-            self.announce.publish(umsg.pack(), topic)
+            if self.annbatch:
+                self.announce.publish(''.join(m.pack() for m in msgs), topic)
+            else:
+                for m in msgs:
+                    self.announce.publish(m.pack(), topic)
+
+    def txt_flush(self):
+        """Publish changed rows on the announcer page."""
+        self._txtflush = False
+        self.txt_publish(self.txtpage.flush())
+        return False
+
+    def txt_keyframe(self):
+        """Publish the complete announcer page."""
+        self._txtkeyframe = tod.now()
+        self.txt_publish(self.txtpage.keyframe())
+        return False
 
     def txt_clear(self):
         """Clear the text announcer."""
@@ -2802,6 +2908,8 @@ class trackmeet:
         rootlogger = logging.getLogger()
         if self.loghandler is not None:
             rootlogger.removeHandler(self.loghandler)
+            self.loghandler.close()
+            self.loghandler = None
         self.running = False
         Gtk.main_quit()
         return False
@@ -2844,6 +2952,7 @@ class trackmeet:
         self.gemini.exit(msg)
         self.main_timer.exit(msg)
         self.weather.exit()
+        self.watchdog.exit()
         _log.info('Waiting for workers to exit')
         if self.exporter is not None:
             _log.debug('Result compiler')
@@ -2855,10 +2964,20 @@ class trackmeet:
             self.mirror = None
         _log.debug('Telegraph/announce')
         self.announce.join()
+        render.shutdown()
+        metrics.shutdown()
+        self.archive.close()
 
     def _timercb(self, evt, data=None):
-        if self.curevent is not None:
-            GLib.idle_add(self.curevent.timercb, evt)
+        latency = float(tod.now().timeval - evt.timeval)
+        if 0 <= latency < 60:
+            metrics.observe('impulse_latency', latency)
+        evno = ''
+        curevent = self.curevent
+        if curevent is not None:
+            evno = curevent.evno
+            GLib.idle_add(curevent.timercb, evt)
+        self.archive.append(evt, evno=evno)
 
     def update_lapscore(self, laps):
         """Handle lap count control message"""
@@ -2914,11 +3033,18 @@ class trackmeet:
                     ptime.chan = chan
                     ptime.source = 'transponder'
                     ptime.refid = jd['refid']
-                    ## TODO: these likely need separate handling
-                    #self._timercb(ptime)
-                    _log.debug('timercb: %r', ptime)
+                    evno = ''
+                    if self.curevent is not None:
+                        evno = self.curevent.evno
+                        # only some handlers track passings
+                        passingcb = getattr(self.curevent, 'passingcb', None)
+                        if passingcb is not None:
+                            passingcb(ptime)
+                    self.archive.append(ptime,
+                                        evno=evno,
+                                        isodate=jd.get('date'))
         except Exception as e:
-            _log.debug('Velotrain %s: %s', e.__class__.__name__, e_)
+            _log.debug('Velotrain %s: %s', e.__class__.__name__, e)
 
     def remote_command(self, topic=None, message=None):
         path = topic.split('/')
@@ -2926,6 +3052,9 @@ class trackmeet:
             cmd = path[-1]
             if cmd == 'laps':
                 self.update_lapscore(strops.confopt_posint(message, None))
+            elif cmd == 'redraw':
+                # subscriber request for full announcer page
+                self.txt_keyframe()
             elif cmd == 'passing':
                 # handle a velotrain style tyransponder report
                 self._transponder(message)
@@ -2933,10 +3062,16 @@ class trackmeet:
                 _log.debug('Unsupported control %r: %r', topic, message)
         return False
 
-    def start(self):
-        """Start the timer and scoreboard threads."""
+    def start(self, timing=None, st=None):
+        """Start the timer and scoreboard threads.
+
+        If provided, timing is a list of startup (phase, elapsed)
+        pairs up to st, and a breakdown is logged once threads start.
+        """
         if not self.started:
             _log.debug('Meet startup')
+            if timing is not None:
+                st = _phase(timing, 'map', st)
             self.announce.start()
             self.scb.start()
             self.main_timer.setcb(self._timercb)
@@ -2945,8 +3080,17 @@ class trackmeet:
             if self.lapspy is not None:
                 self.lapspy.start()
             self.weather.start()
+            self.watchdog.start()
+            if self.metricsport:
+                metrics.serve(self.metricsport)
             self.db.load()
             self.started = True
+            if timing is not None:
+                _phase(timing, 'devices', st)
+                _log.info(
+                    'Startup: %s',
+                    ', '.join('%s %0.3fs' % (l, e) for l, e in timing))
+        return False
 
     # Track meet functions
     def delayed_export(self):
@@ -2968,6 +3112,7 @@ class trackmeet:
                 _log.debug('Backup of %r to %r failed: %s', conf, backup, e)
             self.curevent.saveconfig()
             self.curevent.event.set_value('dirty', True)
+            self.standings.changed(self.curevent.evno)
 
     def exportcb(self):
         """Save current event and update race info in external db."""
@@ -2990,6 +3135,7 @@ class trackmeet:
             cw.write(f)
         self.rdb.save('riders.csv')
         self.edb.save('events.csv')
+        self.riderindex.save()
         self.db.save()
         _log.info('Meet configuration saved')
 
@@ -3009,9 +3155,7 @@ class trackmeet:
             rootlogger.removeHandler(self.loghandler)
             self.loghandler.close()
             self.loghandler = None
-        self.loghandler = logging.FileHandler(LOGFILE)
-        self.loghandler.setLevel(LOGFILE_LEVEL)
-        self.loghandler.setFormatter(logging.Formatter(metarace.LOGFILEFORMAT))
+        self.loghandler = logqueue(LOGFILE, LOGFILE_LEVEL, TRACEFILE)
         rootlogger.addHandler(self.loghandler)
 
         cr.merge(metarace.sysconf, 'trackmeet')
@@ -3066,8 +3210,11 @@ class trackmeet:
 
         self.rdb.clear(notify=False)
         self.edb.clear()
+        self.references.recover()
+        self.references.clear()
         self.edb.load('events.csv')
         self.rdb.load('riders.csv')
+        self.riderindex.load()
         self.check_export_path()
 
         # re-open current event
@@ -3315,20 +3462,19 @@ class trackmeet:
 
     def delrider_events(self, riderNo, series):
         """Remove riderNo.series from all events on program"""
-        for ev in self.edb:
-            if ev['series'] == series:
-                if ev['type'] not in ('classification', 'team aggregate',
-                                      'indiv aggregate'):
-                    r = mkrace(meet=self, ev=ev, ui=False)
-                    r.readonly = False
-                    r.loadconfig()
-                    if r.inevent(riderNo):
-                        _log.debug('Remove %s from event %s', riderNo,
-                                   ev['evid'])
-                        r.delrider(riderNo)
-                        r.saveconfig()
-                        ev.set_value('dirty', True)
-                    r = None
+        for evno in self.riderindex.events(riderNo, series):
+            ev = self.edb[evno]
+            if ev['type'] not in ('classification', 'team aggregate',
+                                  'indiv aggregate'):
+                r = mkrace(meet=self, ev=ev, ui=False)
+                r.readonly = False
+                r.loadconfig()
+                if r.inevent(riderNo):
+                    _log.debug('Remove %s from event %s', riderNo, evno)
+                    r.delrider(riderNo)
+                    r.saveconfig()
+                    ev.set_value('dirty', True)
+                r = None
 
     def rider_delete_cb(self, menuitem, data=None):
         """Delete currently selected entry from meet"""
@@ -3444,6 +3590,14 @@ class trackmeet:
     def get_clubmode(self):
         return self.clubmode
 
+    def settings_key(self):
+        """Return a tuple of meet settings that may be read by reports."""
+        ret = [self.scb.linelen]
+        for option in _CONFIG_SCHEMA.values():
+            if 'attr' in option:
+                ret.append(getattr(self, option['attr'], None))
+        return tuple(ret)
+
     def get_laplen(self):
         """Return track lap length in metres."""
         ret = None
@@ -3488,6 +3642,7 @@ class trackmeet:
     def eventcb(self, event):
         """Handle a change in the event model"""
         _log.debug('eventcb %r', event)
+        self.standings.changed(event)
         doexport = False
         if event is not None:
             if event in self.edb:
@@ -3595,6 +3750,7 @@ class trackmeet:
                     style,
                 ]
                 self._rlm.append(rlr)
+        self.standings.riderchanged(rider)
         if self.curevent is not None:
             self.curevent.ridercb(rider)
 
@@ -3632,9 +3788,10 @@ class trackmeet:
 
     def comp_add_dialog(self, label=None):
         """Run a competition builder dialog."""
-        return uiutil.comp_builder(window=self.window,
-                                   meet=self,
-                                   comptype=label)
+        from . import competition
+        return competition.comp_builder(window=self.window,
+                                        meet=self,
+                                        comptype=label)
 
     def add_presentation_cb(self, menuitem=None, data=None):
         """Create a new presentation entry."""
@@ -3855,76 +4012,13 @@ class trackmeet:
         in destination event
 
         """
-        # first update the event db and index
-        self.edb.change_evno(oldevno=oldevno, newevno=newevno, notify=False)
+        # collect references before the event db is changed
+        refs = self.references.referrers(oldevno)
+        _log.debug('Event %r has %d references', oldevno, len(refs))
 
-        # move configuration to new filename
-        oldconf = self.event_configfile(oldevno)
-        if os.path.isfile(oldconf):
-            newconf = self.event_configfile(newevno)
-            _log.debug('Moved event config from %r to %r', oldconf, newconf)
-            os.rename(oldconf, newconf)
+        # update the event db and index
+        self.edb.change_evno(oldevno=oldevno, newevno=newevno, notify=False)
 
-        # scan events for references
-        for ev in self.edb:
-            if ev['evid'] != newevno:
-                if ev['auto']:
-                    ev.update_autospec(oldevno, newevno)
-                if ev['depend']:
-                    ev.update_depend(oldevno, newevno)
-                if ev['reference'] == oldevno:
-                    ev.set_value('reference', newevno)
-                # update evno references in event configs
-                if ev['type'] in ('classification', ):
-                    dosave = False
-                    config = self.event_configfile(ev['evid'])
-                    ecr = jsonconfig.config()
-                    ecr.add_section('event')
-                    ecr.load(config)
-                    oldshow = ecr.get_value('event', 'showevents')
-                    if oldshow:
-                        newshow = sub_depend(oldshow, oldevno, newevno)
-                        if newshow != oldshow:
-                            ecr.set('event', 'showevents', newshow)
-                            dosave = True
-                    oldplac = ecr.get_value('event', 'placesrc')
-                    if oldplac:
-                        newplac = sub_autospec(oldplac, oldevno, newevno)
-                        if newplac != oldplac:
-                            ecr.set('event', 'placesrc', newplac)
-                            dosave = True
-                    if dosave:
-                        with metarace.savefile(config) as f:
-                            ecr.write(f)
-                elif ev['type'] in ('indiv aggregate', 'team aggregate'):
-                    _log.warning('change evno not supported on %r', ev['type'])
-                    dosave = False
-                    config = self.event_configfile(ev['evid'])
-                    ecr = jsonconfig.config()
-                    ecr.add_section('event')
-                    ecr.load(config)
-                    # check sources
-                    pass
-                    if dosave:
-                        with metarace.savefile(config) as f:
-                            ecr.write(f)
-                elif ev['type'] in ('tempo', 'progressive', 'points', 'omnium',
-                                    'madison'):
-                    dosave = False
-                    config = self.event_configfile(ev['evid'])
-                    ecr = jsonconfig.config()
-                    ecr.add_section('sprintsource')
-                    ecr.load(config)
-                    for sid in ecr.options('sprintsource'):
-                        oldplac = ecr.get_value('sprintsource', sid)
-                        if oldplac:
-                            newplac = sub_autospec(oldplac, oldevno, newevno)
-                            if newplac != oldplac:
-                                ecr.set('sprintsource', sid, newplac)
-                                dosave = True
-                    if dosave:
-                        with metarace.savefile(config) as f:
-                            ecr.write(f)
         if backup:
             # update event fields for a backup
             ev = self.edb[newevno]
@@ -3935,6 +4029,9 @@ class trackmeet:
             # assume edits to evov provided by operator
             pass
 
+        # update referring events and move configuration to new filename
+        self.references.renumber(oldevno, newevno)
+
     def event_popup_report_cb(self, menuitem, data=None):
         """Print event report."""
         # report type from menu item
@@ -4365,6 +4462,10 @@ class trackmeet:
         self.announce.setcb(self._controlcb)
         self.scbport = ''
         self.anntopic = None
+        self.annbatch = False
+        self.txtpage = txtpage(ANNOUNCE_LINELEN)
+        self._txtflush = False
+        self._txtkeyframe = tod.ZERO
         self.timerprint = False  # enable timer printer?
         self.main_timer = timy()
         self.timerport = ''
@@ -4373,8 +4474,16 @@ class trackmeet:
         self.gemini = gemini()
         self.weather = Weather()
         self.db = DataBridge(self)
+        self.standings = standings(self)
+        self.riderindex = riderindex(self)
+        self.archive = archive()
+        self.watchdog = watchdog()
+        self.references = references(self)
         self.gemport = ''
+        self._scbdrops = {}
         self.mirror = None  # file mirror thread
+        self._mirrorstart = None
+        self.metricsport = None
         self.exporter = None  # export worker thread
         self._exportLock = threading.Lock()  # one only exporter
         self._exportBlocked = threading.Event()  # flag blocked export
@@ -4632,6 +4741,8 @@ def createmeet():
 
 def main():
     """Run the track meet application as a console script."""
+    timing = []
+    st = _phase(timing, 'import', _IMPORT_START)
     chk = Gtk.init_check()
     if not chk[0]:
         print('Unable to init Gtk display')
@@ -4655,18 +4766,26 @@ def main():
 
     doconfig = False
     configpath = None
-    if len(sys.argv) > 2:
-        _log.error('Usage: trackmeet [PATH]')
+    args = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--formats='):
+            if not render.setformats(arg.split('=', 1)[1]):
+                _log.error('Usage: trackmeet [--formats=html,json,..] [PATH]')
+                sys.exit(1)
+        else:
+            args.append(arg)
+    if len(args) > 1:
+        _log.error('Usage: trackmeet [--formats=html,json,..] [PATH]')
         sys.exit(1)
-    elif len(sys.argv) == 2:
-        if sys.argv[1] == '--edit-default':
+    elif len(args) == 1:
+        if args[0] == '--edit-default':
             doconfig = True
             configpath = metarace.DEFAULTS_PATH
             _log.debug('Edit defaults, configpath: %r', configpath)
-        elif sys.argv[1] == '--create':
+        elif args[0] == '--create':
             configpath = createmeet()
         else:
-            configpath = sys.argv[1]
+            configpath = args[0]
     else:
         configpath = loadmeet()
     configpath = metarace.config_path(configpath)
@@ -4696,14 +4815,19 @@ def main():
     if doconfig:
         return edit_defaults()
     else:
+        st = _phase(timing, 'setup', st)
         app = trackmeet(lf)
         mp = configpath
         if mp.startswith(metarace.DATA_PATH):
             mp = mp.replace(metarace.DATA_PATH + '/', '')
         app.status.push(app.context, 'Meet Folder: ' + mp)
+        st = _phase(timing, 'meet', st)
         app.loadconfig()
+        st = _phase(timing, 'config', st)
         app.window.show()
-        app.start()
+        st = _phase(timing, 'window', st)
+        # start device threads once the window has mapped
+        GLib.idle_add(app.start, timing, st)
         return Gtk.main()
 
 
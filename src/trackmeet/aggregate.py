@@ -5,6 +5,7 @@ import os
 import gi
 import logging
 import json
+from time import perf_counter
 
 gi.require_version("GLib", "2.0")
 from gi.repository import GLib
@@ -39,6 +40,14 @@ COL_PLACE = 5
 COL_MEDAL = 6
 COL_TALLY = 6  # Store displayed points tally in medal col
 
+# Points tally detail columns
+DETAIL_EVNO = 0
+DETAIL_RNO = 1
+DETAIL_SERIES = 2
+DETAIL_PLACE = 3
+DETAIL_POINTS = 4
+DETAIL_TYPE = 5
+
 # scb function key mappings
 key_reannounce = 'F4'  # (+CTRL)
 key_abort = 'F5'  # (+CTRL)
@@ -305,6 +314,8 @@ class teamagg(classification.Classification):
         _log.debug('Saving event config %r', self.configfile)
         with metarace.savefile(self.configfile) as f:
             cw.write(f)
+        self.meet.riderindex.update(self.evno, self.series,
+                                    self.get_startlist())
         if self._status == 'provisional':
             savefile = 'event_%s_tally.json' % (str(self.evno), )
             with metarace.savefile(savefile) as f:
@@ -502,7 +513,7 @@ class teamagg(classification.Classification):
                     for detail in details:
                         cnt += 1
                         evname = ''
-                        evid = detail['evno']
+                        evid = detail[DETAIL_EVNO]
                         evno = evid
                         if evid == 'prev':  # previous round total
                             evkey = 999999
@@ -526,8 +537,8 @@ class teamagg(classification.Classification):
                         evname = l[3]
                         evseries = l[4]
                         detail = l[5]
-                        rno = detail['rno']
-                        rseries = detail['series']
+                        rno = detail[DETAIL_RNO]
+                        rseries = detail[DETAIL_SERIES]
                         rname = ''
                         if rno:
                             dbr = self.meet.rdb.get_rider(rno, rseries)
@@ -542,23 +553,23 @@ class teamagg(classification.Classification):
                         if evname:
                             label = ': '.join((evname, rname))
                         rkstr = ''
-                        if detail['place']:
-                            rkstr = strops.rank2ord(str(detail['place']))
-                        ptsval = '%g' % (detail['points'], )
+                        if detail[DETAIL_PLACE]:
+                            rkstr = strops.rank2ord(str(detail[DETAIL_PLACE]))
+                        ptsval = '%g' % (detail[DETAIL_POINTS], )
                         sec.lines.append((
                             '',
                             '',
                             label,
-                            detail['type'],
+                            detail[DETAIL_TYPE],
                             rkstr,
                             ptsval,  # but display fractions
                         ))
                         cObj[str(dcnt)] = {
                             'label': label,
-                            'rank': detail['place'],
+                            'rank': detail[DETAIL_PLACE],
                             'elapsed': None,
                             'interval': None,
-                            'points': detail['points'],
+                            'points': detail[DETAIL_POINTS],
                         }
                         dcnt += 1
                     sec.lines.append(
@@ -601,20 +612,9 @@ class teamagg(classification.Classification):
                                            oldpts)
                                 self.add_competitor(tk, oldname)
                                 self.prevpts[tk] = oldpts
-                                self.ptstally[tk]['detail'].append({
-                                    'evno':
-                                    'prev',
-                                    'rno':
-                                    None,
-                                    'series':
-                                    None,
-                                    'place':
-                                    None,
-                                    'points':
-                                    oldpts,
-                                    'type':
-                                    prelabel,
-                                })
+                                self.ptstally[tk]['detail'].append(
+                                    ('prev', None, None, None, oldpts,
+                                     prelabel))
                 except Exception as e:
                     _log.warning('%s loading previous meet points: %s',
                                  e.__class__.__name__, e)
@@ -661,7 +661,11 @@ class teamagg(classification.Classification):
         return tk
 
     def lookup_competitor(self, no, series, pts):
-        """Determine destinations for given competitor"""
+        """Determine destinations for given competitor
+
+        Return a map of competitor code to a tuple (name, rlist) where
+        rlist is a sequence of (rno, rseries, rpts) points awarded.
+        """
         ret = {}
 
         dbr = self.meet.rdb.get_rider(no, series)
@@ -685,16 +689,14 @@ class teamagg(classification.Classification):
                         trrno = trh['no']
                         trseries = trh['series']
                         trcno = self.teamkey(trteam)
-                        self.add_competitor(trcno, trteam)
                         if trcno not in ret:
-                            ret[trcno] = []
-                        ret[trcno].append((trrno, trseries, splitpts))
+                            ret[trcno] = (trteam, [])
+                        ret[trcno][1].append((trrno, trseries, splitpts))
                     else:
                         _log.debug('Missing rider %s in team %s', member, no)
             else:
-                self.add_competitor(cno, team)
                 # single rider/all in same team: return original detail
-                ret[cno] = ((no, series, pts), )
+                ret[cno] = (team, ((no, series, pts), ))
         else:
             _log.warning('Unknown competitor %s skipped', no, series)
         return ret
@@ -710,66 +712,82 @@ class teamagg(classification.Classification):
         if code not in self.prevpts:
             self.prevpts[code] = 0
 
+    def event_points(self, evno, pmap):
+        """Return points awarded by event evno as (finished, names, rows)
+
+        Names is a sequence of (code, name) for each competitor found
+        in the result and rows is a sequence of tally detail tuples
+        prefixed by competitor code.
+        """
+        res = self.meet.standings.result(evno)
+        series = self.meet.edb[evno]['seri']
+        bestn = self.bestindiv
+        if series.startswith('t'):
+            bestn = self.bestteam
+        _log.debug('Accumulating best %d places from %s', bestn, evno)
+        teamcounts = {}
+        names = []
+        rows = []
+        finished = res[1]
+        if finished:
+            for bib, rank in res[2]:
+                pval = pmap['default']
+                if rank in pmap:
+                    pval = pmap[rank]
+                if pval > 0:
+                    # who do these points go to?
+                    cpmap = self.lookup_competitor(bib, series, pval)
+                    for cno, (cname, rlist) in cpmap.items():
+                        names.append((cno, cname))
+                        if cno not in teamcounts:  # for this event
+                            teamcounts[cno] = 0
+                        if teamcounts[cno] < bestn:
+                            teamcounts[cno] += 1
+                            for rno, rseries, rpts in rlist:
+                                rows.append((cno, evno, rno, rseries, rank,
+                                             rpts, pmap['label']))
+        return (finished, tuple(names), tuple(rows))
+
     def accumulate_event(self, evno, pmap):
-        """Read event details and return true if event was finished"""
+        """Add cached event points to tally and return true if finished"""
         if evno == self.evno:
             _log.warning('Event %r: Self-reference ignored', evno)
             return False
-        r = self.meet.get_event(evno, False)
-        if r is None:
+        if evno not in self.meet.edb:
             _log.warning('Event %r not found for lookup %r', evno,
                          pmap['label'])
             return False
-        r.loadconfig()  # now have queryable event handle
-        bestn = self.bestindiv
-        if r.series.startswith('t'):
-            bestn = self.bestteam
-        _log.debug('Accumulating best %d places from %s', bestn, evno)
-        teamcounts = {}
-        ret = False
-        if r.finished:
-            _log.debug('Event %s finished... result gen..', evno)
-            for res in r.result_gen():
-                if isinstance(res[1], int):
-                    pval = pmap['default']
-                    if res[1] in pmap:
-                        pval = pmap[res[1]]
-                    if pval > 0:
-                        # who do these points go to?
-                        cpmap = self.lookup_competitor(res[0], r.series, pval)
-                        for cno, rlist in cpmap.items():
-                            if cno not in teamcounts:  # for this event
-                                teamcounts[cno] = 0
-                            if teamcounts[cno] < bestn:
-                                teamcounts[cno] += 1
-                                for rline in rlist:
-                                    # (rno, rseries, rpts)
-                                    self.ptstally[cno]['total'] += rline[2]
-                                    self.ptstally[cno]['detail'].append({
-                                        'evno':
-                                        evno,
-                                        'rno':
-                                        rline[0],
-                                        'series':
-                                        rline[1],
-                                        'place':
-                                        res[1],
-                                        'points':
-                                        rline[2],
-                                        'type':
-                                        pmap['label'],
-                                    })
-            ret = True
-        else:
+
+        standings = self.meet.standings
+
+        def srckey():
+            return (standings.version(evno), self.series, self.bestindiv,
+                    self.bestteam)
+
+        def srcpoints():
+            return self.event_points(evno, pmap)
+
+        pkey = tuple(sorted((str(k), v) for k, v in pmap.items()))
+        res, hit = standings.memo((self.evno, evno, pkey), srckey, srcpoints)
+        if hit:
+            self._hits += 1
+        finished, names, rows = res
+        for cno, cname in names:
+            self.add_competitor(cno, cname)
+        for row in rows:
+            tally = self.ptstally[row[0]]
+            tally['total'] += row[5]
+            tally['detail'].append(row[1:])
+        if not finished:
             _log.debug('Event %r skipped: not yet finished', evno)
             self.finished = False
-            ret = False
-        r = None
-        return ret
+        return finished
 
     def recalculate(self):
         """Update internal model."""
         # all riders are re-loaded on recalc
+        st = perf_counter()
+        self._hits = 0
         self.riders.clear()
         self._seriespts.clear()
         self.ptstally = {}
@@ -795,6 +813,9 @@ class teamagg(classification.Classification):
         for evno in self.afinal.split():
             sourcecount += 1
             self.accumulate_event(evno, pmap)
+        _log.debug('Accumulated %d sources (%d cached) for %r in %0.1f ms',
+                   sourcecount, self._hits, self.evno,
+                   1000.0 * (perf_counter() - st))
 
         aux = []
         sraux = []
@@ -962,6 +983,7 @@ class teamagg(classification.Classification):
         self._detail = None
         self._standingstat = ''
         self._tkcache = {}
+        self._hits = 0
 
         self.riders = Gtk.ListStore(
             str,  # 0 bib
@@ -1012,13 +1034,11 @@ class indivagg(teamagg):
     def lookup_competitor(self, no, series, pts):
         """Individual is a degenerate team"""
         cno = strops.bibser2bibstr(no, series)
-        if cno not in self.ptstally:
-            cname = ''
-            dbr = self.meet.rdb.get_rider(no, series)
-            if dbr is not None:
-                cname = dbr.listname()
-            self.add_competitor(cno, cname)
-        return {cno: ((no, series, pts), )}
+        cname = ''
+        dbr = self.meet.rdb.get_rider(no, series)
+        if dbr is not None:
+            cname = dbr.listname()
+        return {cno: (cname, ((no, series, pts), ))}
 
     def do_places(self):
         """Show race result on scoreboard."""
@@ -0,0 +1,314 @@
+# SPDX-License-Identifier: MIT
+"""Impulse and passing archive for trackmeet.
+
+Every timer impulse and transponder passing received by the meet is
+appended to a per-day record file in the meet's archive folder.
+When a handler attributes an impulse to a rider, it appends the
+impulse again with the rider's number and event id. A rider's trace
+is fetched from the archive on demand, as every impulse received
+while the rider's run was armed.
+
+Records are placed on a queue by the calling thread and written
+by a writer thread, so a slow disk does not hold up the main loop or
+timer callbacks. Queries wait for queued records to be written.
+
+Records are a fixed size, so record files can be memory mapped and
+read by record number. Each record file has an index file of
+(time, record number) pairs in time order for time range queries.
+An index that is missing or out of step with its record file is
+rebuilt when the day is opened.
+
+"""
+
+import os
+import mmap
+import queue
+import struct
+import logging
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+from decimal import Decimal
+
+import metarace
+from metarace import tod
+from metarace import strops
+
+_log = logging.getLogger('archive')
+_log.setLevel(logging.DEBUG)
+
+# Default archive folder in meet path
+ARCHIVEPATH = 'archive'
+
+# Record: time of day (us), channel id, source, refid, bib, event id
+_RECORD = struct.Struct('<qb11s12s8s8s')
+# Index entry: time of day (us), record number
+_INDEX = struct.Struct('<qI')
+_DATEXT = '.dat'
+_IDXEXT = '.idx'
+_ENCODING = 'utf-8'
+_US = Decimal(1000000)
+
+
+def _field(value, size):
+    """Return value as bytes truncated to size."""
+    return str(value).encode(_ENCODING, 'replace')[0:size]
+
+
+def _text(value):
+    """Return a str from a packed bytes field."""
+    return value.rstrip(b'\x00').decode(_ENCODING, 'replace')
+
+
+def _micros(t):
+    """Return time of day t as an integer number of microseconds."""
+    return int(t.timeval * _US)
+
+
+def _unpack(rec):
+    """Return (tod, bib, evno) from an unpacked record."""
+    us, chan, source, refid, bib, evno = rec
+    t = tod.tod(Decimal(us) / _US,
+                chan=strops.id2chan(chan),
+                refid=_text(refid),
+                source=_text(source))
+    return (t, _text(bib), _text(evno))
+
+
+def timestamp():
+    """Return a tuple (isodate, tod) for the current time of day."""
+    return (date.today().isoformat(), tod.now())
+
+
+def tracelines(bib, trace, places=4):
+    """Return timer receipt style lines for a list of archived times."""
+    ret = []
+    start = None
+    for t in trace:
+        if start is None:
+            start = t
+        ret.append('{0:3} {1: >5}:{2} {3: >10}'.format(
+            bib[0:3], t.chan, t.timestr(places), (t - start).rawtime(places)))
+    return ret
+
+
+class _day:
+    """Record and index files for one day in the archive."""
+
+    def __init__(self, path, isodate):
+        self.isodate = isodate
+        self._datfile = os.path.join(path, isodate + _DATEXT)
+        self._idxfile = os.path.join(path, isodate + _IDXEXT)
+        self._times = array('q')
+        self._recnos = array('I')
+        self._count = 0
+        self._sorted = True  # index file entries are in time order
+        self._dat = None
+        self._idx = None
+        self._load()
+
+    def _load(self):
+        """Read the index, rebuilding it if out of step."""
+        dsize = 0
+        if os.path.exists(self._datfile):
+            dsize = os.path.getsize(self._datfile)
+        self._count = dsize // _RECORD.size
+        if dsize % _RECORD.size:
+            _log.warning('Discarding partial record in %r', self._datfile)
+            with open(self._datfile, 'r+b') as f:
+                f.truncate(self._count * _RECORD.size)
+        if os.path.exists(self._idxfile):
+            with open(self._idxfile, 'rb') as f:
+                buf = f.read()
+            usable = len(buf) - len(buf) % _INDEX.size
+            for us, recno in _INDEX.iter_unpack(buf[0:usable]):
+                self._times.append(us)
+                self._recnos.append(recno)
+        if len(self._times) != self._count:
+            self._rebuild()
+
+    def _rebuild(self):
+        """Re-create the index from the record file."""
+        _log.debug('Rebuilding archive index %r', self._idxfile)
+        aux = []
+        for recno, us in enumerate(self._scan_times()):
+            aux.append((us, recno))
+        aux.sort()
+        self._times = array('q', (a[0] for a in aux))
+        self._recnos = array('I', (a[1] for a in aux))
+        self._sorted = False
+        self.flush()
+
+    def _scan_times(self):
+        """Yield the time of each record in record order."""
+        if self._count:
+            with open(self._datfile, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    for rec in _RECORD.iter_unpack(
+                            m[0:self._count * _RECORD.size]):
+                        yield rec[0]
+
+    def append(self, packed, us):
+        """Append a packed record with time us."""
+        if self._dat is None:
+            self._dat = open(self._datfile, 'ab', buffering=0)
+        self._dat.write(packed)
+        recno = self._count
+        self._count += 1
+        if not self._times or us >= self._times[-1]:
+            self._times.append(us)
+            self._recnos.append(recno)
+            if self._sorted:
+                if self._idx is None:
+                    self._idx = open(self._idxfile, 'ab', buffering=0)
+                self._idx.write(_INDEX.pack(us, recno))
+        else:
+            # out of order arrival, index file is re-written on flush
+            pos = bisect_right(self._times, us)
+            self._times.insert(pos, us)
+            self._recnos.insert(pos, recno)
+            self._sorted = False
+
+    def flush(self):
+        """Write out a re-ordered index."""
+        if not self._sorted:
+            if self._idx is not None:
+                self._idx.close()
+                self._idx = None
+            with metarace.savefile(self._idxfile, mode='b') as f:
+                for us, recno in zip(self._times, self._recnos):
+                    f.write(_INDEX.pack(us, recno))
+            self._sorted = True
+
+    def close(self):
+        """Flush the index and close open files."""
+        self.flush()
+        for f in (self._dat, self._idx):
+            if f is not None:
+                f.close()
+        self._dat = None
+        self._idx = None
+
+    def records(self, recnos):
+        """Return a list of unpacked records for recnos."""
+        ret = []
+        if recnos and self._count:
+            with open(self._datfile, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    for recno in recnos:
+                        ret.append(
+                            _RECORD.unpack_from(m, recno * _RECORD.size))
+        return ret
+
+    def query(self, start=None, end=None):
+        """Return records with start <= time < end in time order."""
+        lo = 0
+        hi = len(self._times)
+        if start is not None:
+            lo = bisect_left(self._times, _micros(start))
+        if end is not None:
+            hi = bisect_left(self._times, _micros(end))
+        return self.records(self._recnos[lo:hi])
+
+    def scan(self):
+        """Return all records in time order."""
+        return self.records(self._recnos)
+
+
+class archive:
+    """Append-only archive of timer impulses and passings."""
+
+    def __init__(self, path=ARCHIVEPATH):
+        self._path = path
+        self._days = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = None
+        self._wlock = threading.Lock()
+
+    def _getday(self, isodate):
+        """Return the day object for isodate, opening it if required."""
+        if isodate not in self._days:
+            if not os.path.isdir(self._path):
+                os.makedirs(self._path, exist_ok=True)
+            self._days[isodate] = _day(self._path, isodate)
+        return self._days[isodate]
+
+    def append(self, t, bib='', evno='', isodate=None):
+        """Archive the time of day t with optional bib and event id."""
+        if isodate is None:
+            isodate = date.today().isoformat()
+        us = _micros(t)
+        packed = _RECORD.pack(us, strops.chan2id(t.chan),
+                              _field(t.source, 11), _field(t.refid, 12),
+                              _field(bib, 8), _field(evno, 8))
+        with self._wlock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run,
+                                                name='archive',
+                                                daemon=True)
+                self._writer.start()
+            self._queue.put_nowait((isodate, packed, us))
+
+    def _run(self):
+        """Write queued records until a stop marker is received."""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    break
+                isodate, packed, us = item
+                with self._lock:
+                    try:
+                        self._getday(isodate).append(packed, us)
+                    except Exception as e:
+                        _log.error('%s archiving impulse: %s',
+                                   e.__class__.__name__, e)
+            finally:
+                self._queue.task_done()
+
+    def dates(self):
+        """Return a sorted list of archived dates."""
+        ret = set()
+        if os.path.isdir(self._path):
+            for fname in os.listdir(self._path):
+                if fname.endswith(_DATEXT):
+                    ret.add(fname[0:-len(_DATEXT)])
+        return sorted(ret)
+
+    def query(self, start=None, end=None, isodate=None):
+        """Return a list of (tod, bib, evno) with start <= tod < end."""
+        if isodate is None:
+            isodate = date.today().isoformat()
+        self._queue.join()
+        with self._lock:
+            recs = self._getday(isodate).query(start, end)
+        return [_unpack(r) for r in recs]
+
+    def impulses(self, start=None, end=None, isodate=None):
+        """Return a list of archived times with start <= tod < end.
+
+        An impulse archived again when assigned to a rider is only
+        returned once.
+        """
+        ret = []
+        seen = set()
+        for t, bib, evno in self.query(start, end, isodate):
+            key = (t.timeval, t.chan, t.source, t.refid)
+            if key not in seen:
+                seen.add(key)
+                ret.append(t)
+        return ret
+
+    def close(self):
+        """Write queued records, then flush and close all open days."""
+        with self._wlock:
+            if self._writer is not None:
+                self._queue.put_nowait(None)
+                self._writer.join()
+                self._writer = None
+        with self._lock:
+            for day in self._days.values():
+                day.close()
+            self._days.clear()
@@ -0,0 +1,186 @@
+# SPDX-License-Identifier: MIT
+"""Trackmeet benchmark suite.
+
+Generate a synthetic meet folder, or open an existing one, and time
+meet operations, event handlers and selected components headless.
+Results are written as JSON for comparison across releases.
+
+Usage: python3 -m trackmeet.bench [options] [PATH]
+
+The meet object builds its main window on creation, so a display is
+required even though no window is shown. On a machine without one,
+run the suite under xvfb-run.
+
+"""
+
+import os
+import json
+import logging
+import platform
+import argparse
+import tempfile
+from datetime import datetime
+from time import perf_counter
+
+import metarace
+
+_log = logging.getLogger('bench')
+_log.setLevel(logging.DEBUG)
+
+# Default results file
+OUTFILE = 'bench.json'
+# Results file identifier
+BENCH_ID = 'trackmeet-bench-1.0'
+
+
+def _args():
+    """Return parsed command line arguments."""
+    from .generate import SESSIONS, RIDERS, SEED
+    ap = argparse.ArgumentParser(prog='python3 -m trackmeet.bench',
+                                 description='Run trackmeet benchmarks.')
+    ap.add_argument('path',
+                    nargs='?',
+                    help='meet folder, generated if missing or empty')
+    ap.add_argument('-s',
+                    '--sessions',
+                    type=int,
+                    default=SESSIONS,
+                    help='sessions to generate (default %(default)s)')
+    ap.add_argument('-r',
+                    '--riders',
+                    type=int,
+                    default=RIDERS,
+                    help='riders to generate (default %(default)s)')
+    ap.add_argument('--seed',
+                    type=int,
+                    default=SEED,
+                    help='generator seed (default %(default)s)')
+    ap.add_argument('-n',
+                    '--repeat',
+                    type=int,
+                    default=3,
+                    help='runs of each timing (default %(default)s)')
+    ap.add_argument('-o',
+                    '--output',
+                    default=OUTFILE,
+                    help='results file (default %(default)s)')
+    ap.add_argument('--no-micro',
+                    dest='micro',
+                    action='store_false',
+                    help='skip component timings')
+    return ap.parse_args()
+
+
+def _close(meet):
+    """Release files held by a meet that was never started."""
+    rootlogger = logging.getLogger()
+    for h in (meet.sh, meet.lh, meet.loghandler):
+        if h is not None:
+            rootlogger.removeHandler(h)
+    if meet.loghandler is not None:
+        meet.loghandler.close()
+        meet.loghandler = None
+    meet.archive.close()
+
+
+def run(args):
+    """Run the benchmarks described by args, return a results dict."""
+    from gi.repository import Gtk
+    from .. import trackmeet, __version__
+    from . import generate, suite
+
+    ret = {
+        'id': BENCH_ID,
+        'version': __version__,
+        'metarace': metarace.VERSION,
+        'python': platform.python_version(),
+        'gtk': '%d.%d.%d' % (Gtk.get_major_version(), Gtk.get_minor_version(),
+                             Gtk.get_micro_version()),
+        'date': datetime.now().astimezone().isoformat(timespec='seconds'),
+        'repeat': args.repeat,
+    }
+
+    path = args.path
+    if path is None:
+        path = tempfile.mkdtemp(prefix='trackmeet_bench_')
+    os.makedirs(path, exist_ok=True)
+    path = os.path.realpath(path)
+    lf = metarace.lockpath(path)
+    if lf is None:
+        raise RuntimeError('Unable to lock meet folder %r' % (path, ))
+    os.chdir(path)
+    metarace.init()
+
+    try:
+        st = perf_counter()
+        meet = trackmeet(lf)
+        ret['meet'] = perf_counter() - st
+        meet.loadconfig()
+        if not len(meet.edb):
+            st = perf_counter()
+            generate.generate(meet, args.sessions, args.riders, args.seed)
+            ret['generate'] = {
+                'sessions': args.sessions,
+                'riders': args.riders,
+                'seed': args.seed,
+                'elapsed': perf_counter() - st,
+            }
+        ret['path'] = path
+        ret['events'] = len(meet.edb)
+        ret['riders'] = len(meet.rdb)
+        _log.info('Meet: %d events, %d riders', ret['events'], ret['riders'])
+
+        _log.info('Timing meet operations')
+        ret['operations'] = suite.meet_suite(meet, args.repeat)
+        _log.info('Timing event handlers')
+        ret['handlers'] = suite.handler_suite(meet, args.repeat)
+        if args.micro:
+            _log.info('Timing components')
+            ret['components'] = suite.micro_suite(meet)
+        _close(meet)
+    finally:
+        metarace.unlockpath(path, lf)
+    return ret
+
+
+def _summary(res):
+    """Return a list of text lines summarising results res."""
+    from .suite import RECALC_METHODS
+    lines = [
+        'trackmeet %s: %d events, %d riders' %
+        (res['version'], res['events'], res['riders'])
+    ]
+    for label, st in res['operations'].items():
+        lines.append('  {: <24} {:10.4f}s'.format(label, st['min']))
+    for key, hs in res['handlers'].items():
+        line = '  {: <24} {:10.4f}s load'.format(key,
+                                                  hs['loadconfig']['mean'])
+        for name in RECALC_METHODS:
+            if name in hs:
+                line += ' {:10.4f}s {}'.format(hs[name]['mean'], name)
+        lines.append(line)
+    return lines
+
+
+def main():
+    """Run the benchmark suite as a console script."""
+    ch = logging.StreamHandler()
+    ch.setLevel(logging.INFO)
+    ch.setFormatter(logging.Formatter(metarace.LOGFORMAT))
+    logging.getLogger().addHandler(ch)
+
+    args = _args()
+    outfile = os.path.realpath(args.output)
+
+    from gi.repository import Gtk
+    if not Gtk.init_check()[0]:
+        print('Unable to init Gtk display')
+        return -1
+
+    res = run(args)
+    outdir = os.path.dirname(outfile)
+    with metarace.savefile(outfile, tempdir=outdir) as f:
+        json.dump(res, f, indent=1)
+    print('\n'.join(_summary(res)))
+    print('Results saved to %s' % (outfile, ))
+    return 0
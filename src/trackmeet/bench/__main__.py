@@ -0,0 +1,5 @@
+# SPDX-License-Identifier: MIT
+import sys
+from . import main
+
+sys.exit(main())
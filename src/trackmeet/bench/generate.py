@@ -0,0 +1,375 @@
+# SPDX-License-Identifier: MIT
+"""Synthetic meet generator.
+
+Build a meet folder with a configurable number of sessions and
+riders. Each session includes an event of every handler type, wired
+together with autospec, depends and classification references the
+way a real program would be, and every event config is populated
+with starters, places, times and splits through its handler.
+
+"""
+
+import logging
+from random import Random
+
+from metarace import tod
+
+from .. import mkrace
+from ..ps import SPRINT_COL_ID, SPRINT_COL_PLACES
+from ..sprnd import (COL_A_NO, COL_A_PLACE, COL_B_NO, COL_B_PLACE, COL_200M,
+                     COL_WINNER, COL_BYE)
+
+_log = logging.getLogger('bench.generate')
+_log.setLevel(logging.DEBUG)
+
+# Default meet size
+SESSIONS = 2
+RIDERS = 60
+SEED = 1
+
+# Meet code for data bridge output
+EVENTCODE = 'bench'
+
+_FIRST = ('Alex', 'Billie', 'Charlie', 'Dana', 'Eden', 'Frankie', 'Georgie',
+          'Harper', 'Indy', 'Jordan', 'Kai', 'Lee', 'Morgan', 'Noah', 'Oakley',
+          'Parker', 'Quinn', 'Riley', 'Sam', 'Taylor')
+_LAST = ('ADAMS', 'BROWN', 'CHEN', 'DAVIES', 'EVANS', 'FRASER', 'GREEN',
+         'HUGHES', 'ISAACS', 'JONES', 'KING', 'LEWIS', 'MARTIN', 'NGUYEN',
+         'OWEN', 'PATEL', 'ROBERTS', 'SMITH', 'TAYLOR', 'WALKER')
+_ORGS = ('AUS', 'NZL', 'GBR', 'FRA', 'GER', 'NED', 'ITA', 'JPN', 'CAN', 'USA')
+_CATS = ('ME', 'WE', 'MJ', 'WJ')
+
+# Event laps on a 250m track
+_LAPS = {
+    'flying lap': 1,
+    'indiv tt': 4,
+    'team sprint': 3,
+    'team sprint race': 3,
+    'indiv pursuit': 12,
+    'pursuit race': 12,
+    'team pursuit': 16,
+    'team pursuit race': 16,
+    'scratch': 40,
+    'tempo': 40,
+    'elimination': 24,
+    'points': 80,
+    'madison': 80,
+    'progressive': 20,
+    'race': 20,
+    'handicap': 8,
+    'motorpace': 24,
+    'keirin': 6,
+    'derby': 3,
+}
+
+
+def addriders(rdb, count, seed=SEED):
+    """Add count synthetic riders to rdb, return a list of bibs."""
+    rng = Random(seed)
+    ret = []
+    for i in range(count):
+        bib = str(i + 1)
+        rh = rdb[rdb.add_empty(bib, '')]
+        rh.set_value('first', _FIRST[i % len(_FIRST)])
+        rh.set_value('last', _LAST[(i // len(_FIRST)) % len(_LAST)])
+        rh.set_value('org', rng.choice(_ORGS))
+        rh.set_value('cat', _CATS[i % len(_CATS)])
+        ret.append(bib)
+    return ret
+
+
+class _program:
+    """Event listing builder for one meet."""
+
+    def __init__(self, edb):
+        self.edb = edb
+        self.sess = ''
+        self.cat = ''
+        self.starters = {}  # evno -> starter count for source events
+
+    def add(self, etype, info='', starters=None, **values):
+        """Add an event of etype to the current session, return evno."""
+        ev = self.edb.add_empty(notify=False)
+        evno = ev['evid']
+        ev.set_values({
+            'session': self.sess,
+            'type': etype,
+            'prefix': self.cat,
+            'info': info,
+            'category': self.cat,
+            'result': True,
+            'index': True,
+            'program': True,
+            'dirty': True,
+            'laps': _LAPS.get(etype),
+        })
+        ev.set_values(values)
+        if starters:
+            self.starters[evno] = starters
+        return evno
+
+    def session(self, sess):
+        """Start a new session of events."""
+        self.sess = str(sess)
+        self.cat = _CATS[(sess - 1) % len(_CATS)]
+        ev = self.edb.add_empty(notify=False)
+        ev.set_values({
+            'session': self.sess,
+            'type': 'session',
+            'info': 'Session %s' % (self.sess, ),
+            'result': False,
+            'index': False,
+            'program': True,
+        })
+
+        # sprint: qualifying, rounds, final and classification
+        qual = self.add('flying 200',
+                        'Sprint Qualifying',
+                        16,
+                        competition='sprint',
+                        phase='qualifying')
+        qf = self.add('sprint round',
+                      'Sprint 1/4 Final',
+                      auto='%s:1-8' % (qual, ),
+                      depends=qual,
+                      placeholders=8,
+                      competition='sprint',
+                      phase='quarterfinal')
+        final = self.add('sprint final',
+                         'Final',
+                         auto='%s:1-4' % (qf, ),
+                         depends=qf,
+                         placeholders=4,
+                         competition='sprint',
+                         phase='final')
+        self.add('classification',
+                 'Sprint Classification',
+                 auto='%s:1-4; %s:5-8; %s:9-' % (final, qf, qual),
+                 depends=' '.join((final, qf, qual)),
+                 competition='sprint',
+                 result=True,
+                 index=False)
+
+        # keirin and sprint derby seeded from qualifying
+        self.add('keirin',
+                 'Keirin',
+                 auto='%s:9-14' % (qual, ),
+                 depends=qual,
+                 placeholders=6)
+        self.add('derby', 'Sprint Derby', 8)
+        self.add('sprint heat', 'Sprint Heat', 2)
+
+        # timed events
+        self.add('flying lap', 'Flying Lap', 12)
+        for etype, info in (
+            ('indiv tt', 'Time Trial'),
+            ('indiv pursuit', 'Pursuit Qualifying'),
+            ('pursuit race', 'Pursuit Race'),
+            ('team sprint', 'Team Sprint'),
+            ('team sprint race', 'Team Sprint Race'),
+            ('team pursuit', 'Team Pursuit'),
+            ('team pursuit race', 'Team Pursuit Race'),
+        ):
+            self.add(etype, info, 8)
+
+        # omnium: sources located by the handlers via competition/phase
+        omnium = []
+        for phase in ('scratch', 'tempo', 'elimination', 'points'):
+            omnium.append(
+                self.add(phase,
+                         'Omnium %s' % (phase.title(), ),
+                         20,
+                         competition='omnium',
+                         phase=phase))
+        self.add('omnium',
+                 'Omnium',
+                 depends=' '.join(omnium),
+                 competition='omnium',
+                 phase='omnium',
+                 index=False)
+        self.add('classification',
+                 'Omnium Classification',
+                 competition='omnium',
+                 index=False)
+
+        # bunch races: heats and final
+        heats = [self.add('race', 'Heat %d' % (h, ), 12) for h in (1, 2)]
+        rfinal = self.add('race',
+                          'Final',
+                          auto='; '.join('%s:1-6' % (h, ) for h in heats),
+                          depends=' '.join(heats),
+                          placeholders=12)
+        self.add('scratch', 'Scratch', 24)
+        self.add('points', 'Points', 24)
+        self.add('tempo', 'Tempo', 20)
+        self.add('elimination', 'Elimination', 20)
+        self.add('progressive', 'Progressive', 20)
+        self.add('madison', 'Madison', 16)
+        self.add('handicap', 'Wheelrace', 16)
+        self.add('motorpace', 'Motorpace', 8)
+        self.add('hour', 'Hour Record', 1)
+
+        # aggregates over bunch race and team results
+        self.add('indiv aggregate',
+                 'Points Aggregate',
+                 depends=' '.join(heats + [rfinal]),
+                 index=False)
+        self.add('team aggregate', 'Team Aggregate', index=False)
+
+
+def _places(bibs, rng):
+    """Return a shuffled place string for bibs."""
+    order = list(bibs)
+    rng.shuffle(order)
+    return ' '.join(order)
+
+
+def _timed(h, rng, base):
+    """Assign start, finish and split times to riders in ittt handler h."""
+    lapsecs = 13.0 + 2.0 * rng.random()
+    laps = len(h.splitlist) / 2.0 if h.splitlist else 1.0
+    for r in h.riders:
+        st = base
+        rate = lapsecs * (0.96 + 0.08 * rng.random())
+        ft = st + tod.mktod(round(rate * laps, 3))
+        splits = {}
+        count = 0
+        for sid in h.splitlist[0:-1]:
+            count += 1
+            splits[sid] = st + tod.mktod(round(0.5 * rate * count, 3))
+        h.settimes(r.iter, st, ft, None, splits, doplaces=False)
+        base = base + tod.mktod(90)
+    h.placexfer()
+
+
+def _flying(h, rng, base):
+    """Assign flying times to riders in f200 handler h."""
+    for r in h.riders:
+        elap = 9.8 + 1.2 * rng.random()
+        st = base
+        ft = st + tod.mktod(round(elap, 3))
+        split = st + tod.mktod(round(0.51 * elap, 3))
+        h.settimes(r.iter, st, ft, split, doplaces=False)
+        base = base + tod.mktod(60)
+    h.placexfer()
+
+
+def sprintplaces(h, rng):
+    """Set sprint places on the points model in ps handler h."""
+    bibs = h.get_startlist().split()
+    if not len(h.sprints) and h.event['laps']:
+        laps = list(range(h.event['laps'] - 10, -1, -10))
+        h.sprintlaps = ' '.join(str(l) for l in laps)
+        h.sprint_model_init()
+    lidx = len(h.sprints) - 1
+    for idx, s in enumerate(h.sprints):
+        if s[SPRINT_COL_ID] not in h.sprintsource:
+            if idx == lidx:
+                s[SPRINT_COL_PLACES] = _places(bibs, rng)
+            else:
+                top = rng.sample(bibs, min(4, len(bibs)))
+                s[SPRINT_COL_PLACES] = ' '.join(top)
+    h.recalculate()
+
+
+def _contests(h, rng):
+    """Decide all contests in sprnd handler h."""
+    for c in h.contests:
+        ano = c[COL_A_NO]
+        bno = c[COL_B_NO]
+        if c[COL_BYE] or not bno:
+            if ano:
+                c[COL_A_PLACE] = '1'
+                c[COL_WINNER] = ano
+        elif ano:
+            if rng.random() < 0.5:
+                c[COL_A_PLACE] = '1'
+                c[COL_B_PLACE] = '2'
+                c[COL_WINNER] = ano
+            else:
+                c[COL_A_PLACE] = '2'
+                c[COL_B_PLACE] = '1'
+                c[COL_WINNER] = bno
+            c[COL_200M] = tod.mktod(round(10.2 + rng.random(), 3))
+
+
+def _hour(h, rng, base):
+    """Record a complete hour attempt in hourrec handler h."""
+    elap = 0.0
+    h._splitlist.clear()
+    while True:
+        elap += 16.2 + 0.6 * rng.random() + 0.0004 * len(h._splitlist)
+        if elap > h._reclen:
+            break
+        h._splitlist.append(base + tod.mktod(round(elap, 3)))
+    h._start = base
+    h._lapcount = len(h._splitlist)
+    h._finish = base + tod.mktod(h._reclen)
+    h.recalculate()
+
+
+def populate(meet, program, bibs, seed=SEED):
+    """Load, fill and save every event on the meet program."""
+    rng = Random(seed)
+    base = tod.mktod('10:00:00')
+    teams = []
+    for ev in meet.edb:
+        etype = ev['type']
+        if etype in ('session', 'break'):
+            continue
+        evno = ev['evid']
+        h = mkrace(meet, ev, False)
+        h.readonly = False
+        h.loadconfig()
+        count = program.starters.get(evno)
+        if count and not h.get_startlist():
+            for bib in rng.sample(bibs, min(count, len(bibs))):
+                h.addrider(bib)
+        base = base + tod.mktod(600)
+        if etype in ('flying 200', 'flying lap'):
+            _flying(h, rng, base)
+        elif etype in ('indiv tt', 'indiv pursuit', 'pursuit race',
+                       'team sprint', 'team sprint race', 'team pursuit',
+                       'team pursuit race'):
+            _timed(h, rng, base)
+            if etype.startswith('team'):
+                teams.append(evno)
+        elif etype in ('scratch', 'points', 'madison', 'omnium', 'tempo',
+                       'progressive'):
+            sprintplaces(h, rng)
+        elif etype in ('sprint round', 'sprint final'):
+            _contests(h, rng)
+        elif etype == 'hour':
+            _hour(h, rng, base)
+        elif etype == 'team aggregate':
+            h.afinal = ' '.join(teams)
+        elif etype == 'indiv aggregate':
+            h.aheat = ' '.join(ev['depends'].split()[0:-1])
+            h.afinal = ev['depends'].split()[-1]
+            h.recalculate()
+        elif etype != 'classification':
+            h.placexfer(_places(h.get_startlist().split(), rng))
+        h.saveconfig()
+        ev.set_value('dirty', True)
+        meet.standings.changed(evno)
+        h = None
+
+
+def generate(meet, sessions=SESSIONS, riders=RIDERS, seed=SEED):
+    """Replace the content of meet with a synthetic program."""
+    _log.info('Generating %d sessions, %d riders', sessions, riders)
+    meet.title = 'Benchmark Meet'
+    meet.subtitle = '%d Sessions, %d Riders' % (sessions, riders)
+    meet.eventcode = EVENTCODE
+    meet.doprint = 'save'
+    meet.provisional = False
+    meet.rdb.clear(notify=False)
+    meet.edb.clear()
+    bibs = addriders(meet.rdb, riders, seed)
+    program = _program(meet.edb)
+    for sess in range(sessions):
+        program.session(sess + 1)
+    meet.saveconfig()
+    populate(meet, program, bibs, seed)
+    meet.saveconfig()
+    return len(meet.edb)
@@ -0,0 +1,441 @@
+# SPDX-License-Identifier: MIT
+"""Benchmark runners.
+
+Meet runners time the meet level operations on a loaded meet:
+config load, full data export, index build, program and result
+printing, and the data bridge meet update. Handler runners load
+every event on the program headless and time loadconfig and
+recalculate grouped by handler class. Micro runners time the lap
+score reader on a pty, points and bunch race recalculation, and hour
+record analytics and per lap updates in isolation.
+
+All durations are in seconds.
+
+"""
+
+import os
+import logging
+import threading
+from random import Random
+from time import perf_counter, process_time
+
+from metarace import tod, unt4
+
+from .. import mkrace, render, _HANDLERS, _DEFAULT_HANDLER
+from ..eventdb import Event
+from ..hourrec import lapstats
+from ..lapscore import lapscore
+from ..ps import (SPRINT_COL_PLACES, SPRINT_COL_POINTS, RES_COL_NO,
+                  RES_COL_POINTS, RES_COL_LAPS, RES_COL_TOTAL, RES_COL_PLACE,
+                  RES_COL_FINAL)
+from .generate import sprintplaces
+
+_log = logging.getLogger('bench.suite')
+_log.setLevel(logging.DEBUG)
+
+# Points and bunch race field sizes
+PS_SIZES = (20, 60, 200)
+# Lap score frames decoded per run
+LAPSCORE_MESSAGES = 20000
+# Pty write size for lap score runs
+LAPSCORE_CHUNK = 64
+# Abandon an incomplete lap score run after this many seconds
+LAPSCORE_TIMEOUT = 30.0
+_LAPSCORE_END = 'END'
+# Sprint and lap edits per points race equivalence check
+PS_EDITS = 200
+# Laps in an hour record attempt
+HOUR_LAPS = 250
+# Calls per lap analytics query
+LAPSTATS_CALLS = 10000
+
+
+def stats(times):
+    """Return a summary dict for a list of durations."""
+    if not times:
+        return None
+    return {
+        'count': len(times),
+        'min': min(times),
+        'mean': sum(times) / len(times),
+        'max': max(times),
+    }
+
+
+def timeit(func, repeat=1):
+    """Call func repeat times, return a list of durations."""
+    ret = []
+    for i in range(repeat):
+        st = perf_counter()
+        func()
+        ret.append(perf_counter() - st)
+    return ret
+
+
+def _export(meet):
+    """Run a full data export and wait for it to complete."""
+    for e in meet.edb:
+        e.set_value('dirty', True)
+    meet.menu_data_export_activate_cb(None)
+    if meet.exporter is not None:
+        meet.exporter.join()
+        meet.exporter = None
+
+
+def meet_suite(meet, repeat=1):
+    """Time meet level operations, return a dict of stats."""
+    ret = {'loadconfig': stats(timeit(meet.loadconfig, repeat))}
+    meet.doprint = 'save'  # write reports to file, never preview
+    for label, func in (
+        ('export', lambda: _export(meet)),
+        ('updateindex', meet.updateindex),
+        ('printprogram', meet.printprogram),
+        ('finalresult', meet.finalresult),
+        ('updatemeet', meet.db.updateMeet),
+    ):
+        _log.debug('Meet: %s', label)
+        ret[label] = stats(timeit(func, repeat))
+    render.shutdown()
+    return ret
+
+
+# Handler methods timed as result recalculation, in order of preference
+RECALC_METHODS = ('recalculate', 'placexfer')
+
+
+def _recalc(h):
+    """Return (name, method) of the result recalculation for handler h.
+
+    Handlers without a recalculate method are timed on placexfer,
+    and the stats labelled with that name. (None, None) is returned
+    for a handler with neither.
+    """
+    for name in RECALC_METHODS:
+        func = getattr(h, name, None)
+        if func is not None:
+            return (name, func)
+    return (None, None)
+
+
+def handler_suite(meet, repeat=1):
+    """Time headless load and recalculate of every event by handler."""
+    load = {}
+    calc = {}
+    for ev in meet.edb:
+        if ev['type'] in ('session', 'break'):
+            continue
+        key = '.'.join(_HANDLERS.get(ev['type'], _DEFAULT_HANDLER))
+        for i in range(repeat):
+            st = perf_counter()
+            h = mkrace(meet, ev, False)
+            h.loadconfig()
+            load.setdefault(key, []).append(perf_counter() - st)
+        name, func = _recalc(h)
+        if func is not None:
+            calc.setdefault(key, (name, []))[1].extend(timeit(func, repeat))
+        h = None
+    ret = {}
+    for key in sorted(load):
+        ret[key] = {
+            'events': len(load[key]) // repeat,
+            'loadconfig': stats(load[key]),
+        }
+        if key in calc:
+            name, times = calc[key]
+            ret[key][name] = stats(times)
+    return ret
+
+
+def _lapframes(count):
+    """Return count encoded gemini and prism lap score frames."""
+    msgs = []
+    for i in range(count):
+        laps = str((count - i) % 100)
+        if i % 2:
+            msgs.append(unt4.unt4(header='S0SLC', text=laps).pack())
+        else:
+            msgs.append(
+                unt4.unt4(prefix=unt4.DC4[0],
+                          header='S00',
+                          text='\x08' + laps.rjust(3)).pack())
+    return ''.join(msgs).encode('ascii')
+
+
+def _feed(fd, data, chunk):
+    """Write data to fd in chunk sized writes."""
+    with memoryview(data) as mv:
+        for pos in range(0, len(data), chunk):
+            os.write(fd, mv[pos:pos + chunk])
+
+
+def lapscore_pty(count=LAPSCORE_MESSAGES, chunk=LAPSCORE_CHUNK):
+    """Time lapscore._read on count frames written through a pty.
+
+    A writer thread feeds frames into the pty master in chunk sized
+    writes, while the reader decodes them from the slave through
+    pyserial, as it would from a lap scoreboard. The run ends when
+    the reader reports the end marker frame.
+    """
+    import serial
+    data = _lapframes(count)
+    data += unt4.unt4(header='S0SLC', text=_LAPSCORE_END).pack().encode(
+        'ascii')
+    master, slave = os.openpty()
+    port = serial.Serial(os.ttyname(slave), timeout=0.1)
+    ls = lapscore()
+    complete = threading.Event()
+
+    def lapcb(laps):
+        if laps == _LAPSCORE_END:
+            complete.set()
+            ls._running = False
+
+    ls.setcb(lapcb)
+    ls._running = True
+    writer = threading.Thread(target=_feed,
+                              args=(master, data, chunk),
+                              daemon=True)
+    deadline = threading.Timer(LAPSCORE_TIMEOUT, ls.exit)
+    try:
+        st = perf_counter()
+        cst = process_time()
+        writer.start()
+        deadline.start()
+        ls._read(port)
+        cpu = process_time() - cst
+        elap = perf_counter() - st
+    finally:
+        deadline.cancel()
+        port.close()
+        writer.join(LAPSCORE_TIMEOUT)
+        os.close(master)
+        os.close(slave)
+    if not complete.is_set():
+        _log.warning('Lapscore pty run incomplete after %0.1fs', elap)
+    return {
+        'frames': count,
+        'bytes': len(data),
+        'chunk': chunk,
+        'complete': complete.is_set(),
+        'elapsed': elap,
+        'frames_per_second': count / elap,
+        'cpu_per_frame': cpu / count,
+    }
+
+
+def _fieldrace(meet, evid, etype, size):
+    """Return a headless handler for etype with size riders."""
+    ev = Event(evid=evid, cols={
+        'type': etype,
+        'seri': '',
+        'laps': 80,
+    })
+    h = mkrace(meet, ev, False)
+    h.loadconfig()
+    for i in range(size):
+        h.addrider(str(i + 1))
+    return h
+
+
+def ps_recalculate(meet, sizes=PS_SIZES, repeat=20, seed=1):
+    """Time points race recalculation for each field size.
+
+    One intermediate sprint is re-placed before each timed call, so
+    each run measures recalculation after a single sprint change.
+    """
+    ret = {}
+    rng = Random(seed)
+    for size in sizes:
+        h = _fieldrace(meet, 'bench_ps_%d' % (size, ), 'points', size)
+        sprintplaces(h, rng)
+        bibs = h.get_startlist().split()
+        inters = max(1, len(h.sprints) - 1)
+        times = []
+        for i in range(repeat):
+            s = h.sprints[rng.randrange(inters)]
+            top = rng.sample(bibs, min(4, len(bibs)))
+            s[SPRINT_COL_PLACES] = ' '.join(top)
+            st = perf_counter()
+            h.recalculate()
+            times.append(perf_counter() - st)
+        ret[str(size)] = stats(times)
+        h = None
+    return ret
+
+
+def race_placexfer(meet, sizes=PS_SIZES, repeat=20, seed=1):
+    """Time bunch race place transfer for each field size.
+
+    A new finish order is given to each timed call.
+    """
+    ret = {}
+    rng = Random(seed)
+    for size in sizes:
+        h = _fieldrace(meet, 'bench_race_%d' % (size, ), 'race', size)
+        bibs = h.get_startlist().split()
+        times = []
+        for i in range(repeat):
+            places = ' '.join(rng.sample(bibs, len(bibs)))
+            st = perf_counter()
+            h.placexfer(places)
+            times.append(perf_counter() - st)
+        ret[str(size)] = stats(times)
+        h = None
+    return ret
+
+
+def _psreference(h):
+    """Return rider points and final places summed from every sprint.
+
+    This is the full recalculation that the running totals in the
+    points race handler replace: every sprint's placings are summed
+    from scratch, without reference to any applied sprint.
+    """
+    ret = {}
+    lidx = len(h.sprints) - 1
+    for idx, s in enumerate(h.sprints):
+        points = s[SPRINT_COL_POINTS]
+        if points is None:
+            points = [5, 3, 2, 1]
+        placeset = set()
+        place = 0
+        count = 0
+        for placegroup in s[SPRINT_COL_PLACES].split():
+            for bib in placegroup.split('-'):
+                if bib != 'X' and bib not in placeset:
+                    placeset.add(bib)
+                    pts, final = ret.get(bib.upper(), (0, -1))
+                    if place < len(points):
+                        pts += points[place]
+                    if idx == lidx:
+                        final = place
+                    ret[bib.upper()] = (pts, final)
+                count += 1
+            place = count
+    return ret
+
+
+def _pssnapshot(h):
+    """Return the result columns of ps handler h in result order."""
+    return [(r[RES_COL_NO], r[RES_COL_POINTS], r[RES_COL_TOTAL],
+             r[RES_COL_PLACE], r[RES_COL_FINAL]) for r in h.riders]
+
+
+def ps_equivalence(meet, size=PS_SIZES[1], edits=PS_EDITS, seed=1):
+    """Check points race running totals against a full recalculation.
+
+    After each random sprint or lap edit, the handler's result is
+    compared with points summed from every sprint, and with the
+    result of a recalculation from an empty sprint state.
+    """
+    rng = Random(seed)
+    h = _fieldrace(meet, 'bench_psq_%d' % (size, ), 'points', size)
+    sprintplaces(h, rng)
+    bibs = h.get_startlist().split()
+    lidx = len(h.sprints) - 1
+    mismatch = 0
+    for i in range(edits):
+        if rng.random() < 0.2:
+            r = h.riders[rng.randrange(len(h.riders))]
+            r[RES_COL_LAPS] += rng.choice((-1, 1))
+        else:
+            idx = rng.randrange(len(h.sprints))
+            if idx == lidx:
+                places = rng.sample(bibs, len(bibs))
+            else:
+                places = rng.sample(bibs, min(4, len(bibs)))
+            h.sprints[idx][SPRINT_COL_PLACES] = ' '.join(places)
+        h.recalculate()
+        ref = _psreference(h)
+        running = _pssnapshot(h)
+        for r in running:
+            if ref.get(r[0], (0, -1)) != (r[1], r[4]):
+                mismatch += 1
+                _log.error('Points mismatch after edit %d: %r, expected %r',
+                           i, r, ref.get(r[0]))
+        h._sprintreset()
+        h.recalculate()
+        if _pssnapshot(h) != running:
+            mismatch += 1
+            _log.error('Result mismatch after edit %d', i)
+    h = None
+    return {'riders': size, 'edits': edits, 'mismatches': mismatch}
+
+
+def _hourlaps(count, rng):
+    """Return elapsed seconds at the end of each of count laps."""
+    ret = []
+    elap = 0.0
+    for i in range(count):
+        elap += 13.8 + 0.6 * rng.random() + 0.0004 * i
+        ret.append(elap)
+    return ret
+
+
+def lapstats_suite(laps=HOUR_LAPS, calls=LAPSTATS_CALLS, seed=1):
+    """Time hour record lap analytics over a full record attempt."""
+    elaps = _hourlaps(laps, Random(seed))
+    ls = lapstats(250.0, 3600.0, 55000.0)
+    st = perf_counter()
+    for e in elaps:
+        ls.add(e)
+    ret = {
+        'laps': len(elaps),
+        'add': (perf_counter() - st) / len(elaps),
+    }
+    for label, func in (
+        ('pace', lambda: ls.pace(4)),
+        ('timepace', ls.timepace),
+        ('deviation', ls.deviation),
+        ('fade', ls.fade),
+        ('project', lambda: ls.project(600.0)),
+    ):
+        st = perf_counter()
+        for i in range(calls):
+            func()
+        ret[label] = (perf_counter() - st) / calls
+    return ret
+
+
+def hour_recalculate(meet, laps=HOUR_LAPS, seed=1):
+    """Time hour record recalculate and outputs after each lap.
+
+    A running attempt is given one lap at a time, as by the lap
+    trigger, then recalculate and the scoreboard and telegraph
+    update are timed.
+    """
+    h = _fieldrace(meet, 'bench_hour', 'hour', 1)
+    base = tod.mktod('10:00:00')
+    h._start = base
+    h.timerstat = 'running'
+    h._splitlist.clear()
+    h._lapcount = 0
+    calc = []
+    scb = []
+    prev = 0.0
+    for elap in _hourlaps(laps, Random(seed)):
+        h._splitlist.append(base + tod.mktod(round(elap, 3)))
+        h._lapcount += 1
+        h._prevlap = tod.mktod(round(elap - prev, 3))
+        h._lelap = tod.mktod(elap).rawtime(0)
+        prev = elap
+        st = perf_counter()
+        h.recalculate()
+        calc.append(perf_counter() - st)
+        st = perf_counter()
+        h.scblap()
+        scb.append(perf_counter() - st)
+    h = None
+    return {'laps': laps, 'recalculate': stats(calc), 'scblap': stats(scb)}
+
+
+def micro_suite(meet):
+    """Run the isolated component timings."""
+    return {
+        'lapscore_pty': lapscore_pty(),
+        'ps_recalculate': ps_recalculate(meet),
+        'ps_equivalence': ps_equivalence(meet),
+        'race_placexfer': race_placexfer(meet),
+        'lapstats': lapstats_suite(),
+        'hour_recalculate': hour_recalculate(meet),
+    }
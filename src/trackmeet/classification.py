@@ -4,6 +4,7 @@
 import os
 import gi
 import logging
+from time import perf_counter
 
 gi.require_version("GLib", "2.0")
 from gi.repository import GLib
@@ -298,6 +299,8 @@ class Classification:
         _log.debug('Saving event config %r', self.configfile)
         with metarace.savefile(self.configfile) as f:
             cw.write(f)
+        self.meet.riderindex.update(self.evno, self.series,
+                                    self.get_startlist())
 
     def result_gen(self):
         """Generator function to export a final result."""
@@ -501,23 +504,15 @@ class Classification:
 
     def _getrider(self, bib):
         """Return temporary reference to model row."""
-        bib = bib.upper()
         ret = None
-        for r in self.riders:
-            if r[COL_NO] == bib:
-                ret = r
-                break
+        i = self._ridx.getiter(bib.upper())
+        if i is not None:
+            ret = self.riders[i]
         return ret
 
     def _getiter(self, bib):
         """Return temporary iterator to model row."""
-        bib = bib.upper()
-        i = self.riders.get_iter_first()
-        while i is not None:
-            if self.riders.get_value(i, COL_NO) == bib:
-                break
-            i = self.riders.iter_next(i)
-        return i
+        return self._ridx.getiter(bib.upper())
 
     def delrider(self, bib):
         """Remove the specified rider from the model."""
@@ -525,9 +520,21 @@ class Classification:
         if i is not None:
             self.riders.remove(i)
 
-    def recalculate(self):
-        """Update internal model."""
-        self.riders.clear()
+    def _sourcekey(self):
+        """Return a key for the current state of all source events."""
+        evnos = set()
+        for spec in (self.placesrc, self.others, self.othersrc):
+            for egroup in spec.split(';'):
+                evno = egroup.split(':')[0].strip()
+                if evno and evno.upper() != 'X' and evno != self.evno:
+                    evnos.add(evno)
+        version = self.meet.standings.version
+        return (self.override, self.placesrc, self.others, self.othersrc,
+                tuple((evno, version(evno)) for evno in sorted(evnos)))
+
+    def _resolve(self):
+        """Return placemap and finished flag resolved from sources."""
+        finished = None
 
         # places first: determine how many places are to be awarded directly
         maxcrank = 0
@@ -590,46 +597,45 @@ class Classification:
             maxcrank = currank
 
             # Create an ordered list of rider numbers using lookup
-            self.finished = True  # Assume finished unless one source is not
+            finished = True  # Assume finished unless one source is not
             for evno in lookup:
-                r = self.meet.get_event(evno, False)
+                r = self.meet.standings.result(evno)
                 if r is None:
                     _log.warning('Event %r not found for lookup %r', evno,
                                  lookup[evno])
-                    return
-                r.loadconfig()  # now have queryable event handle
+                    return None
+                srcfinished = r[1]
+                places = r[2]
                 after = None
                 if 'after' in lookup[evno] and lookup[evno]:
                     after = lookup[evno]['after']
                 lrank = 0
-                if r.finished:
-                    for res in r.result_gen():
-                        if isinstance(res[1], int):
-                            crank = None
-                            if after and res[1] > after:
-                                crank = after + res[1] - lrank
-                                maxcrank = max(maxcrank, crank)
-                                _log.debug(
-                                    'after=%r, rank=%r, lrank=%r, crank=%r',
-                                    after, res[1], lrank, crank)
-
-                            elif res[1] in lookup[evno]:
-                                crank = lookup[evno][res[1]] + 1
-                                lrank = res[1]
-
-                            if crank is not None:
-                                _log.debug(
-                                    'Assigned place %r to rider %r at rank %r',
-                                    crank, res[0], res[1])
-                                if crank not in placemap:
-                                    placemap[crank] = []
-                                placemap[crank].append(res[0])
+                if srcfinished:
+                    for bib, rank in places:
+                        crank = None
+                        if after and rank > after:
+                            crank = after + rank - lrank
+                            maxcrank = max(maxcrank, crank)
+                            _log.debug('after=%r, rank=%r, lrank=%r, crank=%r',
+                                       after, rank, lrank, crank)
+
+                        elif rank in lookup[evno]:
+                            crank = lookup[evno][rank] + 1
+                            lrank = rank
+
+                        if crank is not None:
+                            _log.debug(
+                                'Assigned place %r to rider %r at rank %r',
+                                crank, bib, rank)
+                            if crank not in placemap:
+                                placemap[crank] = []
+                            placemap[crank].append(bib)
                 else:
-                    self.finished = False
+                    finished = False
                 r = None
 
         # suppress others until finished if "afters" set
-        if afters and not self.finished:
+        if afters and not finished:
             _log.debug('Others suppressed due to unfinished sources')
             maxcrank = 0
 
@@ -672,6 +678,24 @@ class Classification:
                     rno for rno in sorted(oset, key=strops.riderno_key)
                 ]
 
+        return (placemap, finished)
+
+    def recalculate(self):
+        """Update internal model."""
+        self.riders.clear()
+
+        st = perf_counter()
+        res, hit = self.meet.standings.memo(self.evno, self._sourcekey,
+                                            self._resolve)
+        _log.debug('%s sources for %r in %0.1f ms',
+                   'Re-used' if hit else 'Resolved', self.evno,
+                   1000.0 * (perf_counter() - st))
+        if res is None:
+            return
+        placemap, finished = res
+        if finished is not None:
+            self.finished = finished
+
         # Add riders to model in rank order
         _log.debug('Placemap: %r', placemap)
         for place, group in sorted(placemap.items()):
@@ -951,6 +975,7 @@ class Classification:
             str,  # 4 comment
             str,  # 5 place
             str)  # 6 medal
+        self._ridx = uiutil.rowIndex(self.riders, COL_NO)
 
         if ui:
             b = uiutil.builder('classification.ui')
@@ -0,0 +1,2811 @@
+# SPDX-License-Identifier: MIT
+"""Standards-based competition builders for trackmeet.
+
+Build the events for a sprint, bunch, team sprint, pursuit, keirin
+or time trial competition from the standard tables. This module is
+imported when a builder is first opened from the meet menu.
+
+"""
+
+import logging
+from math import floor, ceil
+
+from metarace import strops
+from metarace.standards import CategoryInfo
+
+from .uiutil import options_dlg
+
+_log = logging.getLogger('competition')
+_log.setLevel(logging.DEBUG)
+
+# competition ID labels
+_COMPIDS = {
+    'scratch race': 'scratch',
+    'elimination race': 'elimination',
+    'points race': 'points',
+    'tempo race': 'tempo',
+}
+
+# competition abbreviations
+_COMPABBREVS = {
+    'pursuit': 'ip',
+    'individualpursuit': 'ip',
+    'teampursuit': 'tp',
+    'teamsprint': 'ts',
+    'timetrial': 'tt',
+    'scratch': 'sc',
+    'scratchrace': 'sc',
+    'elimination': 'e',
+    'eliminationrace': 'e',
+    'points': 'p',
+    'pointsrace': 'p',
+    'keirin': 'k',
+    'sprint': 'sp',
+    'madison': 'm',
+    '': '',
+}
+
+# standard sprint competition phases
+
+# Team Sprint Round One [3.2.145]
+# entrants->heat->(placespec, placeholders, label)
+_TEAM_SPRINT_ROUND1 = {
+    5: {
+        1: ('4,5', 2, '4v5'),
+        2: ('3', 1, '3rd'),
+        3: ('2', 1, '2nd'),
+        4: ('1', 1, '1st'),
+    },
+    6: {
+        1: ('4,6', 2, '4v6'),
+        2: ('3,5', 2, '3v5'),
+        3: ('2', 1, '2nd'),
+        4: ('1', 1, '1st'),
+    },
+    7: {
+        1: ('4,5', 2, '4v5'),
+        2: ('3,6', 2, '3v6'),
+        3: ('2,7', 2, '2v7'),
+        4: ('1', 1, '1st'),
+    },
+    8: {
+        1: ('4,5', 2, '4v5'),
+        2: ('3,6', 2, '3v6'),
+        3: ('2,7', 2, '2v7'),
+        4: ('1,8', 2, '1v8'),
+    },
+}
+
+# AU National Sprint - Like OLY with shortcuts
+_AU_SPRINT_COMPETITION = {
+    '1.16a': {  # AU specific - skip 1st repechage
+        'evid': 'r32',
+        'source': {
+            'qualifying': '1-32',
+        },
+        'entrants': 32,
+        'label': '1/16 Final',
+        'qualifiers': 16,
+        'heats': 1,
+        'next': '1.8',
+        'rule': 'Winners to 1/8 final',
+        'places': None,
+        'others': '17-32',
+        'otherstime': False,
+        'firstround': True,
+    },
+    '1.16': {
+        'evid': 'r24',
+        'source': {
+            'qualifying': '1-24',
+        },
+        'entrants': 24,
+        'label': '1/16 Final',
+        'qualifiers': 12,
+        'heats': 1,
+        'next': 'rep189',
+        'rule': 'Winners to 1/8 final; Others to repechage',
+        'places': None,
+        'others': None,
+        'otherstime': False,
+        'firstround': True,
+    },
+    'rep189': {
+        'evid': 'rep189',
+        'source': {
+            '1.16': '24,17,16',
+        },
+        'entrants': 3,
+        'label': 'Repechage 16v17v24',
+        'qualifiers': 1,
+        'heats': 0,
+        'next': 'rep2710',
+        'rule': 'Winner to 1/8 final R1',
+        'places': None,
+        'others': '2,3',
+        'otherstime': False,
+        'firstround': False,
+    },
+    'rep2710': {
+        'evid': 'rep2710',
+        'source': {
+            '1.16': '23,18,15',
+        },
+        'entrants': 3,
+        'label': 'Repechage 15v18v23',
+        'qualifiers': 1,
+        'heats': 0,
+        'next': 'rep3611',
+        'rule': 'Winner to 1/8 final R2',
+        'places': None,
+        'others': '2,3',
+        'otherstime': False,
+        'firstround': False,
+    },
+    'rep3611': {
+        'evid': 'rep3611',
+        'source': {
+            '1.16': '22,19,14',
+        },
+        'entrants': 3,
+        'label': 'Repechage 14v19v22',
+        'qualifiers': 1,
+        'heats': 0,
+        'next': 'rep4512',
+        'rule': 'Winner to 1/8 final R3',
+        'places': None,
+        'others': '2,3',
+        'otherstime': False,
+        'firstround': False,
+    },
+    'rep4512': {
+        'evid': 'rep4512',
+        'source': {
+            '1.16': '21,20,13',
+        },
+        'entrants': 3,
+        'label': 'Repechage 13v20v21',
+        'qualifiers': 1,
+        'heats': 0,
+        'next': '1.8',
+        'rule': 'Winner to 1/8 final R4',
+        'places': None,
+        'others': '2,3',
+        'otherstime': False,
+        'firstround': False,
+    },
+    '1.8': {
+        'evid': 'r16',
+        'source': {
+            '1.16a': '1-16',
+            '1.16': '1-12',
+            'rep189': '1',
+            'rep2710': '1',
+            'rep3611': '1',
+            'rep4512': '1',
+        },
+        'entrants': 16,
+        'label': '1/8 Final',
+        'qualifiers': 8,
+        'heats': 1,
+        'next': '1.4',
+        'rule': 'Winners to 1/4 final',
+        'places': None,
+        'others': '9-16',
+        'otherstime': False,
+        'firstround': True,
+        'contests': ('1vR4', '2vR3', '3vR2', '4vR1', '5v12', '6v11', '7v10', '8v9'),
+    },
+    '1.8a': {
+        'evid': 'r12',
+        'source': {},  # only first round
+        'entrants': 12,
+        'label': '1/8 Final',
+        'qualifiers': 6,
+        'heats': 1,
+        'next': 'rep145',
+        'rule': 'Winners to 1/4 final; Others to repechage',
+        'places': None,
+        'others': None,
+        'otherstime': False,
+        'firstround': True,
+    },
+    'rep145': {
+        'evid': 'rep145',
+        'source': {
+            '1.8a': '12,9,8',
+        },
+        'entrants': 3,
+        'label': 'Repechage 8v9v12',
+        'qualifiers': 1,
+        'heats': 0,
+        'next': 'rep236',
+        'rule': 'Winner to 1/4 final R1',
+        'places': None,
+        'others': '2,3',
+        'otherstime': False,
+        'firstround': False,
+    },
+    'rep236': {
+        'evid': 'rep236',
+        'source': {
+            '1.8a': '11,10,7',
+        },
+        'entrants': 3,
+        'label': 'Repechage 7v10v11',
+        'qualifiers': 1,
+        'heats': 0,
+        'next': '1.4',
+        'rule': 'Winner to 1/4 final R2',
+        'places': None,
+        'others': '2,3',
+        'otherstime': False,
+        'firstround': False,
+    },
+    '1.4': {
+        'evid': 'r8',
+        'source': {
+            '1.8': '1-8',
+            '1.8a': '1-6',
+            'rep145': '1',
+            'rep236': '1',
+        },
+        'entrants': 8,
+        'label': '1/4 Final',
+        'qualifiers': 4,
+        'heats': 3,
+        'next': '1.2',
+        'rule': 'Winners to 1/2 final',
+        'places': None,
+        'others': '5-8',
+        'otherstime': False,
+        'firstround': True,
+        'contests': ('1vR2', '2vR1', '3v6', '4v5'),
+    },
+    '1.2': {
+        'evid': 'r4',
+        'source': {
+            '1.4': '1-4',
+        },
+        'entrants': 4,
+        'label': '1/2 Final',
+        'qualifiers': 4,
+        'heats': 3,
+        'next': 'final',
+        'rule': 'Winners to gold final; Others to bronze',
+        'places': None,
+        'others': None,
+        'otherstime': False,
+        'firstround': True,
+    },
+    'final': {
+        'evid': 'f',
+        'source': {
+            '1.2': '3,1,2,4',
+        },
+        'entrants': 4,
+        'label': 'Final',
+        'qualifiers': None,
+        'heats': 3,
+        'next': None,
+        'rule': '',
+        'places': '2,3,1,4',
+        'others': None,
+        'otherstime': False,
+        'firstround': True,
+    },
+}
+
+# Olympic Sprint - Repechages and grouped others placed by 200 TT
+_OLY_SPRINT_COMPETITION = {
+    '1.32': {
+        'evid': 'r24',
+        'source': {
+            'qualifying': '1-24',
+        },
+        'entrants': 24,
+        'label': '1/32 Final',
+        'qualifiers': 12,
+        'heats': 1,
+        'next': 'rep189',
+        'rule': 'Winners to 1/16 final; Others to repechage',
+        'places': None,
+        'others': None,
+        'otherstime': False,
+        'firstround': True,
+    },
+    'rep189': {
+        'evid': 'rep189',
+        'source': {
+            '1.32': '24,17,16',
+        },
+        'entrants': 3,
+        'label': 'Repechage 1v8v9',
+        'qualifiers': 1,
+        'heats': 0,
+        'next': 'rep2710',
+        'rule': 'Winner to 1/16 final R1',
+        'places': None,
+        'others': '2,3',
+        'otherstime': False,
+        'firstround': False,
+    },
+    'rep2710': {
+        'evid': 'rep2710',
+        'source': {
+            '1.32': '23,18,15',
+        },
+        'entrants': 3,
+        'label': 'Repechage 2v7v12',
+        'qualifiers': 1,
+        'heats': 0,
+        'next': 'rep3611',
+        'rule': 'Winner to 1/16 final R2',
+        'places': None,
+        'others': '2,3',
+        'otherstime': False,
+        'firstround': False,
+    },
+    'rep3611': {
+        'evid': 'rep3611',
+        'source': {
+            '1.32': '22,19,14',
+        },
+        'entrants': 3,
+        'label': 'Repechage 3v6v11',
+        'qualifiers': 1,
+        'heats': 0,
+        'next': 'rep4512',
+        'rule': 'Winner to 1/16 final R3',
+        'places': None,
+        'others': '2,3',
+        'otherstime': False,
+        'firstround': False,
+    },
+    'rep4512': {
+        'evid': 'rep4512',
+        'source': {
+            '1.32': '21,20,13',
+        },
+        'entrants': 3,
+        'label': 'Repechage 4v5v12',
+        'qualifiers': 1,
+        'heats': 0,
+        'next': '1.16',
+        'rule': 'Winner to 1/16 final R4',
+        'places': None,
+        'others': '2,3',
+        'otherstime': False,
+        'firstround': False,
+    },
+    '1.16': {
+        'evid':
+        'r16',
+        'source': {
+            '1.32': '1-12',
+            'rep189': '1',
+            'rep2710': '1',
+            'rep3611': '1',
+            'rep4512': '1',
+        },
+        'entrants':
+        16,
+        'label':
+        '1/16 Final',
+        'qualifiers':
+        8,
+        'heats':
+        1,
+        'next':
+        'rep8',
+        'rule':
+        'Winners to 1/8 final; Others to repechage',
+        'places':
+        None,
+        'others':
+        None,
+        'otherstime':
+        False,
+        'firstround':
+        True,
+        'contests':
+        ('1vR4', '2vR3', '3vR2', '4vR1', '5v12', '6v11', '7v10', '8v9'),
+    },
+    'rep8': {
+        'evid': 'rep8',
+        'source': {
+            '1.16': '16,15,14,13,12,11,10,9',
+        },
+        'entrants': 8,
+        'label': 'Repechage',
+        'qualifiers': 4,
+        'heats': 1,
+        'next': '1.8',
+        'rule': 'Winners to 1/8 final R1-R4',
+        'places': None,
+        'others': '5-8',
+        'otherstime': False,
+        'firstround': False,
+    },
+    '1.8': {
+        'evid': 'r12',
+        'source': {
+            '1.16': '1-8',
+            'rep8': '1-4',
+        },
+        'entrants': 12,
+        'label': '1/8 Final',
+        'qualifiers': 6,
+        'heats': 1,
+        'next': 'rep145',
+        'rule': 'Winners to 1/4 final; Others to repechage',
+        'places': None,
+        'others': None,
+        'otherstime': False,
+        'firstround': True,
+        'contests': ('1vR4', '2vR3', '3vR2', '4vR1', '5v8', '6v7'),
+    },
+    'rep145': {
+        'evid': 'rep145',
+        'source': {
+            '1.8': '12,9,8',
+        },
+        'entrants': 3,
+        'label': 'Repechage 8v9v12',
+        'qualifiers': 1,
+        'heats': 0,
+        'next': 'rep236',
+        'rule': 'Winner to 1/4 final R1',
+        'places': None,
+        'others': '2,3',
+        'otherstime': False,
+        'firstround': False,
+    },
+    'rep236': {
+        'evid': 'rep236',
+        'source': {
+            '1.8': '11,10,7',
+        },
+        'entrants': 3,
+        'label': 'Repechage 7v10v11',
+        'qualifiers': 1,
+        'heats': 0,
+        'next': '1.4',
+        'rule': 'Winner to 1/4 final R2',
+        'places': None,
+        'others': '2,3',
+        'otherstime': False,
+        'firstround': False,
+    },
+    '1.4': {
+        'evid': 'r8',
+        'source': {
+            '1.8': '1-6',
+            'rep145': '1',
+            'rep236': '1',
+        },
+        'entrants': 8,
+        'label': '1/4 Final',
+        'qualifiers': 4,
+        'heats': 3,
+        'next': '5-8',
+        'rule': 'Winners to 1/2 final, Others to 5-8 final',
+        'places': None,
+        'others': None,
+        'otherstime': False,
+        'firstround': True,
+        'contests': ('1vR2', '2vR1', '3v6', '4v5'),
+    },
+    '5-8': {
+        'evid': '5-8',
+        'source': {
+            '1.4': '5-8',
+        },
+        'entrants': 4,
+        'label': '5-8 Final',
+        'qualifiers': None,
+        'heats': 0,  # derby
+        'next': '1.2',
+        'rule': 'For places 5 to 8',
+        'places': '1-4',
+        'others': None,
+        'otherstime': False,
+        'firstround': False,
+    },
+    '1.2': {
+        'evid': 'r4',
+        'source': {
+            '1.4': '1-4',
+        },
+        'entrants': 4,
+        'label': '1/2 Final',
+        'qualifiers': 4,
+        'heats': 3,
+        'next': 'final',
+        'rule': 'Winners to gold final; Others to bronze',
+        'places': None,
+        'others': None,
+        'otherstime': False,
+        'firstround': True,
+    },
+    'final': {
+        'evid': 'f',
+        'source': {
+            '1.2': '3,1,2,4',
+        },
+        'entrants': 4,
+        'label': 'Final',
+        'qualifiers': None,
+        'heats': 3,
+        'next': None,
+        'rule': '',
+        'places': '2,3,1,4',
+        'others': None,
+        'otherstime': False,
+        'firstround': True,
+    },
+}
+
+# Worlds sprint - no repechage, others placed n-m in-phase by 200m TT
+_SPRINT_COMPETITION = {
+    '1.16': {
+        'evid': 'r28',
+        'source': {
+            'qualifying': '1-28',
+        },
+        'entrants': 28,
+        'label': '1/16 Final',
+        'qualifiers': 16,
+        'heats': 1,
+        'next': '1.8',
+        'rule': 'Winners to 1/8 final',
+        'places': '17-28',
+        'others': None,
+        'otherstime': True,
+        'firstround': True,
+    },
+    '1.8': {
+        'evid': 'r16',
+        'source': {
+            '1.16': '1-16',
+        },
+        'entrants': 16,
+        'label': '1/8 Final',
+        'qualifiers': 8,
+        'heats': 1,
+        'next': '1.4',
+        'rule': 'Winners to 1/4 final',
+        'places': '9-16',
+        'others': None,
+        'otherstime': True,
+        'firstround': True,
+    },
+    '1.4': {
+        'evid': 'r8',
+        'source': {
+            '1.8': '1-8',
+        },
+        'entrants': 8,
+        'label': '1/4 Final',
+        'qualifiers': 4,
+        'heats': 3,
+        'next': '1.2',
+        'rule': 'Winners to 1/2 final',
+        'places': '5-8',
+        'others': None,
+        'otherstime': True,
+        'firstround': True,
+    },
+    '1.2': {
+        'evid': 'r4',
+        'source': {
+            '1.4': '1-4',
+        },
+        'entrants': 4,
+        'label': '1/2 Final',
+        'qualifiers': 4,
+        'heats': 3,
+        'next': 'final',
+        'rule': 'Winners to gold final; Others to bronze',
+        'places': None,
+        'others': None,
+        'otherstime': False,
+        'firstround': True,
+    },
+    'final': {
+        'evid': 'f',
+        'source': {
+            '1.2': '3,1,2,4',
+        },
+        'entrants': 4,
+        'label': 'Final',
+        'qualifiers': None,
+        'heats': 3,
+        'next': None,
+        'rule': '',
+        'places': '2,3,1,4',
+        'others': None,
+        'otherstime': False,
+        'firstround': True,
+    },
+}
+
+# Points Race Fallback Values [3.2.117]
+# laplen => cat => Q/F => (dist, laps. sprints)
+# Note: laplen is truncated to int
+_POINTS_RACES_T1 = {
+    166: {
+        'ME': {
+            'Q': (15000, 90, 9),
+            'F': (30000, 180, 18),
+        },
+        'WE': {
+            'Q': (10000, 60, 6),
+            'F': (20000, 120, 12),
+        },
+        'MJ': {
+            'Q': (10000, 60, 6),
+            'F': (20000, 120, 12),
+        },
+        'WJ': {
+            'Q': (10000, 60, 6),
+            'F': (15000, 90, 9),
+        },
+    },
+    200: {
+        'ME': {
+            'Q': (14000, 70, 7),
+            'F': (30000, 150, 15),
+        },
+        'WE': {
+            'Q': (10000, 50, 5),
+            'F': (20000, 100, 10),
+        },
+        'MJ': {
+            'Q': (10000, 50, 5),
+            'F': (20000, 100, 10),
+        },
+        'WJ': {
+            'Q': (8000, 40, 4),
+            'F': (16000, 80, 8),
+        },
+    },
+    250: {
+        'ME': {
+            'Q': (15000, 60, 6),
+            'F': (30000, 150, 15),
+        },
+        'WE': {
+            'Q': (10000, 40, 4),
+            'F': (20000, 80, 8),
+        },
+        'MJ': {
+            'Q': (10000, 40, 4),
+            'F': (20000, 80, 8),
+        },
+        'WJ': {
+            'Q': (10000, 40, 4),
+            'F': (15000, 60, 6),
+        },
+    },
+    285: {
+        'ME': {
+            'Q': (16000, 56, 5),
+            'F': (30000, 105, 10),
+        },
+        'WE': {
+            'Q': (12000, 42, 4),
+            'F': (20000, 70, 7),
+        },
+        'MJ': {
+            'Q': (12000, 42, 4),
+            'F': (20000, 70, 7),
+        },
+        'WJ': {
+            'Q': (10000, 35, 3),
+            'F': (16000, 56, 5),
+        },
+    },
+    333: {
+        'ME': {
+            'Q': (14000, 42, 8),
+            'F': (30000, 90, 18),
+        },
+        'WE': {
+            'Q': (10000, 30, 6),
+            'F': (20000, 60, 12),
+        },
+        'MJ': {
+            'Q': (10000, 30, 6),
+            'F': (20000, 60, 12),
+        },
+        'WJ': {
+            'Q': (10000, 30, 6),
+            'F': (16000, 48, 9),
+        },
+    },
+    400: {
+        'ME': {
+            'Q': (14000, 35, 7),
+            'F': (30000, 75, 15),
+        },
+        'WE': {
+            'Q': (10000, 25, 5),
+            'F': (20000, 50, 10),
+        },
+        'MJ': {
+            'Q': (10000, 25, 5),
+            'F': (20000, 50, 10),
+        },
+        'WJ': {
+            'Q': (8000, 20, 4),
+            'F': (16000, 40, 8),
+        },
+    },
+}
+_POINTS_RACES_T2 = {
+    200: {
+        'ME': {
+            'Q': (20000, 100, 10),
+            'F': (40000, 200, 20),
+        },
+        'WE': {
+            'Q': (15000, 75, 7),
+            'F': (25000, 125, 12),
+        },
+        'MJ': {
+            'Q': (15000, 75, 7),
+            'F': (25000, 125, 12),
+        },
+        'WJ': {
+            'Q': (10000, 50, 5),
+            'F': (20000, 100, 10),
+        },
+    },
+    250: {
+        'ME': {
+            'Q': (20000, 80, 8),
+            'F': (40000, 160, 16),
+        },
+        'WE': {
+            'Q': (15000, 60, 6),
+            'F': (25000, 100, 10),
+        },
+        'MJ': {
+            'Q': (15000, 60, 6),
+            'F': (25000, 100, 10),
+        },
+        'WJ': {
+            'Q': (10000, 40, 4),
+            'F': (20000, 80, 8),
+        },
+    },
+    285: {
+        'ME': {
+            'Q': (20000, 70, 7),
+            'F': (40000, 140, 14),
+        },
+        'WE': {
+            'Q': (16000, 56, 5),
+            'F': (25000, 84, 8),
+        },
+        'MJ': {
+            'Q': (16000, 56, 5),
+            'F': (25000, 84, 8),
+        },
+        'WJ': {
+            'Q': (10000, 35, 3),
+            'F': (20000, 70, 7),
+        },
+    },
+    333: {
+        'ME': {
+            'Q': (20000, 60, 12),
+            'F': (40000, 120, 24),
+        },
+        'WE': {
+            'Q': (16000, 48, 9),
+            'F': (25000, 75, 15),
+        },
+        'MJ': {
+            'Q': (16000, 48, 9),
+            'F': (25000, 75, 15),
+        },
+        'WJ': {
+            'Q': (10000, 30, 6),
+            'F': (20000, 60, 12),
+        },
+    },
+    400: {
+        'ME': {
+            'Q': (20000, 50, 10),
+            'F': (40000, 100, 20),
+        },
+        'WE': {
+            'Q': (16000, 40, 8),
+            'F': (25000, 65, 13),
+        },
+        'MJ': {
+            'Q': (16000, 40, 8),
+            'F': (25000, 65, 13),
+        },
+        'WJ': {
+            'Q': (10000, 25, 5),
+            'F': (20000, 50, 10),
+        },
+    },
+}
+
+# Sprint Competition Builder
+_SPRINT_TABLES = {
+    'wc': _SPRINT_COMPETITION,
+    'oc': _OLY_SPRINT_COMPETITION,
+    'au': _AU_SPRINT_COMPETITION,
+    'current': 'wc',
+}
+_SPRINT_COMPETITION_BUILDER = {
+    'ctype': {
+        'prompt': 'Sprint',
+        'control': 'section',
+    },
+    'table': {
+        'prompt': 'Table:',
+        'control': 'choice',
+        'options': {
+            'wc': 'World Cup/World Champs',
+            'oc': 'Olympics',
+            'au': 'Australian Track Champs',
+        },
+        'value': 'wc',
+        'defer': True,
+        'hint': 'Sprint organisation table',
+    },
+    'cat': {
+        'prompt': 'Category:',
+        'control': 'choice',
+        'defer': True,
+        'hint': 'Competitor category',
+    },
+    'series': {
+        'prompt': 'Number Series:',
+        'control': 'short',
+        'hint': 'Competitor number series',
+        'defer': True,
+    },
+    'code': {
+        'prompt': 'Competition ID:',
+        'control': 'short',
+        'hint': 'Competition identifier',
+        'value': 'pursuit',
+        'defer': True,
+    },
+    'entrants': {
+        'prompt': 'Entrants:',
+        'control': 'short',
+        'type': 'int',
+        'hint': 'Optional number of competitors',
+        'defer': True,
+    },
+    'replace': {
+        'prompt': 'Replace:',
+        'control': 'check',
+        'type': 'bool',
+        'subtext': 'Yes?',
+        'hint': 'Reset and overwrite an existing competition',
+        'value': True,
+        'defer': True,
+    },
+}
+# Generic Competition Builder Qual/Finals, Medals, Series, Entrants
+_COMPETITION_BUILDER = {
+    'ctype': {
+        'prompt': 'Pursuit',
+        'control': 'section',
+    },
+    'cat': {
+        'prompt': 'Category:',
+        'control': 'choice',
+        'defer': True,
+        'hint': 'Competitor category',
+    },
+    'series': {
+        'prompt': 'Number Series:',
+        'control': 'short',
+        'hint': 'Competitor number series',
+        'defer': True,
+    },
+    'code': {
+        'prompt': 'Competition ID:',
+        'control': 'short',
+        'hint': 'Competition identifier',
+        'value': 'pursuit',
+        'defer': True,
+    },
+    'entrants': {
+        'prompt': 'Entrants:',
+        'control': 'short',
+        'type': 'int',
+        'hint': 'Optional number of competitors',
+        'defer': True,
+    },
+    'replace': {
+        'prompt': 'Replace:',
+        'control': 'check',
+        'type': 'bool',
+        'subtext': 'Yes?',
+        'hint': 'Reset and overwrite an existing competition',
+        'value': True,
+        'defer': True,
+    },
+}
+
+
+def comp_builder(window, meet, comptype):
+    """Build a standards-based competition and add to meet."""
+    label = None
+    options_schema = None
+    comptable = None
+    catinfo = CategoryInfo()
+    catinfo.load()
+    title = 'Add Competition'
+    catlist = {}
+    for c, info in catinfo._store.items():
+        if info['Discipline'] in ('all', 'track'):
+            lbl = '%s: %s' % (c, info['Title'])
+            catlist[c] = lbl
+    if comptype in ('pursuit', 'individual pursuit'):
+        comptype = 'individual pursuit'
+        label = 'Individual Pursuit'
+        options_schema = _COMPETITION_BUILDER
+        # Overwrite schema values as required
+        options_schema['ctype']['prompt'] = label
+        options_schema['cat']['options'] = catlist
+        options_schema['series']['value'] = ''
+        options_schema['code']['value'] = 'ip'
+    elif comptype == 'team pursuit':
+        label = 'Team Pursuit'
+        options_schema = _COMPETITION_BUILDER
+        # Overwrite schema values as required
+        options_schema['ctype']['prompt'] = label
+        options_schema['cat']['options'] = catlist
+        options_schema['series']['value'] = 'tp'
+        options_schema['code']['value'] = 'tp'
+    elif comptype == 'team sprint':
+        label = 'Team Sprint'
+        options_schema = _COMPETITION_BUILDER
+        # Overwrite schema values as required
+        options_schema['ctype']['prompt'] = label
+        options_schema['cat']['options'] = catlist
+        options_schema['series']['value'] = 'ts'
+        options_schema['code']['value'] = 'ts'
+    elif comptype == 'time trial':
+        label = 'Time Trial'
+        options_schema = _COMPETITION_BUILDER
+        # Overwrite schema values as required
+        options_schema['ctype']['prompt'] = label
+        options_schema['cat']['options'] = catlist
+        options_schema['series']['value'] = ''
+        options_schema['code']['value'] = 'tt'
+    elif comptype == 'keirin':
+        label = 'Keirin'
+        options_schema = _COMPETITION_BUILDER
+        # Overwrite schema values as required
+        options_schema['ctype']['prompt'] = label
+        for cat in ('U9', 'M9', 'W9', 'U11', 'M11', 'W11', 'U13', 'M13',
+                    'W13'):
+            if cat in catlist:
+                del (catlist[cat])
+        options_schema['cat']['options'] = catlist
+        options_schema['series']['value'] = ''
+        options_schema['code']['value'] = 'keirin'
+    elif comptype == 'sprint':
+        label = 'Sprint'
+        options_schema = _SPRINT_COMPETITION_BUILDER
+        # Overwrite schema values as required
+        options_schema['ctype']['prompt'] = label
+        options_schema['cat']['options'] = catlist
+        options_schema['series']['value'] = ''
+        options_schema['table']['value'] = _SPRINT_TABLES['current']
+        options_schema['code']['value'] = 'sprint'
+    elif comptype in ('scratch race', 'points race', 'elimination race',
+                      'madison'):
+        label = comptype.title()
+        if comptype in _COMPIDS:
+            comptype = _COMPIDS[comptype]  # scratch race => scratch
+        options_schema = _COMPETITION_BUILDER
+        options_schema['ctype']['prompt'] = label
+        options_schema['cat']['options'] = catlist
+        if comptype == 'madison':
+            options_schema['series']['value'] = 'tm'
+        else:
+            options_schema['series']['value'] = ''
+        options_schema['code']['value'] = comptype
+
+    if options_schema is None:
+        _log.info('Missing schema for %s builder', comptype)
+        return
+
+    res = options_dlg(window=window,
+                      title=title,
+                      action=True,
+                      sections={
+                          'comp': {
+                              'title': 'Competition',
+                              'schema': options_schema,
+                              'object': {},
+                          }
+                      })
+    if res['action'] == 0:  # OK
+        if res['comp']['cat'][2]:  # cat is defined
+            cat = res['comp']['cat'][2]
+            category = catinfo.get_cat(cat)
+            masters = catinfo.is_masters(cat)
+            u13 = catinfo.is_u13(cat)
+            u17 = catinfo.is_u17(cat)
+            meet.addcat(cat, category['Title'])
+            series = res['comp']['series'][2]
+            code = res['comp']['code'][2]
+            entrants = res['comp']['entrants'][2]
+            overwrite = res['comp']['replace'][2]
+            dofinals = True
+            if u13:
+                _log.info('Qualifying phase skipped for Under 13 category')
+                dofinals = False
+            _log.debug('Building competition for cat=%s code=%s', cat, code)
+            if comptype in ('individual pursuit', 'team pursuit'):
+                if entrants is None:
+                    entrants = 5  # assume full competition
+                elif entrants < 2:
+                    dofinals = False
+                build_pursuit_comp(meet, label, cat, category, series, code,
+                                   dofinals, entrants, overwrite)
+            elif comptype == 'team sprint':
+                doround1 = False
+                if entrants is None:
+                    entrants = 9  # assume full competition
+                if entrants > 4 and not (masters or u17 or u13):
+                    _log.debug('TS: Round 1 enabled for cat %r', cat)
+                    doround1 = True
+                elif entrants < 2:
+                    dofinals = False
+                build_ts_comp(meet, label, cat, category, series, code,
+                              dofinals, entrants, doround1, overwrite)
+            elif comptype == 'time trial':
+                if masters:
+                    if dofinals:
+                        _log.info(
+                            'Qualifying phase skipped for masters category')
+                    dofinals = False
+                if entrants is None:
+                    entrants = 9  # assume full competition
+                elif entrants < 9:
+                    dofinals = False
+                build_itt_comp(meet, label, cat, category, series, code,
+                               dofinals, entrants, overwrite)
+            elif comptype == 'keirin':
+                if u13:
+                    _log.info(
+                        'Keirin competition not defined for under 13 categories'
+                    )
+                    return
+                if entrants is None:
+                    entrants = 10  # 3.2.135
+                elif entrants < 10:
+                    _log.info(
+                        'Not enough starters for standard Keirin competition')
+                    return
+                build_keirin_comp(meet, label, cat, category, series, code,
+                                  entrants, overwrite)
+            elif comptype == 'sprint':
+                tc = res['comp']['table'][2]
+                comptable = _SPRINT_TABLES['wc']
+                if tc in _SPRINT_TABLES:
+                    comptable = _SPRINT_TABLES[tc]
+                    _SPRINT_TABLES['current'] = tc
+
+                # adjust 1/4 final heats for youth and masters (applies to all tables)
+                if (meet.domestic and masters) or u13 or u17:
+                    comptable['1.4']['heats'] = 1
+                else:
+                    comptable['1.4']['heats'] = 3
+                if entrants is None:
+                    entrants = 8  # assume a minimum number 3.2.031
+                elif entrants < 2:
+                    _log.info('Degenerate sprint competition for %s category',
+                              cat)
+                    dofinals = False
+                build_sprint_comp(meet, label, cat, category, series, code,
+                                  dofinals, entrants, comptable, overwrite)
+            elif comptype in ('scratch', 'points', 'elimination', 'madison'):
+                trackmax = meet.get_competitor_limit(
+                    madison=comptype == 'madison')
+                if entrants is None:
+                    entrants = 1  # assume no heats required
+                if u13 and entrants > trackmax:
+                    _log.info(
+                        'Track maximum exceeded for %d U13 entrants in %s',
+                        entrants, label)
+                    entrants = trackmax
+                    dofinals = False
+                elif entrants <= trackmax:
+                    _log.info('Qualifying skipped for <%d entrants in %s',
+                              trackmax, label)
+                    dofinals = False
+                build_bunch_comp(meet, label, cat, category, series, code,
+                                 dofinals, entrants, trackmax, comptype,
+                                 masters, overwrite)
+        else:
+            _log.info('No cat selected for new competion')
+    return False
+
+
+def comp_label_short(label):
+    """Return a short, ~2 character id for the given competition label."""
+    ret = ''
+    lcheck = label.lower().translate(strops.WEBFILE_UTRANS)
+
+    if lcheck in _COMPABBREVS:
+        ret = _COMPABBREVS[lcheck]
+    else:
+        ret = lcheck[0:2]
+    return ret
+
+
+def _normdep(srcmap, idmap={}):
+    """Convert srcmap to dependency string substituting event ids from idmap."""
+    rv = []
+    for src in srcmap:
+        evid = src
+        if src in idmap:
+            evid = idmap[src]
+        rv.append(evid)
+    return ' '.join(rv)
+
+
+def _normauto(srcmap, idmap={}):
+    """Convert srcmap to autostart string substituting event ids from idmap."""
+    rv = []
+    for src, places in srcmap.items():
+        evid = src
+        if src in idmap:
+            evid = idmap[src]
+        rv.append('%s: %s' % (evid, places))
+    return '; '.join(rv)
+
+
+def _preauto(autospec, comp):
+    """Prefix ids in srcmap with comp, return depends and auto strings."""
+    dep = []
+    auto = []
+    for spec in autospec.split(';'):
+        if spec:
+            if ':' in spec:
+                evid, places = spec.split(':', 1)
+                nevid = '%s%s' % (comp, evid.strip())
+                dep.append(nevid)
+                auto.append('%s:%s' % (nevid, places.strip()))
+            else:
+                nevid = '%s%s' % (comp, spec.strip())
+                dep.append(nevid)
+                auto.append(nevid)
+    return ' '.join(dep), '; '.join(auto)
+
+
+def build_sprint_comp(meet, label, cat, category, series, code, dofinals,
+                      entrants, comptable, overwrite):
+    """Create sprint events, add to meet."""
+    laps = 3  # applies to sprint rounds only
+    laplen = meet.get_laplen()
+    if laplen >= 333.33:  # 3.2.035
+        laps = 2
+    distance = '200\u2006m, flying start'  # applies to qualifying only
+
+    if not entrants:
+        entrants = 8  # 3.2.031
+
+    # check and clean competition code
+    if code is not None:
+        code = code.translate(strops.PRINT_UTRANS).strip()
+    else:
+        code = ''
+    if not code:
+        code = label.lower().translate(strops.WEBFILE_UTRANS)
+
+    # ensure series is set
+    if series is None:
+        series = ''
+
+    qualtype = 'flying 200'
+    roundtype = 'sprint round'
+    finaltype = 'sprint final'
+    derbytype = 'derby'
+    pseudotype = 'sprint heat'
+
+    # find an unused event id for the catcomp
+    compid = comp_label_short(label)
+    catcomp = cat.lower() + compid
+    if not overwrite:
+        count = 1
+        while catcomp in meet.edb:
+            count += 1
+            catcomp = '%s%s%d' % (cat.lower(), compid, count)
+
+    prefix = '%s %s' % (
+        category['Title'],
+        label,
+    )
+
+    if dofinals:
+        # construct phases as per 3.2.050
+        idmap = {}
+        eventlist = []  # event ids to be reported with result
+        placeslist = []  # places in the final classification
+        otherslist = []  # ranked together according to 200m TT
+        othersrc = None  # id of 200m TT
+
+        # Determine first phase of competition after qualifying
+        phase = 'final'
+        phaselabel = 'Final'
+        nrqual = min(4, entrants)
+        if entrants >= 4:
+            for pid, detail in comptable.items():
+                if detail['firstround'] and entrants >= detail['entrants']:
+                    _log.debug('First sprint phase: %s %s', pid,
+                               detail['label'])
+                    phase = pid
+                    phaselabel = detail['label']
+                    nrqual = detail['entrants']
+                    break
+        nrdep = ''
+        nrstart = ''
+
+        # qualifying
+        qrule = ''
+        if entrants >= 4:
+            # add qrule even when entrants == nrqual;
+            qrule = 'Top %d to %s' % (nrqual, phaselabel)
+        elif entrants == 3:
+            qrule = '1st&2nd to gold final; 3rd bronze'
+            nrqual = 2
+        elif entrants == 2:
+            qrule = 'Top 2 to gold final'
+            nrqual = 2
+        pqid = '%sq' % (catcomp, )
+        idmap['qualifying'] = pqid
+        othersrc = pqid
+        pqev = meet.edb.add_or_replace(evno=pqid, notify=False)
+        pqev.set_values({
+            'series': series,
+            'reference': catcomp,
+            'type handler': qualtype,
+            'prefix': prefix,
+            'info': 'Qualifying',
+            'result': False,
+            'index': True,
+            'program': True,
+            'qualifiers': nrqual,
+            'distance': distance,
+            'rules': qrule,
+            'category': cat,
+            'competion': code,
+            'phase': 'qualifying',
+        })
+        eventlist.insert(0, pqid)
+        minplace = nrqual + 1
+        if minplace <= entrants:
+            # at least one plain other
+            otherslist.append('%s:%d-' % (pqid, minplace))
+
+        # send qualified to next round - manually, ignore the table for now
+        nrdep = pqid
+        nrstart = '%s: 1-%s' % (pqid, nrqual)
+
+        # other phases
+        while phase is not None:
+            detail = comptable[phase].copy()
+
+            if nrdep is None:
+                srcobj = detail['source'].copy()
+                if phase == '1.8' and '1.16a' in srcobj:
+                    # handle alternative round of 32
+                    if entrants < 32:
+                        # assume round of 24+rep to start
+                        del (srcobj['1.16a'])
+                    else:
+                        # assume round of 32 straight to round of 16
+                        del (srcobj['1.16'])
+                        del (srcobj['rep189'])
+                        del (srcobj['rep2710'])
+                        del (srcobj['rep3611'])
+                        del (srcobj['rep4512'])
+                        del (detail['contests'])
+                elif phase == '1.4' and '1.8a' in srcobj:
+                    # handle alternative round of 16
+                    if '1.8a' in idmap:
+                        # assume round of 16 straight to round of 8
+                        del (srcobj['1.8'])
+                    else:
+                        # assume r12+rep alternate start
+                        del (srcobj['1.8a'])
+                        del (srcobj['rep145'])
+                        del (srcobj['rep236'])
+                        del (detail['contests'])
+                nrdep = _normdep(srcobj, idmap)
+                nrstart = _normauto(srcobj, idmap)
+
+            pcount = detail['entrants']
+            if phase == 'final' and entrants < 4:
+                pcount = 2  # for gold only final
+
+            einfo = detail['label']
+            etype = roundtype
+            phrule = []
+            if detail['heats'] > 1:
+                etype = finaltype
+                phrule.append('Best of 3 heats')
+            elif detail['heats'] == 0:
+                etype = derbytype
+            qcount = detail['qualifiers']
+            if detail['rule'] and qcount != pcount or phase == '1.2':
+                phrule.append(detail['rule'])
+
+            # phase head
+            phid = '%s%s' % (catcomp, detail['evid'])
+            idmap[phase] = phid
+            phev = meet.edb.add_or_replace(evno=phid, notify=False)
+            phev.set_values({
+                'series': series,
+                'reference': catcomp,
+                'type handler': etype,
+                'prefix': prefix,
+                'info': einfo,
+                'result': False,
+                'index': True,
+                'program': True,
+                'depends': nrdep,
+                'auto': nrstart,
+                'placeholders': pcount,
+                'laps': laps,
+                'rules': '; '.join(phrule),
+                'category': cat,
+                'competion': code,
+                'phase': phase,
+            })
+            # heat 2/3 dummy events
+            if detail['heats'] > 1:
+                h2id = '%s%s%s' % (catcomp, detail['evid'], 'h2')
+                h2ev = meet.edb.add_or_replace(evno=h2id, notify=False)
+                h2label = einfo + ' Heat 2'
+                h2ev.set_values({
+                    'series': series,
+                    'reference': phid,  # dummies point to phase head
+                    'type handler': pseudotype,
+                    'prefix': prefix,
+                    'info': h2label,
+                    'result': False,
+                    'index': True,
+                    'laps': laps,
+                    'rules': '; '.join(phrule),
+                    'program': True,
+                })
+                h3id = '%s%s%s' % (catcomp, detail['evid'], 'h3')
+                h3ev = meet.edb.add_or_replace(evno=h3id, notify=False)
+                h3label = einfo + ' Heat 3'
+                h3ev.set_values({
+                    'series': series,
+                    'reference': phid,  # dummies point to phase head
+                    'type handler': pseudotype,
+                    'prefix': prefix,
+                    'info': h3label,
+                    'result': False,
+                    'index': True,
+                    'laps': laps,
+                    'rules': '; '.join(phrule),
+                    'program': True,
+                })
+            # save heat references to phase head
+            if etype != derbytype:
+                c = meet.get_event(phid, closecurrent=True)
+                c.readonly = False
+                c.loadconfig()
+                if detail['heats'] > 1:
+                    c.heat2evno = h2id
+                    c.heat3evno = h3id
+                else:
+                    c.heat2evno = None
+                    c.heat3evno = None
+                c.otherstime = detail['otherstime']
+                if 'contests' in detail and detail['contests']:
+                    c.contestlist = detail['contests']
+                c.saveconfig()
+                c = None
+
+            # Append any decided places to classification
+            eventlist.insert(0, phid)
+            if phase == 'final':
+                if pcount == 2:
+                    placeslist.insert(0, '%s: 1,2' % (phid, ))
+                if pcount == 4 and detail['places'] is not None:
+                    placeslist.insert(0, '%s: %s' % (phid, detail['places']))
+            else:
+                if detail['places'] is not None:
+                    placeslist.insert(0, '%s: %s' % (phid, detail['places']))
+
+            # Group others in classification if required
+            if detail['others']:
+                otherslist.insert(0, '%s: %s' % (phid, detail['others']))
+
+            # advance to next phase
+            phase = detail['next']
+            nrdep = None
+            nrstart = None
+
+        # classification
+        showevs = ' '.join(eventlist)
+        places = '; '.join(placeslist)
+        pev = meet.edb.add_or_replace(evno=catcomp, notify=True)
+        pev.set_values({
+            'series': series,
+            'type handler': 'classification',
+            'prefix': prefix,
+            'info': '',
+            'result': True,
+            'index': False,
+            'program': False,
+            'depends': showevs,
+            'auto': places,
+            'category': cat,
+            'competion': code,
+        })
+        c = meet.get_event(catcomp, closecurrent=True)
+        c.readonly = False
+        c.loadconfig()
+        c.medals = ''
+        if othersrc:
+            c.othersrc = othersrc
+        else:
+            c.othersrc = ''
+        c.others = '; '.join(otherslist)
+        c.saveconfig()
+        c = None
+
+    else:
+        # flying 200m only
+        pid = '%sf' % (catcomp, )
+        pev = meet.edb.add_or_replace(evno=pid, notify=True)
+        pev.set_values({
+            'series': series,
+            'type handler': qualtype,
+            'prefix': prefix,
+            'info': 'Final',
+            'result': True,
+            'index': True,
+            'program': True,
+            'laps': '',
+            'distance': distance,
+            'category': cat,
+            'competion': code,
+            'phase': 'final',
+        })
+
+
+def bunch_heats(limit, entrants):
+    """Return number of heats, rejects per heat and number of finalists."""
+    if entrants <= limit:
+        return (0, 0, entrants)
+
+    # otherwise heats will be required
+    heats = ceil(entrants / limit)
+    perheat = ceil(entrants / heats)
+    accepted = floor(limit / heats)
+    rejected = max(2, perheat - accepted)
+    totrejected = heats * rejected
+    finalists = entrants - totrejected
+    return (heats, rejected, finalists)
+
+
+def sprint_laps(laps, meet):
+    """Return a list of sprint laps for the points race."""
+    lapspersprint = 10
+    if meet.get_laplen() > 333.0:
+        lapspersprint = 5
+    ret = []
+    sprintlap = 0
+    sprintlaps = floor(laps / lapspersprint)
+    for s in range(sprintlaps):
+        ret.insert(0, str(sprintlap))
+        sprintlap += lapspersprint
+    return ret
+
+
+def build_bunch_comp(meet, label, cat, category, series, code, dofinals,
+                     entrants, trackmax, comptype, masters, overwrite):
+    """Create bunch events, add to meet."""
+
+    # is a qualifying round required
+    doqual = dofinals
+    heats, rejected, finalists = bunch_heats(trackmax, entrants)
+
+    # check and clean competition code
+    if code is not None:
+        code = code.translate(strops.PRINT_UTRANS).strip()
+    else:
+        code = ''
+    if not code:
+        code = label.lower().translate(strops.WEBFILE_UTRANS)
+
+    # ensure series is set
+    if series is None:
+        series = ''
+
+    # set event types
+    finaltype = comptype
+    qualtype = comptype
+
+    # setup distances for finals
+    dm = None
+    distance = None
+    laps = None
+    if comptype == 'elimination':
+        # [3.2.219]
+        qualtype = 'scratch'
+    else:
+        if category[label]:
+            laps = None
+            dm = category[label]
+            distance = '%0.1f\u2006km' % (dm / 1000, )
+            lc = meet.tracklen_d * dm / meet.tracklen_n
+            if (lc - int(lc)) < 0.25:  # probably even-ish
+                laps = int(lc)
+
+    # find an unused event id for the catcomp
+    compid = comp_label_short(label)
+    catcomp = cat.lower() + compid
+    if not overwrite:
+        count = 1
+        while catcomp in meet.edb:
+            count += 1
+            catcomp = '%s%s%d' % (cat.lower(), compid, count)
+
+    prefix = '%s %s' % (
+        category['Title'],
+        label,
+    )
+
+    finalsprints = []
+    tenpoints = False
+    lastdouble = False
+    if comptype in ('madison', 'points'):
+        lastdouble = True
+        if meet.domestic:
+            # assume AU override for last lap & ten points/lap
+            if dm and dm < 15000:
+                tenpoints = True
+                lastdouble = False
+        else:
+            # [3.9.006]
+            if masters and dm and dm < 20000:
+                tenpoints = True
+        # build sprints based on lap count
+        finalsprints = sprint_laps(laps, meet)
+    _log.debug(
+        '%s: %s finalsprints=%r, tenpoints=%r, lastdouble=%r, distance=%r, laps=%r, entrants=%r, rejected=%r, finalists=%r',
+        comptype, cat, finalsprints, tenpoints, lastdouble, dm, laps, entrants,
+        rejected, finalists)
+
+    if dofinals:
+        # Build qualifying and final phases as per 3.2.115, 3.2.157,
+        # 3.2.175, 3.2.219
+        otherslist = []
+        eventlist = []
+        heatm = None
+        heatdistance = None
+        heatlaps = None
+        heatlabel = '%s Qualifying' % (qualtype.title(), )
+        heattenpoints = False
+        heatlastdouble = False
+
+        if heatlabel in category and category[heatlabel]:
+            heatm = category[heatlabel]
+            heatdistance = '%0.1f\u2006km' % (heatm / 1000, )
+            lc = meet.tracklen_d * heatm / meet.tracklen_n
+            if (lc - int(lc)) < 0.25:  # probably even-ish
+                heatlaps = int(lc)
+        if not heatm and masters:
+            # try to determine heats at half distance [3.9.006]
+            if dm:
+                heatm = dm // 2
+                heatdistance = '%d\u2006m' % (heatm, )
+                lc = meet.tracklen_d * heatm / meet.tracklen_n
+                if (lc - int(lc)) < 0.01:  # probably even
+                    heatlaps = int(lc)
+        heatsprints = []
+        if qualtype in ('madison', 'points'):
+            heatlastdouble = True
+            if meet.domestic:
+                # assume AU override for last lap & ten points/lap
+                if heatm and heatm < 15000:
+                    heattenpoints = True
+                    heatlastdouble = False
+            else:
+                # [3.9.006]
+                if masters and heatm and heatm < 20000:
+                    heattenpoints = True
+            if heatlaps:
+                heatsprints = sprint_laps(heatlaps, meet)
+
+        _log.debug(
+            '%s: %s %d heats heatlen=%r heatlaps=%r heatsprints=%r, heattenpoints=%r, heatlastdouble=%r',
+            qualtype, cat, heats, heatm, heatlaps, heatsprints, heattenpoints,
+            heatlastdouble)
+        riders = 'riders'
+        if comptype == 'madison' or series.startswith('t'):
+            riders = 'teams'
+        quallist = []
+        finalists = []
+        for h in range(heats):
+            heat = h + 1
+            iline = 'Qualifying Heat %d' % (heat, )
+            rline = ''
+            if rejected:
+                # will be 0 or 2+
+                rline = '%d %s eliminated' % (rejected, riders)
+            qhid = '%sq%d' % (catcomp, heat)
+            eventlist.append(qhid)
+            quallist.append(qhid)
+            finalists.append('%s:Q' % (qhid, ))
+            qhev = meet.edb.add_or_replace(evno=qhid, notify=False)
+            qhev.set_values({
+                'series': series,
+                'reference': catcomp,
+                'type handler': qualtype,
+                'prefix': prefix,
+                'info': iline,
+                'result': False,
+                'index': True,
+                'program': True,
+                'laps': heatlaps,
+                'distance': heatdistance,
+                'rule': rline,
+                'qualifiers': -rejected,
+                'category': cat,
+                'competion': code,
+                'phase': 'qualifying',
+                'contest': str(heat),
+            })
+            if qualtype in ('madison', 'points'):
+                c = meet.get_event(qhid, closecurrent=True)
+                c.readonly = False
+                c.loadconfig()
+                c.tenptlaps = heattenpoints
+                c.reset_lappoints()
+                if heatlastdouble:
+                    c.sprintpoints['0'] = '10 6 4 2'
+                else:
+                    c.sprintpoints['0'] = '5 3 2 1'
+                c.sprintlaps = ' '.join(heatsprints)
+                c.sprint_model_init(retain=overwrite)
+                c.saveconfig()
+                c = None
+            # qualified riders handled by topn
+            # unqualified riders grouped as others
+            # otherslist.append('%s:-Q' % (qhid, ))
+        # then add final
+        fid = '%sf' % (catcomp, )
+        eventlist.insert(0, fid)
+        fev = meet.edb.add_or_replace(evno=fid, notify=False)
+        fev.set_values({
+            'series': series,
+            'reference': catcomp,
+            'type handler': finaltype,
+            'prefix': prefix,
+            'info': 'Final',
+            'result': True,
+            'index': True,
+            'depend': ' '.join(quallist),
+            'auto': '; '.join(finalists),
+            'program': True,
+            'laps': laps,
+            'distance': distance,
+            'category': cat,
+            'competion': code,
+            'phase': 'final',
+        })
+        if comptype in ('madison', 'points'):
+            c = meet.get_event(fid, closecurrent=True)
+            c.readonly = False
+            c.loadconfig()
+            c.tenptlaps = tenpoints
+            if lastdouble:
+                c.sprintpoints['0'] = '10 6 4 2'
+            else:
+                c.sprintpoints['0'] = '5 3 2 1'
+            c.sprintlaps = ' '.join(finalsprints)
+            c.sprint_model_init(retain=overwrite)
+            c.saveconfig()
+            c = None
+        # classification - only used to aggregate events
+        showevs = ' '.join(eventlist)
+        places = fid
+        pev = meet.edb.add_or_replace(evno=catcomp, notify=True)
+        pev.set_values({
+            'series': series,
+            'type handler': 'classification',
+            'prefix': prefix,
+            'info': '',
+            'result': True,
+            'index': False,
+            'program': False,
+            'depends': showevs,
+            'auto': '',
+            'category': cat,
+            'competion': code,
+        })
+        c = meet.get_event(catcomp, closecurrent=True)
+        c.readonly = False
+        c.loadconfig()
+        c.others = ''
+        c.othersrc = ''
+        c.medals = ''
+        c.saveconfig()
+        c = None
+    else:
+        # straight final
+        pid = '%sf' % (catcomp, )
+        pev = meet.edb.add_or_replace(evno=pid, notify=True)
+        pev.set_values({
+            'series': series,
+            'type handler': finaltype,
+            'prefix': prefix,
+            'info': 'Final',
+            'result': True,
+            'index': True,
+            'program': True,
+            'laps': laps,
+            'distance': distance,
+            'category': cat,
+            'competion': code,
+            'phase': 'final',
+        })
+        if comptype in ('madison', 'points'):
+            c = meet.get_event(pid, closecurrent=True)
+            c.readonly = False
+            c.loadconfig()
+            c.tenptlaps = tenpoints
+            if lastdouble:
+                c.sprintpoints['0'] = '10 6 4 2'
+            else:
+                c.sprintpoints['0'] = '5 3 2 1'
+            c.sprintlaps = ' '.join(finalsprints)
+            c.sprint_model_init(retain=overwrite)
+            c.saveconfig()
+            c = None
+
+
+def build_ts_comp(meet, label, cat, category, series, code, dofinals, entrants,
+                  doround1, overwrite):
+    """Create team sprint events, add to meet."""
+
+    # assume three riders unless overridden
+    laps = 3
+    if category[label]:
+        laps = category[label]
+    dm = laps * meet.tracklen_n / meet.tracklen_d
+    distance = '%0.0f\u2006m' % (dm, )
+
+    # check and clean competition code
+    if code is not None:
+        code = code.translate(strops.PRINT_UTRANS).strip()
+    else:
+        code = ''
+    if not code:
+        code = label.lower().translate(strops.WEBFILE_UTRANS)
+
+    # ensure series is set
+    if series is None:
+        series = ''
+
+    qualtype = 'team sprint'
+    roundtype = 'team sprint race'
+    finaltype = 'team sprint race'
+
+    # find an unused event id for the catcomp
+    compid = comp_label_short(label)
+    catcomp = cat.lower() + compid
+    if not overwrite:
+        count = 1
+        while catcomp in meet.edb:
+            count += 1
+            catcomp = '%s%s%d' % (cat.lower(), compid, count)
+
+    prefix = '%s %s' % (
+        category['Title'],
+        label,
+    )
+
+    if dofinals:
+        # Build qualifying, round1 and final phases as per 3.2.145
+        eventlist = []  # event ids to be reported with result
+        placeslist = []  # places in the final classification
+        otherslist = []  # unqualified competitors
+        othersrc = None  # ranking basis for others
+
+        # qualifying
+        pqid = '%sq' % (catcomp, )
+        pqev = meet.edb.add_or_replace(evno=pqid, notify=False)
+
+        # default to no round 1
+        qrule = 'Top 8 to round 1'
+        pqual = min(8, entrants)
+        if not doround1:
+            qrule = '1st&2nd to gold final; 3rd&4th to bronze'
+            pqual = 4
+            if entrants == 3:
+                qrule = '1st & 2nd to gold final'
+                pqual = 2
+
+        pqev.set_values({
+            'series': series,
+            'reference': catcomp,
+            'type handler': qualtype,
+            'prefix': prefix,
+            'info': 'Qualifying',
+            'result': False,
+            'index': True,
+            'program': True,
+            'qualifiers': pqual,
+            'laps': laps,
+            'distance': distance,
+            'rules': qrule,
+            'category': cat,
+            'competion': code,
+            'phase': 'qualifying',
+        })
+        eventlist.insert(0, pqid)
+        minplace = pqual + 1
+        if minplace <= entrants:
+            # at least one other
+            otherslist.append('%s:%d-' % (pqid, minplace))
+            othersrc = pqid  # rank others by qual place
+
+        bspec = '%s: 3,4' % (pqid, )
+        gspec = '%s: 1,2' % (pqid, )
+        mdep = pqid
+
+        # Round 1
+        if doround1:
+            gspec = ''  # TBC
+            bspec = ''  # TBC
+            mdep = ''  # TBC
+            phase = 'r1'
+            eid = entrants
+            if eid not in _TEAM_SPRINT_ROUND1:
+                # assume full pack
+                eid = 8
+            # always 4 "heats"
+            for h in range(4):
+                heat = h + 1
+                contest = str(heat)
+                r1hid = '%sr%d' % (catcomp, heat)
+                rspec, rph, rlabel = _TEAM_SPRINT_ROUND1[eid][heat]
+                r1hev = meet.edb.add_or_replace(evno=r1hid, notify=False)
+                r1hev.set_values({
+                    'series': series,
+                    'reference': catcomp,
+                    'type handler': roundtype,
+                    'prefix': prefix,
+                    'info': 'Round 1 %s' % (rlabel, ),
+                    'result': False,
+                    'index': True,
+                    'program': True,
+                    'depends': pqid,
+                    'auto': '%s: %s' % (pqid, rspec),
+                    'placeholders': rph,
+                    'laps': laps,
+                    'distance': distance,
+                    'rules':
+                    'Fastest 2 winners to gold final; other winners to bronze',
+                    'category': cat,
+                    'competion': code,
+                    'phase': 'r1',
+                    'contest': contest,
+                })
+                eventlist.insert(0, r1hid)
+                # TBC placelist insert losers ranked by this time :/
+
+        # bronze final: 4 or more entrants (masters AU:3.02.02)
+        if entrants > 3:
+            pfbid = '%sfb' % (catcomp, )
+            pfbev = meet.edb.add_or_replace(evno=pfbid, notify=False)
+            pfbev.set_values({
+                'series': series,
+                'reference': catcomp,
+                'type handler': finaltype,
+                'prefix': prefix,
+                'info': 'Bronze Final',
+                'result': False,
+                'index': True,
+                'program': True,
+                'depends': mdep,
+                'auto': bspec,
+                'placeholders': 2,
+                'laps': laps,
+                'distance': distance,
+                'category': cat,
+                'competion': code,
+                'phase': 'final',
+                'contest': 'bronze',
+            })
+            eventlist.insert(0, pfbid)
+            placeslist.insert(0, '%s: 1,2' % (pfbid, ))
+
+        # gold final
+        pfgid = '%sfg' % (catcomp, )
+        pfgev = meet.edb.add_or_replace(evno=pfgid, notify=False)
+        pfgev.set_values({
+            'series': series,
+            'reference': catcomp,
+            'type handler': finaltype,
+            'prefix': prefix,
+            'info': 'Gold Final',
+            'result': False,
+            'index': True,
+            'program': True,
+            'depends': mdep,
+            'auto': gspec,
+            'placeholders': 2,
+            'laps': laps,
+            'distance': distance,
+            'category': cat,
+            'competion': code,
+            'phase': 'final',
+            'contest': 'gold',
+        })
+        eventlist.insert(0, pfgid)
+        placeslist.insert(0, '%s: 1,2' % (pfgid, ))
+
+        # classification
+        showevs = ' '.join(eventlist)
+        places = '; '.join(placeslist)
+        pev = meet.edb.add_or_replace(evno=catcomp, notify=True)
+        pev.set_values({
+            'series': series,
+            'type handler': 'classification',
+            'prefix': prefix,
+            'info': '',
+            'result': True,
+            'index': False,
+            'program': False,
+            'depends': showevs,
+            'auto': places,
+            'category': cat,
+            'competion': code,
+        })
+        c = meet.get_event(catcomp, closecurrent=True)
+        c.readonly = False
+        c.loadconfig()
+        c.others = '; '.join(otherslist)
+        if othersrc:
+            c.othersrc = othersrc
+        else:
+            c.othersrc = ''
+        c.medals = ''
+        c.saveconfig()
+        c = None
+    else:
+        # straight final
+        pid = '%sfg' % (catcomp, )
+        pev = meet.edb.add_or_replace(evno=pid, notify=True)
+        pev.set_values({
+            'series': series,
+            'type handler': finaltype,
+            'prefix': prefix,
+            'info': 'Final',
+            'result': True,
+            'index': True,
+            'program': True,
+            'laps': laps,
+            'distance': distance,
+            'category': cat,
+            'competion': code,
+            'phase': 'final',
+        })
+
+
+def build_pursuit_comp(meet, label, cat, category, series, code, dofinals,
+                       entrants, overwrite):
+    """Create pursuit-like events, add to meet."""
+    laps = None
+    distance = ''
+    if label == 'Team Sprint':
+        # assume three riders unless overridden
+        laps = 3
+        if category[label]:
+            laps = category[label]
+        dm = laps * meet.tracklen_n / meet.tracklen_d
+        distance = '%0.0f\u2006m' % (dm, )
+    elif category[label]:
+        dm = category[label]
+        distance = '%d\u2006m' % (dm, )
+        lc = meet.tracklen_d * dm / meet.tracklen_n
+        if (lc - int(lc)) < 0.01:  # probably even
+            laps = int(lc)
+
+    # check and clean competition code
+    if code is not None:
+        code = code.translate(strops.PRINT_UTRANS).strip()
+    else:
+        code = ''
+    if not code:
+        code = label.lower().translate(strops.WEBFILE_UTRANS)
+
+    # ensure series is set
+    if series is None:
+        series = ''
+
+    qualtype = 'indiv pursuit'
+    finaltype = 'pursuit race'
+    if label == 'Team Sprint':
+        qualtype = 'team sprint'
+        finaltype = 'team sprint race'
+    elif label == 'Team Pursuit':
+        qualtype = 'team pursuit'
+        finaltype = 'team pursuit race'
+
+    # find an unused event id for the catcomp
+    compid = comp_label_short(label)
+    catcomp = cat.lower() + compid
+    if not overwrite:
+        count = 1
+        while catcomp in meet.edb:
+            count += 1
+            catcomp = '%s%s%d' % (cat.lower(), compid, count)
+
+    prefix = '%s %s' % (
+        category['Title'],
+        label,
+    )
+
+    if dofinals:
+        # Build qualifying and final phases as per 3.2.052
+        eventlist = []  # event ids to be reported with result
+        placeslist = []  # places in the final classification
+        otherslist = []  # unqualified competitors
+        othersrc = None  # ranking basis for others
+
+        pqid = '%sq' % (catcomp, )
+        pqev = meet.edb.add_or_replace(evno=pqid, notify=False)
+        qrule = '1st&2nd to gold final; 3rd&4th to bronze'
+        pqual = 4
+        if entrants == 3:
+            qrule = '1st & 2nd to gold final'
+            pqual = 2
+        pqev.set_values({
+            'series': series,
+            'reference': catcomp,
+            'type handler': qualtype,
+            'prefix': prefix,
+            'info': 'Qualifying',
+            'result': False,
+            'index': True,
+            'program': True,
+            'qualifiers': pqual,
+            'laps': laps,
+            'distance': distance,
+            'rules': qrule,
+            'category': cat,
+            'competion': code,
+            'phase': 'qualifying',
+        })
+        eventlist.insert(0, pqid)
+        minplace = pqual + 1
+        if minplace <= entrants:
+            # at least one other
+            otherslist.append('%s:%d-' % (pqid, minplace))
+            othersrc = pqid
+
+        # bronze final: 4 or more entrants (masters AU:3.02.02)
+        if entrants > 3:
+            pfbid = '%sfb' % (catcomp, )
+            pfbev = meet.edb.add_or_replace(evno=pfbid, notify=False)
+            pfbev.set_values({
+                'series': series,
+                'reference': catcomp,
+                'type handler': finaltype,
+                'prefix': prefix,
+                'info': 'Bronze Final',
+                'result': False,
+                'index': True,
+                'program': True,
+                'depends': pqid,
+                'auto': '%s: 3,4' % (pqid, ),
+                'placeholders': 2,
+                'laps': laps,
+                'distance': distance,
+                'category': cat,
+                'competion': code,
+                'phase': 'final',
+                'contest': 'bronze',
+            })
+            eventlist.insert(0, pfbid)
+            placeslist.insert(0, '%s: 1,2' % (pfbid, ))
+
+        # gold final
+        pfgid = '%sfg' % (catcomp, )
+        pfgev = meet.edb.add_or_replace(evno=pfgid, notify=False)
+        pfgev.set_values({
+            'series': series,
+            'reference': catcomp,
+            'type handler': finaltype,
+            'prefix': prefix,
+            'info': 'Gold Final',
+            'result': False,
+            'index': True,
+            'program': True,
+            'depends': pqid,
+            'auto': '%s: 1,2' % (pqid, ),
+            'placeholders': 2,
+            'laps': laps,
+            'distance': distance,
+            'category': cat,
+            'competion': code,
+            'phase': 'final',
+            'contest': 'gold',
+        })
+        eventlist.insert(0, pfgid)
+        placeslist.insert(0, '%s: 1,2' % (pfgid, ))
+
+        # classification
+        showevs = ' '.join(eventlist)
+        places = '; '.join(placeslist)
+        pev = meet.edb.add_or_replace(evno=catcomp, notify=True)
+        pev.set_values({
+            'series': series,
+            'type handler': 'classification',
+            'prefix': prefix,
+            'info': '',
+            'result': True,
+            'index': False,
+            'program': False,
+            'depends': showevs,
+            'auto': places,
+            'category': cat,
+            'competion': code,
+        })
+        c = meet.get_event(catcomp, closecurrent=True)
+        c.readonly = False
+        c.loadconfig()
+        c.others = '; '.join(otherslist)
+        if othersrc:
+            c.othersrc = othersrc
+        else:
+            c.othersrc = ''
+        c.medals = ''
+        c.saveconfig()
+        c = None
+    else:
+        # straight final
+        pid = '%sfg' % (catcomp, )
+        pev = meet.edb.add_or_replace(evno=pid, notify=True)
+        pev.set_values({
+            'series': series,
+            'type handler': finaltype,
+            'prefix': prefix,
+            'info': 'Final',
+            'result': True,
+            'index': True,
+            'program': True,
+            'laps': laps,
+            'distance': distance,
+            'category': cat,
+            'competion': code,
+            'phase': 'final',
+        })
+
+
+# Keirin competition table [3.2.135]
+# entrants -> phases -> contest
+_KEIRIN_TABLE = {
+    10: {
+        'r1': {
+            'h1': {
+                'code': 'r1h1',
+                'info': '1st Round Heat 1',
+                'rule': 'Top 3 to 1-6 final; 4th-6th to 7-12',
+                'others': '7-',
+            },
+            'h2': {
+                'code': 'r1h2',
+                'info': '1st Round Heat 2',
+                'rule': 'Top 3 to 1-6 final; 4th-6th to 7-12',
+                'others': '7-',
+            },
+        },
+        'final': {
+            '7-12': {
+                'code': 'f1',
+                'auto': 'r1h1:4-6; r1h2:4-6',
+                'info': '7-12 Final',
+                'places': '1-',
+            },
+            '1-6': {
+                'code': 'f2',
+                'auto': 'r1h1:1-3; r1h2:1-3',
+                'info': '1-6 Final',
+                'places': '1-6',
+            },
+        },
+    },
+    # R1 -> Rep -> 1/2 -> Final
+    15: {
+        'r1': {
+            'h1': {
+                'code': 'r1h1',
+                'info': '1st Round Heat 1',
+                'rule': 'Top 2 to 1/2 final; Others to repechage',
+            },
+            'h2': {
+                'code': 'r1h2',
+                'info': '1st Round Heat 2',
+                'rule': 'Top 2 to 1/2 final; Others to repechage',
+            },
+            'h3': {
+                'code': 'r1h3',
+                'info': '1st Round Heat 3',
+                'rule': 'Top 2 to 1/2 final; Others to repechage',
+            },
+        },
+        'rep1': {
+            'h1': {
+                'code': 'rp1h1',
+                'info': 'Repechage Heat 1',
+                'rule': 'Top 3 to 1/2 final',
+            },
+            'h2': {
+                'code': 'rp1h2',
+                'info': 'Repechage Heat 2',
+                'rule': 'Top 3 to 1/2 final',
+            },
+        },
+        '1.2': {
+            'h1': {
+                'code': 'sh1',
+                'info': '1/2 Final Heat 1',
+                'rule': 'Top 3 to 1-6 final; 4th-6th to 7-12',
+            },
+            'h2': {
+                'code': 'sh2',
+                'info': '1/2 Final Heat 2',
+                'rule': 'Top 3 to 1-6 final; 4th-6th to 7-12',
+            },
+        },
+        'final': {
+            '7-12': {
+                'code': 'f1',
+                'auto': 'sh1:4-6; sh2:4-6',
+                'info': '7-12 Final',
+                'places': '1-6',
+            },
+            '1-6': {
+                'code': 'f2',
+                'auto': 'sh1:1-3; sh2:1-3',
+                'info': '1-6 Final',
+                'places': '1-6',
+            },
+        },
+    },
+    # 21 is special case of 15, with three repechage heats
+    21: {
+        'r1': {
+            'h1': {
+                'code': 'r1h1',
+                'info': '1st Round Heat 1',
+                'rule': 'Top 2 to 1/2 final; Others to repechage',
+            },
+            'h2': {
+                'code': 'r1h2',
+                'info': '1st Round Heat 2',
+                'rule': 'Top 2 to 1/2 final; Others to repechage',
+            },
+            'h3': {
+                'code': 'r1h3',
+                'info': '1st Round Heat 3',
+                'rule': 'Top 2 to 1/2 final; Others to repechage',
+            },
+        },
+        'rep1': {
+            'h1': {
+                'code': 'rp1h1',
+                'info': 'Repechage Heat 1',
+                'rule': 'Top 2 to 1/2 final',
+            },
+            'h2': {
+                'code': 'rp1h2',
+                'info': 'Repechage Heat 2',
+                'rule': 'Top 2 to 1/2 final',
+            },
+            'h3': {
+                'code': 'rp1h3',
+                'info': 'Repechage Heat 3',
+                'rule': 'Top 2 to 1/2 final',
+            },
+        },
+        '1.2': {
+            'h1': {
+                'code': 'sh1',
+                'info': '1/2 Final Heat 1',
+                'rule': 'Top 3 to 1-6 final; 4th-6th to 7-12',
+            },
+            'h2': {
+                'code': 'sh2',
+                'info': '1/2 Final Heat 2',
+                'rule': 'Top 3 to 1-6 final; 4th-6th to 7-12',
+            },
+        },
+        'final': {
+            '7-12': {
+                'code': 'f1',
+                'auto': 'sh1:4-6; sh2:4-6',
+                'info': '7-12 Final',
+                'places': '1-6',
+            },
+            '1-6': {
+                'code': 'f2',
+                'auto': 'sh1:1-3; sh2:1-3',
+                'info': '1-6 Final',
+                'places': '1-6',
+            },
+        },
+    },
+    22: {
+        'r1': {
+            'h1': {
+                'code': 'r1h1',
+                'info': '1st Round Heat 1',
+                'rule': 'Top 2 to 1/2 final; Others to repechage',
+            },
+            'h2': {
+                'code': 'r1h2',
+                'info': '1st Round Heat 2',
+                'rule': 'Top 2 to 1/2 final; Others to repechage',
+            },
+            'h3': {
+                'code': 'r1h3',
+                'info': '1st Round Heat 3',
+                'rule': 'Top 2 to 1/2 final; Others to repechage',
+            },
+            'h4': {
+                'code': 'r1h4',
+                'info': '1st Round Heat 4',
+                'rule': 'Top 2 to 1/2 final; Others to repechage',
+            },
+        },
+        'rep1': {
+            'h1': {
+                'code': 'rp1h1',
+                'info': 'Repechage Heat 1',
+                'rule': 'Winner to 1/2 final',
+            },
+            'h2': {
+                'code': 'rp1h2',
+                'info': 'Repechage Heat 2',
+                'rule': 'Winner to 1/2 final',
+            },
+            'h3': {
+                'code': 'rp1h3',
+                'info': 'Repechage Heat 3',
+                'rule': 'Winner to 1/2 final',
+            },
+            'h4': {
+                'code': 'rp1h4',
+                'info': 'Repechage Heat 4',
+                'rule': 'Winner to 1/2 final',
+            },
+        },
+        '1.2': {
+            'h1': {
+                'code': 'sh1',
+                'info': '1/2 Final Heat 1',
+                'rule': 'Top 3 to 1-6 final; 4th-6th to 7-12',
+            },
+            'h2': {
+                'code': 'sh2',
+                'info': '1/2 Final Heat 2',
+                'rule': 'Top 3 to 1-6 final; 4th-6th to 7-12',
+            },
+        },
+        'final': {
+            '7-12': {
+                'code': 'f1',
+                'auto': 'sh1:4-6; sh2:4-6',
+                'info': '7-12 Final',
+                'places': '1-6',
+            },
+            '1-6': {
+                'code': 'f2',
+                'auto': 'sh1:1-3; sh2:1-3',
+                'info': '1-6 Final',
+                'places': '1-6',
+            },
+        },
+    },
+    29: {
+        'r1': {
+            'h1': {
+                'code': 'r1h1',
+                'info': '1st Round Heat 1',
+                'rule': 'Winner to 1/2 final; Others to repechage',
+            },
+            'h2': {
+                'code': 'r1h2',
+                'info': '1st Round Heat 2',
+                'rule': 'Winner to 1/2 final; Others to repechage',
+            },
+            'h3': {
+                'code': 'r1h3',
+                'info': '1st Round Heat 3',
+                'rule': 'Winner to 1/2 final; Others to repechage',
+            },
+            'h4': {
+                'code': 'r1h4',
+                'info': '1st Round Heat 4',
+                'rule': 'Winner to 1/2 final; Others to repechage',
+            },
+            'h5': {
+                'code': 'r1h5',
+                'info': '1st Round Heat 5',
+                'rule': 'Winner to 1/2 final; Others to repechage',
+            },
+            'h6': {
+                'code': 'r1h6',
+                'info': '1st Round Heat 6',
+                'rule': 'Winner to 1/2 final; Others to repechage',
+            },
+        },
+        'rep1': {
+            'h1': {
+                'code': 'rp1h1',
+                'info': 'Repechage Heat 1',
+                'rule': 'Winner to 1/2 final',
+            },
+            'h2': {
+                'code': 'rp1h2',
+                'info': 'Repechage Heat 2',
+                'rule': 'Winner to 1/2 final',
+            },
+            'h3': {
+                'code': 'rp1h3',
+                'info': 'Repechage Heat 3',
+                'rule': 'Winner to 1/2 final',
+            },
+            'h4': {
+                'code': 'rp1h4',
+                'info': 'Repechage Heat 4',
+                'rule': 'Winner to 1/2 final',
+            },
+            'h5': {
+                'code': 'rp1h5',
+                'info': 'Repechage Heat 5',
+                'rule': 'Winner to 1/2 final',
+            },
+            'h6': {
+                'code': 'rp1h6',
+                'info': 'Repechage Heat 6',
+                'rule': 'Winner to 1/2 final',
+            },
+        },
+        '1.2': {
+            'h1': {
+                'code': 'sh1',
+                'info': '1/2 Final Heat 1',
+                'rule': 'Top 3 to 1-6 final; 4th-6th to 7-12',
+            },
+            'h2': {
+                'code': 'sh2',
+                'info': '1/2 Final Heat 2',
+                'rule': 'Top 3 to 1-6 final; 4th-6th to 7-12',
+            },
+        },
+        'final': {
+            '7-12': {
+                'code': 'f1',
+                'auto': 'sh1:4-6; sh2:4-6',
+                'info': '7-12 Final',
+                'places': '1-6',
+            },
+            '1-6': {
+                'code': 'f2',
+                'auto': 'sh1:1-3; sh2:1-3',
+                'info': '1-6 Final',
+                'places': '1-6',
+            },
+        },
+    },
+    ## TODO:
+    # r1 -> rep1 -> 1/4 -> rep2 -> 1/2 -> final
+    43: None,
+    #43: {},
+    #50: {},
+    #57: {},
+    #64: {},
+}
+
+
+def build_keirin_comp(meet, label, cat, category, series, code, entrants,
+                      overwrite):
+    """Create keirin events, add to meet."""
+
+    # determine laps by track size (this is weird - probably incorrect)
+    laps = None
+    distance = ''
+    laplen = meet.get_laplen()
+    if laplen is not None:
+        laps = max(1, round(1500 / laplen))
+        dm = laps * laplen
+        distance = '%d\u2006m' % (dm, )
+        _log.debug(
+            'Keirin lap=%0.1f: %0.1f laps behind derny, %d laps/%s total',
+            laplen, laps / 2, laps, distance)
+
+    # check and clean competition code
+    if code is not None:
+        code = code.translate(strops.PRINT_UTRANS).strip()
+    else:
+        code = ''
+    if not code:
+        code = label.lower().translate(strops.WEBFILE_UTRANS)
+
+    # ensure series is set
+    if series is None:
+        series = ''
+
+    # find an unused event id for the catcomp
+    compid = comp_label_short(label)
+    catcomp = cat.lower() + compid
+    if not overwrite:
+        count = 1
+        while catcomp in meet.edb:
+            count += 1
+            catcomp = '%s%s%d' % (cat.lower(), compid, count)
+
+    prefix = '%s %s' % (
+        category['Title'],
+        label,
+    )
+
+    # determine competition structure from # entrants
+    comptable = None
+    for mintrant, comp in _KEIRIN_TABLE.items():
+        if mintrant <= entrants:
+            # this is a possible comp
+            comptable = comp
+        if mintrant > entrants:
+            break
+    if comptable is None:
+        _log.info('Kerin too many entrants.')
+        return
+
+    eventlist = []
+    placeslist = []
+    for phase, contests in comptable.items():
+        for contest, detail in contests.items():
+            # add an event for each contest
+            depends = ''
+            autostr = ''
+            if 'auto' in detail:
+                depends, autostr = _preauto(detail['auto'], catcomp)
+            rulestr = ''
+            if 'rule' in detail:
+                rulestr = detail['rule']
+            hid = '%s%s' % (catcomp, detail['code'])
+            eventlist.insert(0, hid)
+            hev = meet.edb.add_or_replace(evno=hid, notify=False)
+            hev.set_values({
+                'series': series,
+                'reference': catcomp,
+                'type handler': 'keirin',
+                'prefix': prefix,
+                'info': detail['info'],
+                'result': False,
+                'index': True,
+                'program': True,
+                'laps': laps,
+                'depend': depends,
+                'auto': autostr,
+                'distance': distance,
+                'rules': rulestr,
+                'category': cat,
+                'competion': code,
+                'phase': phase,
+                'contest': contest,
+            })
+            # places: TODO
+    # classification
+    if eventlist:
+        showevs = ' '.join(eventlist)
+        places = '; '.join(placeslist)
+        cev = meet.edb.add_or_replace(evno=catcomp, notify=True)
+        cev.set_values({
+            'series': series,
+            'type handler': 'classification',
+            'prefix': prefix,
+            'info': '',
+            'result': True,
+            'index': False,
+            'program': False,
+            'depends': showevs,
+            'auto': places,
+            'category': cat,
+            'competion': code,
+        })
+        ##c = meet.get_event(catcomp, closecurrent=True)
+        ##c.readonly = False
+        ##c.loadconfig()
+        ##c.others = '; '.join(otherslist)
+        ##if othersrc:
+        ##c.othersrc = othersrc
+        ##else:
+        ##c.othersrc = ''
+        ##c.medals = ''
+        ##c.saveconfig()
+        ##c = None
+
+
+def build_itt_comp(meet, label, cat, category, series, code, dofinals,
+                   entrants, overwrite):
+    """Create time trial events, add to meet."""
+    laps = None
+    distance = ''
+    if category[label]:
+        dm = category[label]
+        distance = '%d\u2006m' % (dm, )
+        lc = meet.tracklen_d * dm / meet.tracklen_n
+        if (lc - int(lc)) < 0.01:  # probably even
+            laps = int(lc)
+
+    # check and clean competition code
+    if code is not None:
+        code = code.translate(strops.PRINT_UTRANS).strip()
+    else:
+        code = ''
+    if not code:
+        code = label.lower().translate(strops.WEBFILE_UTRANS)
+
+    # ensure series is set
+    if series is None:
+        series = ''
+
+    # find an unused event id for the catcomp
+    compid = comp_label_short(label)
+    catcomp = cat.lower() + compid
+    if not overwrite:
+        count = 1
+        while catcomp in meet.edb:
+            count += 1
+            catcomp = '%s%s%d' % (cat.lower(), compid, count)
+
+    prefix = '%s %s' % (
+        category['Title'],
+        label,
+    )
+
+    if dofinals:
+        # qualifying round, 2-up to select best 8 as per 3.2.106
+        eventlist = []  # event ids to be reported with result
+        placeslist = []  # places in the final classification
+        otherslist = []  # unqualified competitors
+        othersrc = None  # ranking basis for others
+
+        pqid = '%sq' % (catcomp, )
+        pqev = meet.edb.add_or_replace(evno=pqid, notify=False)
+        pqev.set_values({
+            'series': series,
+            'reference': catcomp,
+            'type handler': 'indiv tt',
+            'prefix': prefix,
+            'info': 'Qualifying',
+            'result': False,
+            'index': True,
+            'program': True,
+            'qualifiers': 8,
+            'laps': laps,
+            'distance': distance,
+            'rules': 'Top 8 to final',
+            'category': cat,
+            'competion': code,
+            'phase': 'qualifying',
+        })
+        c = meet.get_event(pqid, closecurrent=True)
+        c.readonly = False
+        c.loadconfig()
+        c.timetype = 'dual'
+        c.saveconfig()
+        c = None
+        eventlist.insert(0, pqid)
+        if entrants > 8:
+            # at least one other
+            otherslist.append('%s:%d-' % (pqid, 9))
+            othersrc = pqid
+
+        # final - 1 up, top 8
+        pfid = '%sf' % (catcomp, )
+        pfev = meet.edb.add_or_replace(evno=pfid, notify=False)
+        pfev.set_values({
+            'series': series,
+            'reference': catcomp,
+            'type handler': 'indiv tt',
+            'prefix': prefix,
+            'info': 'Final',
+            'result': False,
+            'index': True,
+            'program': True,
+            'depends': pqid,
+            'auto': '%s:1-8' % (pqid, ),
+            'placeholders': 8,
+            'laps': laps,
+            'distance': distance,
+            'category': cat,
+            'competion': code,
+            'phase': 'final',
+        })
+        c = meet.get_event(pfid, closecurrent=True)
+        c.readonly = False
+        c.loadconfig()
+        c.timetype = 'single'
+        c.saveconfig()
+        c = None
+        eventlist.insert(0, pfid)
+        placeslist.insert(0, '%s: 1-8' % (pfid, ))
+
+        # classification
+        showevs = ' '.join(eventlist)
+        places = '; '.join(placeslist)
+        pev = meet.edb.add_or_replace(evno=catcomp, notify=True)
+        pev.set_values({
+            'series': series,
+            'type handler': 'classification',
+            'prefix': prefix,
+            'info': '',
+            'result': True,
+            'index': False,
+            'program': False,
+            'depends': showevs,
+            'auto': places,
+            'category': cat,
+            'competion': code,
+        })
+        c = meet.get_event(catcomp, closecurrent=True)
+        c.readonly = False
+        c.loadconfig()
+        c.others = '; '.join(otherslist)
+        if othersrc:
+            c.othersrc = othersrc
+        else:
+            c.othersrc = ''
+        c.medals = ''
+        c.saveconfig()
+        c = None
+    else:
+        # straight final, 1-up
+        pid = '%sf' % (catcomp, )
+        pev = meet.edb.add_or_replace(evno=pid, notify=True)
+        pev.set_values({
+            'series': series,
+            'type handler': 'indiv tt',
+            'prefix': prefix,
+            'info': 'Final',
+            'result': True,
+            'index': True,
+            'program': True,
+            'laps': laps,
+            'distance': distance,
+            'category': cat,
+            'competion': code,
+            'phase': 'final',
+        })
+        c = meet.get_event(pid, closecurrent=True)
+        c.readonly = False
+        c.loadconfig()
+        c.timetype = 'single'
+        c.saveconfig()
+        c = None
@@ -14,6 +14,8 @@ from metarace import strops
 from metarace import jsonconfig
 from metarace.riderdb import riderdb
 
+from . import metrics
+
 _log = logging.getLogger('databr')
 _log.setLevel(logging.DEBUG)
 
@@ -1276,6 +1278,7 @@ class DataBridge():
         self._catlist = []
         self._cache = {}
         self._uncache = set()
+        metrics.gauge('bridge_cache_entries', lambda: len(self._cache))
         self._meet = {}  # meet data object source
         self._categories = {}  # cat data object source
         self._sessions = {}  # session data object source
@@ -1319,8 +1322,10 @@ class DataBridge():
         pt = json.dumps(dataObj, cls=PublicEncoder).encode('ascii')
         dt = sha256(pt, usedforsecurity=False).hexdigest()
         if path in self._cache and self._cache[path] == dt:
+            metrics.count('bridge_cache_hits')
             return False
 
+        metrics.count('bridge_publish')
         self._cache[path] = dt
         nt = datetime.now(tz=self._tz)
         dataObj['serial'] = nt.timestamp()
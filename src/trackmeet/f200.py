@@ -25,9 +25,8 @@ from metarace import jsonconfig
 
 from . import uiutil
 from . import scbwin
-
-# temporary
-from functools import cmp_to_key
+from . import seeding
+from .archive import tracelines, timestamp
 
 _log = logging.getLogger('f200')
 _log.setLevel(logging.DEBUG)
@@ -61,16 +60,6 @@ key_falsestart = 'F6'  # + ctrl for false start
 key_abort = 'F7'  # + ctrl abort A
 
 
-# temporary
-def cmp(x, y):
-    if x < y:
-        return -1
-    elif x > y:
-        return 1
-    else:
-        return 0
-
-
 class f200:
     """Flying 200 time trial."""
 
@@ -85,6 +74,7 @@ class f200:
 
     def ridercb(self, rider):
         """Rider change notification"""
+        self._dispcache.clear()
         if self.winopen:
             if rider is not None:
                 rno = rider[0]
@@ -316,6 +306,7 @@ class f200:
         cr.add_section('event')
         cr.add_section('riders')
         cr.add_section('traces')
+        cr.add_section('runs')
         cr.add_section('weather')  # for each heat/competitor
         if not cr.load(self.configfile):
             _log.debug('%r not read, loading defaults', self.configfile)
@@ -367,6 +358,9 @@ class f200:
             if not self.readonly:
                 if cr.has_option('traces', r):
                     self.traces[r] = cr.get('traces', r)
+            if cr.has_option('runs', r):
+                isodate, start, end = cr.get('runs', r)
+                self.runs[r] = [isodate, tod.mktod(start), tod.mktod(end)]
             if cr.has_option('weather', r):
                 self.compweather[r] = cr.get('weather', r)
             self.settimes(nri,
@@ -462,6 +456,7 @@ class f200:
 
         cw.add_section('riders')
         cw.add_section('traces')
+        cw.add_section('runs')
         cw.add_section('weather')
 
         # save out all starters
@@ -477,10 +472,17 @@ class f200:
                     slice.append(None)
             cw.set('riders', rno, slice)
 
-            # save timing traces
+            # save timing traces recorded before the impulse archive
             if rno in self.traces:
                 cw.set('traces', rno, self.traces[rno])
 
+            # save archive trace window
+            if rno in self.runs:
+                isodate, start, end = self.runs[rno]
+                if end is not None:
+                    end = end.rawtime()
+                cw.set('runs', rno, [isodate, start.rawtime(), end])
+
             # save weather
             if rno in self.compweather and self.compweather[rno]:
                 cw.set('weather', rno, self.compweather[rno])
@@ -489,47 +491,39 @@ class f200:
         _log.debug('Saving event config %r', self.configfile)
         with metarace.savefile(self.configfile) as f:
             cw.write(f)
-
-    def sort_startlist(self, x, y):
-        """Comparison function for seeding."""
-        if x[1] == y[1]:  # same seed? revert to bib ascending
-            return cmp(x[2], y[2])
-        else:
-            return cmp(x[1], y[1])
-
-    def sort_heats(self, x, y):
-        """Comparison function for heats."""
-        (xh, xl) = strops.heatsplit(x[0])
-        (yh, yl) = strops.heatsplit(y[0])
-        if xh == yh:
-            return cmp(xl, yl)
-        else:
-            return cmp(xh, yh)
+        self.meet.riderindex.update(self.evno, self.series,
+                                    self.get_startlist())
 
     def reorder_startlist(self):
         """Re-order model according to the seeding field."""
         if len(self.riders) > 1:
-            auxmap = []
-            cnt = 0
-            for r in self.riders:
-                auxmap.append([
-                    cnt,
-                    strops.riderno_key(r[COL_SEED]),
-                    strops.riderno_key(r[COL_NO])
-                ])
-                cnt += 1
-            auxmap.sort(key=cmp_to_key(self.sort_startlist))
-            self.riders.reorder([a[0] for a in auxmap])
+            order = seeding.seed_order(self.riders, COL_SEED, COL_NO)
+            if order is not None:
+                self.riders.reorder(order)
 
     def get_heats(self, placeholders=0):
         """Return a list of heats in the event."""
-        ret = []
-
         # arrange riders by seeding
         self.reorder_startlist()
 
+        # re-use heats built by any handler while starters are unchanged
+        heats = self.meet.standings.memo(
+            ('heats', self.evno), lambda: self._heatkey(placeholders),
+            lambda: self._buildheats(placeholders))[0]
+        self._startlines = list(heats[1])
+        return [list(rec) for rec in heats[0]]
+
+    def _heatkey(self, placeholders):
+        """Return a key that changes with any input to the event heats."""
+        return (placeholders, self.series,
+                tuple(r[COL_NO] for r in self.riders))
+
+    def _buildheats(self, placeholders):
+        """Return a tuple (heats, startlines) for the ordered model."""
+        ret = []
+
         # then build aux map of heats
-        self._startlines = []
+        startlines = []
         hlist = []
         count = len(self.riders)
         if count < placeholders:
@@ -537,17 +531,11 @@ class f200:
         if placeholders == 0:
             for r in self.riders:
                 rno = r[COL_NO]
-                rh = self.meet.rdb.get_rider(rno, self.series)
-                info = None
-                rname = ''
-                rnat = None
+                dbno, rname, info, rnat, pr = self._dispcache.rider(
+                    rno, self.series)
                 members = []
                 pilot = None
-                if rh is not None:
-                    rname = rh.resname()
-                    rnat = rh['nation']
-                    info = rh['class']
-                    pr = self.meet.rdb.get_pilot_line(rh)
+                if dbno is not None:
                     if pr:
                         members.append(pr)
                         pilot = pr[2]
@@ -565,7 +553,7 @@ class f200:
                 count -= 1
 
         # sort the heatlist
-        hlist.sort(key=cmp_to_key(self.sort_heats))
+        hlist.sort(key=lambda h: seeding.heat_key(h[0]))
 
         lh = None
         lcnt = 0
@@ -581,7 +569,7 @@ class f200:
             lcnt += 1
             lh = h
             if r[1]:
-                self._startlines.append({
+                startlines.append({
                     'competitor': r[1],
                     'nation': r[5],
                     'name': r[2],
@@ -590,7 +578,7 @@ class f200:
                 })
         if len(rec) > 0:
             ret.append(rec)
-        return ret
+        return (tuple(ret), tuple(startlines))
 
     def startlist_report(self, program=False):
         """Return a startlist report."""
@@ -1112,20 +1100,29 @@ class f200:
         chan = strops.chan2id(e.chan)
         if self.timerstat == 'armstart':
             if chan == self.chan_S:  # Start trig
+                self._archive(e)
                 self.torunning(e)
                 GLib.timeout_add_seconds(2, self.armfinish, self.fs, True)
         elif self.timerstat == 'running':
             if chan == self.chan_I:  # Intermediate
                 stat = self.fs.getstatus()
                 if stat == 'armint':
+                    self._archive(e)
                     self.split_trig(self.fs, e)
                 # else ignore spurious intermediate
             elif chan == self.chan_F:  # Finish
                 stat = self.fs.getstatus()
                 if stat in ['armfin', 'armint']:
+                    self._archive(e)
                     self.fin_trig(self.fs, e)
         return False
 
+    def _archive(self, e):
+        """Archive impulse e against the rider on the timer."""
+        bib = self.fs.getrider()
+        if bib:
+            self.meet.archive.append(e, bib, self.evno)
+
     def timeout(self):
         """Update scoreboard and respond to timing events."""
         if not self.winopen:
@@ -1184,23 +1181,15 @@ class f200:
 
     def _getrider(self, bib):
         """Return temporary reference to model row."""
-        bib = bib.upper()
         ret = None
-        for r in self.riders:
-            if r[COL_NO] == bib:
-                ret = r
-                break
+        i = self._ridx.getiter(bib.upper())
+        if i is not None:
+            ret = self.riders[i]
         return ret
 
     def _getiter(self, bib):
         """Return temporary iterator to model row."""
-        bib = bib.upper()
-        i = self.riders.get_iter_first()
-        while i is not None:
-            if self.riders.get_value(i, COL_NO) == bib:
-                break
-            i = self.riders.iter_next(i)
-        return i
+        return self._ridx.getiter(bib.upper())
 
     def delrider(self, bib):
         # Issue warning if removed rider in result
@@ -1212,6 +1201,7 @@ class f200:
             self.results.remove(bib)
             if bib in self.traces:
                 del self.traces[bib]
+            self.runs.pop(bib, None)
         if 'fsbib' in self._winState and self._winState['fsbib'].upper(
         ) == bib:
             _log.warning('Removed rider %r in event %r timer', bib, self.evno)
@@ -1230,18 +1220,19 @@ class f200:
                 dbr = self.meet.rdb.get_rider(newNo, self.series)
                 if dbr is not None:
                     name = dbr.listname()
-                for r in self.riders:
-                    if r[COL_NO] == oldNo:
-                        _log.debug('Updating number %s -> %s in event %s',
-                                   oldNo, newNo, self.evno)
-                        r[COL_NO] = newNo
-                        r[COL_NAME] = name
-                        break
+                r = self._getrider(oldNo)
+                if r is not None:
+                    _log.debug('Updating number %s -> %s in event %s', oldNo,
+                               newNo, self.evno)
+                    r[COL_NO] = newNo
+                    r[COL_NAME] = name
                 self.splits.changeno(oldNo, newNo)
                 self.results.changeno(oldNo, newNo)
                 if oldNo in self.traces:
                     self.traces[newNo] = self.traces[oldNo]
                     del self.traces[oldNo]
+                if oldNo in self.runs:
+                    self.runs[newNo] = self.runs.pop(oldNo)
                 return True
         return False
 
@@ -1575,12 +1566,7 @@ class f200:
                 heatweather = self.meet.get_weather()
                 bib = self.fs.getrider()
                 self.compweather[bib] = heatweather
-                if bib not in self.traces:
-                    self.traces[bib] = []
-
-                # connect trace handler
-                self.fslog = uiutil.traceHandler(self.traces[bib])
-                logging.getLogger().addHandler(self.fslog)
+                self._startrun(bib)
                 self.meet.scbwin.sett1('       0.0     ')
                 nstr = self.fs.biblbl.get_text()
 
@@ -1595,11 +1581,25 @@ class f200:
                 self.meet.gemini.show_brt()
             GLib.idle_add(self.delayed_announce)
 
+    def _startrun(self, bib):
+        """Open the trace window for a timed run by bib."""
+        self.traces.pop(bib, None)  # trace is now archived
+        isodate, start = timestamp()
+        run = [isodate, start, None]
+        self.runs[bib] = run
+        self._openruns.append(run)
+
+    def _endruns(self):
+        """Close the trace windows of runs armed since the last idle."""
+        if self._openruns:
+            end = timestamp()[1]
+            for run in self._openruns:
+                run[2] = end
+            self._openruns = []
+
     def toidle(self, idletimers=True):
         """Set timer to idle state."""
-        if self.fslog is not None:
-            logging.getLogger().removeHandler(self.fslog)
-            self.fslog = None
+        self._endruns()
         if idletimers:
             self.fs.toidle()
             self._competitorA = None
@@ -1884,7 +1884,13 @@ class f200:
         sel = self.view.get_selection().get_selected()
         if sel is not None:
             bib = self.riders.get_value(sel[1], COL_NO)
-            if bib in self.traces:
+            lines = self.traces.get(bib)
+            run = self.runs.get(bib)
+            if lines is None and run is not None:
+                isodate, start, end = run
+                lines = tracelines(
+                    bib, self.meet.archive.impulses(start, end, isodate))
+            if lines:
                 secid = 'trace-' + str(bib).translate(strops.WEBFILE_UTRANS)
                 sec = report.threecol_section(secid)
                 sec.heading = self.event.get_info(showevno=True)
@@ -1895,7 +1901,7 @@ class f200:
 
                 sec.monospace = True
                 sec.nobreak = True
-                sec.lines = [[None, None, line] for line in self.traces[bib]]
+                sec.lines = [[None, None, line] for line in lines]
                 self.meet.print_report([sec],
                                        docstr='Chronometer Trace',
                                        exportfile='timing_trace')
@@ -2093,10 +2099,13 @@ class f200:
         self._standingstr = ''
         self.context_menu = None
         self.traces = {}
+        self.runs = {}  # bib -> [isodate, start, end] of last timed run
+        self._openruns = []  # trace windows open on the timer
         self.compweather = {}  # per competitor weather record
         self._winState = {}  # cache ui settings for headless load/save
         self._status = None
         self._startlines = None
+        self._dispcache = seeding.riderCache(meet.rdb)
         self._reslines = None
         self._detail = None
         self._infoLine = None
@@ -2129,6 +2138,7 @@ class f200:
             object,  # 7 Start
             object,  # 8 Finish
             object)  # 9 100m
+        self._ridx = uiutil.rowIndex(self.riders, COL_NO)
 
         self._splitlabel = '100\u2006m'
         self._splitlen = '100'
@@ -2169,7 +2179,6 @@ class f200:
             self.fs.bibent.connect('activate', self.bibent_cb, self.fs)
             self.fs.hide_splits()
             self.fs.splitlbls = ['100\u2006m Split', 'Finish']
-            self.fslog = None
             mf.pack_start(self.fs.frame, True, True, 0)
 
             # riders pane
@@ -54,7 +54,6 @@
 """
 
 import threading
-import queue
 import logging
 import serial
 import sys
@@ -62,6 +61,8 @@ import sys
 from metarace import unt4
 from metarace import tod
 from metarace import strops
+from .sender import cmdqueue
+from . import metrics
 
 # module logger
 _log = logging.getLogger('gemini')
@@ -74,6 +75,8 @@ _ENCODING = 'ascii'
 _GEMHEAD = chr(unt4.SOH[0]) + chr(unt4.DC4[0])
 _GEMHOME = chr(unt4.STX[0]) + chr(0x08)
 _GEMFOOT = chr(unt4.EOT[0])
+_GEMKEY = 'board'  # each gemini message overwrites both boards
+_GEMBATCH = 256
 
 
 class gemini(threading.Thread):
@@ -88,7 +91,7 @@ class gemini(threading.Thread):
         self.time1 = ''
         self.lap = ''
         self.lmsg = ''
-        self.write(unt4.GENERAL_CLEARING.pack())
+        self.write(unt4.GENERAL_CLEARING.pack(), _GEMKEY)
 
     def send_msg(self, msg, mtype='S', charoff='0', msg1=None):
         msg0 = msg
@@ -101,7 +104,7 @@ class gemini(threading.Thread):
             + mtype + '0' + charoff + _GEMHOME + chr(unt4.LF[0])  # line 2
             + msg1 + _GEMFOOT)
         if nmsg != self.lmsg:
-            self.write(nmsg)
+            self.write(nmsg, _GEMKEY)
             self.lmsg = nmsg
 
     def reset_fields(self):
@@ -189,7 +192,7 @@ class gemini(threading.Thread):
         threading.Thread.__init__(self, daemon=True)
         self._port = None
         self._ignore = False
-        self._queue = queue.Queue()
+        self._queue = cmdqueue()
         self._running = False
 
         self.bib = ''
@@ -204,28 +207,31 @@ class gemini(threading.Thread):
         if port is not None:
             self.setport(port)
 
-    def write(self, msg=None):
-        """Send the provided msg to the scoreboard."""
-        self._queue.put_nowait(('MSG', msg))
+    def write(self, msg=None, key=None):
+        """Send the provided msg to the scoreboard.
+
+        If key is provided, msg replaces any pending message
+        with the same key.
+        """
+        self._queue.put('MSG', msg, key)
 
     def exit(self, msg=None):
         """Request thread termination."""
         self._running = False
-        self._queue.put_nowait(('EXIT', msg))
+        self._queue.put('EXIT', msg)
 
     def wait(self):
         """Suspend calling thread until cqueue is empty."""
         self._queue.join()
 
+    def stats(self):
+        """Return command queue statistics."""
+        return self._queue.stats()
+
     def setport(self, port=None):
         """Dump command queue content and (re)open port."""
-        try:
-            while True:
-                self._queue.get_nowait()
-                self._queue.task_done()
-        except queue.Empty:
-            pass
-        self._queue.put_nowait(('PORT', port))
+        self._queue.clear()
+        self._queue.put('PORT', port)
 
     def set_ignore(self, ignval=False):
         """Set or clear the ignore flag."""
@@ -238,14 +244,15 @@ class gemini(threading.Thread):
     def run(self):
         """Called via threading.Thread.start()."""
         self._running = True
+        metrics.gauge('gemini_queue', self._queue.depth)
         _log.debug('Starting')
         while self._running:
-            m = self._queue.get()
-            self._queue.task_done()
+            m = self._queue.get(_GEMBATCH)
             try:
                 if m[0] == 'MSG' and not self._ignore and self._port:
                     #_log.debug('Send: %r', m[1])
                     self._port.write(m[1].encode(_ENCODING, 'ignore'))
+                    metrics.count('gemini_messages')
                 elif m[0] == 'EXIT':
                     _log.debug('Request to close: %s', m[1])
                     self._running = False
@@ -21,7 +21,7 @@ Notes on the interpretation of the standing rules, January 2026:
 
 import gi
 import logging
-from math import floor, ceil
+from math import floor, ceil, sqrt
 
 gi.require_version("GLib", "2.0")
 from gi.repository import GLib
@@ -69,6 +69,7 @@ _CHAN_HALF = 3
 _COUNTDOWNMAX = tod.mktod('1h30:00')
 _COUNTDOWNMIN = tod.MINUTE
 _QUARTER = tod.mktod('15:00')
+_PACEWINDOW = 600.0  # rolling time window for pace (seconds)
 
 _CONFIG_SCHEMA = {
     'etype': {
@@ -231,6 +232,133 @@ _TIMING_SCHEMA = {
 }
 
 
+class lapstats:
+    """Incremental lap analytics for a record attempt.
+
+    Lap splits are added one at a time as elapsed seconds, and each
+    statistic is updated in constant time per lap, so a refresh never
+    rescans the split list.
+    """
+
+    def __init__(self, lpi=250.0, reclen=3600.0, target=None):
+        self.lpi = lpi
+        self.reclen = reclen
+        self.target = target
+        self.quarters = []  # (quarter, distance, schedule gap)
+        self._last = None  # most recent split added
+        self._elap = [0.0]  # elapsed at end of each lap
+        self._wpos = 0  # first lap end inside pace window
+        self._n = 0  # lap time moments, excluding first lap
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._sx = 0.0  # least squares sums of lap time on lap no
+        self._sy = 0.0
+        self._sxx = 0.0
+        self._sxy = 0.0
+
+    def __len__(self):
+        return len(self._elap) - 1
+
+    def update(self, start, splits, lpi, reclen, target):
+        """Add new splits to stats, return self or a replacement."""
+        ret = self
+        count = len(self)
+        if (lpi != self.lpi or reclen != self.reclen or target != self.target
+                or count > len(splits)
+                or (count and splits[count - 1] != self._last)):
+            ret = lapstats(lpi, reclen, target)
+            count = 0
+        for st in splits[count:]:
+            ret.add(float((st - start).truncate(3).timeval))
+            ret._last = st
+        return ret
+
+    def add(self, elap):
+        """Add a lap ending elap seconds after the start."""
+        prev = self._elap[-1]
+        lap = elap - prev
+        self._elap.append(elap)
+        count = len(self)
+
+        # quarter splits against target schedule
+        qlen = 0.25 * self.reclen
+        q = len(self.quarters) + 1
+        while q < 4 and elap >= q * qlen:
+            dist = self.lpi * (count - 1 + (q * qlen - prev) / lap)
+            gap = None
+            if self.target:
+                gap = dist - 0.25 * q * self.target
+            self.quarters.append((q, dist, gap))
+            q += 1
+
+        # rolling time window
+        while elap - self._elap[self._wpos + 1] >= _PACEWINDOW:
+            self._wpos += 1
+
+        # variance and fade exclude the standing start lap
+        if count > 1:
+            self._n += 1
+            delta = lap - self._mean
+            self._mean += delta / self._n
+            self._m2 += delta * (lap - self._mean)
+            self._sx += count
+            self._sy += lap
+            self._sxx += count * count
+            self._sxy += count * lap
+
+    def pace(self, laps):
+        """Return average lap time over the last laps, or None."""
+        if laps < 1 or len(self) < laps:
+            return None
+        return (self._elap[-1] - self._elap[-1 - laps]) / laps
+
+    def timepace(self):
+        """Return average lap time over the rolling time window, or None."""
+        if self._elap[-1] < _PACEWINDOW:
+            return None
+        laps = len(self) - self._wpos
+        return (self._elap[-1] - self._elap[self._wpos]) / laps
+
+    def deviation(self):
+        """Return the lap time standard deviation, or None."""
+        if self._n < 2:
+            return None
+        return sqrt(self._m2 / (self._n - 1))
+
+    def fade(self):
+        """Return least squares (intercept, slope) of lap time on lap no."""
+        if self._n < 3:
+            return None
+        den = self._n * self._sxx - self._sx * self._sx
+        if not den:
+            return None
+        slope = (self._n * self._sxy - self._sx * self._sy) / den
+        icpt = (self._sy - slope * self._sx) / self._n
+        return (icpt, slope)
+
+    def project(self, remsec):
+        """Return projected total laps after remsec using fade model."""
+        fit = self.fade()
+        if fit is None:
+            return None
+        icpt, slope = fit
+        count = len(self)
+        # laps m such that sum of modelled lap times equals remsec
+        b = icpt + slope * count + 0.5 * slope
+        if abs(slope) < 1e-9:
+            if b <= 0:
+                return None
+            m = remsec / b
+        else:
+            disc = b * b + 2.0 * slope * remsec
+            if disc < 0:
+                return None
+            m = (sqrt(disc) - b) / slope
+        if m < 0:
+            return None
+        return count + m
+
+
 class UCIHour:
     """Handler for the UCI Hour Record."""
 
@@ -446,6 +574,8 @@ class UCIHour:
         _log.debug('Saving event config %r', self.configfile)
         with metarace.savefile(self.configfile) as f:
             cw.write(f)
+        self.meet.riderindex.update(self.evno, self.series,
+                                    self.get_startlist())
 
     def startlist_report(self, program=False):
         """Return a startlist report."""
@@ -822,6 +952,8 @@ class UCIHour:
             ret['lines'] = self._reslines
         if self._detail is not None:
             ret['detail'] = self._detail
+        if self._analytics is not None:
+            ret['analytics'] = self._analytics
 
         ret['competitorA'] = self._competitorA
         # rankA: N/A (hold null)
@@ -1089,7 +1221,15 @@ class UCIHour:
                 self.meet.scbwin.setline2('')
                 self.meet.scbwin.setr1('')
                 self.meet.scbwin.sett1('')
-            if self._record:
+            schedule = None
+            if self._analytics is not None and self._analytics['quarters']:
+                schedule = self._analytics['quarters'][-1]['schedule']
+            if schedule is not None:
+                self.meet.scbwin.setline2(
+                    strops.truncpad(
+                        'Schedule: ', self.meet.scb.linelen - 12, align='r') +
+                    strops.truncpad('{0:+d}\u2006m'.format(schedule), 12))
+            elif self._record:
                 self.meet.scbwin.setline2(
                     strops.truncpad(
                         'Target: ', self.meet.scb.linelen - 12, align='r') +
@@ -1116,6 +1256,19 @@ class UCIHour:
         if self._prevlap is not None:
             self.meet.cmd_announce('laptime',
                                    self._prevlap.round(2).rawtime(2))
+        if self._analytics is not None:
+            for key in ('pace1k', 'pace4k', 'pace10m', 'deviation'):
+                val = self._analytics[key]
+                if val is not None:
+                    self.meet.cmd_announce(key, '%0.3f' % (val, ))
+            if self._analytics['fade'] is not None:
+                self.meet.cmd_announce('fade',
+                                       '%0.4f' % (self._analytics['fade'], ))
+            if self._analytics['quarters']:
+                q = self._analytics['quarters'][-1]
+                if q['schedule'] is not None:
+                    self.meet.cmd_announce(
+                        'schedule', 'Q%d %+d' % (q['quarter'], q['schedule']))
 
         ### on the gemini - use B/T dual timer mode
         ###self.meet.gemini.set_bib(str(self.lapcount),0)
@@ -1387,12 +1540,38 @@ class UCIHour:
         self._endtrace()
         self.frame.hide()
 
+    def _updatestats(self, lpi):
+        """Update lap analytics with any new splits."""
+        target = self._target
+        if not target:
+            target = self._record
+        self._stats = self._stats.update(self._start, self._splitlist, lpi,
+                                         float(self._reclen.timeval), target)
+        kmlaps = max(1, int(round(1000.0 / lpi)))
+        quarters = []
+        for q, dist, gap in self._stats.quarters:
+            quarters.append({
+                'quarter': q,
+                'distance': int(floor(dist)),
+                'schedule': None if gap is None else int(round(gap)),
+            })
+        fade = self._stats.fade()
+        self._analytics = {
+            'pace1k': self._stats.pace(kmlaps),
+            'pace4k': self._stats.pace(4 * kmlaps),
+            'pace10m': self._stats.timepace(),
+            'deviation': self._stats.deviation(),
+            'fade': None if fade is None else fade[1],
+            'quarters': quarters,
+        }
+
     def recalculate(self):
         """Update internal state."""
         self.onestart = False
         self.finished = False
         self._avglap = None
         self._projection = None
+        self._analytics = None
         self._elapsed = None
         self._status = None
         self._D = None
@@ -1459,10 +1638,13 @@ class UCIHour:
                         if avgelap > minelap and avgelap < _MAXAVG:
                             self._avglap = 0.25 * float(avgelap.timeval)
 
+                    self._updatestats(lpi)
                     if len(self._splitlist
                            ) >= self._projlap and self._avglap is not None:
                         if remain > self._minlap:
-                            pcount = self._lapcount + _PESSIMISM * remsec / self._avglap
+                            pcount = self._stats.project(remsec)
+                            if pcount is None:
+                                pcount = self._lapcount + _PESSIMISM * remsec / self._avglap
                             proj = lpi * pcount
                             _log.debug(
                                 'Est: Avg=%0.3fs, Rem=%0.3fs, Count=%0.3flaps, Proj=%0.1fm',
@@ -1579,6 +1761,8 @@ class UCIHour:
         self._lelap = None  # last elapsed time displayed on scb
         self._projection = None  # current projection at finish
         self._avglap = None  # current lap average
+        self._analytics = None  # live lap analytics for data bridge
+        self._stats = lapstats()  # incremental lap statistics
         self._lapcount = 0  # lap count
         self._mancount = 0  # manual/backup lap count
         self._lastlap = None  # lap time in which hour expired
@@ -26,9 +26,8 @@ from math import ceil
 
 from . import uiutil
 from . import scbwin
-
-# temporary
-from functools import cmp_to_key
+from . import seeding
+from .archive import tracelines, timestamp
 
 _log = logging.getLogger('ittt')
 _log.setLevel(logging.DEBUG)
@@ -78,16 +77,6 @@ key_abort_A = 'F7'  # + ctrl abort A
 key_abort_B = 'F8'  # + ctrl abort B
 
 
-# temporary
-def cmp(x, y):
-    if x < y:
-        return -1
-    elif x > y:
-        return 1
-    else:
-        return 0
-
-
 class ittt:
 
     def force_running(self, start=None):
@@ -101,6 +90,7 @@ class ittt:
 
     def ridercb(self, rider):
         """Rider change notification"""
+        self._dispcache.clear()
         if self.winopen:
             if rider is not None:
                 rno = rider[0]
@@ -452,6 +442,7 @@ class ittt:
         cr.add_section('riders')
         cr.add_section('splits')
         cr.add_section('traces')
+        cr.add_section('runs')
         cr.add_section('weather')  # for each heat/competitor
         if not cr.load(self.configfile):
             _log.debug('%r not read, loading defaults', self.configfile)
@@ -524,6 +515,9 @@ class ittt:
                 # skip fetching traces if opened readonly
                 if cr.has_option('traces', r):
                     self.traces[r] = cr.get('traces', r)
+            if cr.has_option('runs', r):
+                isodate, start, end = cr.get('runs', r)
+                self.runs[r] = [isodate, tod.mktod(start), tod.mktod(end)]
             if cr.has_option('weather', r):
                 self.compweather[r] = cr.get('weather', r)
             if cr.has_option('splits', r):
@@ -640,6 +634,7 @@ class ittt:
 
         cw.add_section('riders')
         cw.add_section('traces')
+        cw.add_section('runs')
         cw.add_section('splits')
         cw.add_section('weather')
 
@@ -655,10 +650,17 @@ class ittt:
                     slice.append(None)
             cw.set('riders', rno, slice)
 
-            # save timing traces
+            # save timing traces recorded before the impulse archive
             if rno in self.traces:
                 cw.set('traces', rno, self.traces[rno])
 
+            # save archive trace window
+            if rno in self.runs:
+                isodate, start, end = self.runs[rno]
+                if end is not None:
+                    end = end.rawtime()
+                cw.set('runs', rno, [isodate, start.rawtime(), end])
+
             # save weather
             if rno in self.compweather and self.compweather[rno]:
                 cw.set('weather', rno, self.compweather[rno])
@@ -676,6 +678,8 @@ class ittt:
         _log.debug('Saving event config %r', self.configfile)
         with metarace.savefile(self.configfile) as f:
             cw.write(f)
+        self.meet.riderindex.update(self.evno, self.series,
+                                    self.get_startlist())
 
     def startlist_report(self, program=False):
         """Return a startlist report."""
@@ -709,48 +713,18 @@ class ittt:
         ret.append(sec)
         return ret
 
-    def sort_startlist(self, x, y):
-        """Comparison function for ttt seeding."""
-        if x[1] == y[1]:  # same seed? revert to bib ascending
-            return cmp(x[2], y[2])
-        else:
-            return cmp(x[1], y[1])
-
-    def sort_heats(self, x, y):
-        """Comparison function for ttt heats."""
-        (xh, xl) = strops.heatsplit(x[0])
-        (yh, yl) = strops.heatsplit(y[0])
-        if xh == yh:
-            return cmp(xl, yl)
-        else:
-            return cmp(xh, yh)
-
     def reorder_startlist(self):
         """Reorder model according to the seeding field."""
         if len(self.riders) > 1:
-            auxmap = []
-            cnt = 0
-            for r in self.riders:
-                auxmap.append([
-                    cnt,
-                    strops.riderno_key(r[COL_SEED]),
-                    strops.riderno_key(r[COL_NO])
-                ])
-                cnt += 1
-            auxmap.sort(key=cmp_to_key(self.sort_startlist))
-            self.riders.reorder([a[0] for a in auxmap])
+            order = seeding.seed_order(self.riders, COL_SEED, COL_NO)
+            if order is not None:
+                self.riders.reorder(order)
 
     def get_heats(self, placeholders=0):
         """Return a list of heats in the event."""
-        ret = []
-
         # arrange riders by seeding
         self.reorder_startlist()
 
-        # then build aux map of heats
-        self._startlines = []
-        hlist = []
-        emptyrows = False
         count = len(self.riders)
         if count < placeholders:
             count = placeholders
@@ -758,6 +732,29 @@ class ittt:
             while len(self.riders) < count:
                 self.addrider(str(miss))
                 miss += 1
+
+        # re-use heats built by any handler while starters are unchanged
+        heats = self.meet.standings.memo(
+            ('heats', self.evno), lambda: self._heatkey(placeholders),
+            lambda: self._buildheats(placeholders))[0]
+        self._startlines = list(heats[1])
+        return [list(rec) for rec in heats[0]]
+
+    def _heatkey(self, placeholders):
+        """Return a key that changes with any input to the event heats."""
+        return (placeholders, self.series, self.timetype, self.teamnames,
+                self.difftime, tuple((r[COL_NO], r[COL_MEMBERS])
+                                     for r in self.riders))
+
+    def _buildheats(self, placeholders):
+        """Return a tuple (heats, startlines) for the ordered model."""
+        ret = []
+        count = len(self.riders)  # includes any placeholders
+
+        # then build aux map of heats
+        startlines = []
+        hlist = []
+        emptyrows = False
         blanknames = False
         if placeholders > 0:
             blanknames = True
@@ -766,22 +763,15 @@ class ittt:
                 heat = str(count) + '.1'
                 dbrno = r[COL_NO]
                 rno = dbrno
-                rh = self.meet.rdb.get_rider(rno, self.series)
-                rname = ''
+                dbno, rname, rcls, nation, pr = self._dispcache.rider(
+                    rno, self.series)
                 info = ''
-                rcls = None
-                nation = None
                 members = []
                 mbnos = None
                 pilot = None
-                rh = self.meet.rdb.get_rider(rno, self.series)
-                if rh is not None:
-                    dbrno = rh['no']
-                    rname = rh.resname()
-                    rcls = rh['class']
-                    nation = rh['nation']
+                if dbno is not None:
+                    dbrno = dbno
                     info = rcls
-                    pr = self.meet.rdb.get_pilot_line(rh)
                     if pr:
                         members.append(pr)
                         pilot = pr[2]
@@ -789,11 +779,11 @@ class ittt:
                         mbnos = []
                         col = 'black'
                         for member in r[COL_MEMBERS].split():
-                            trh = self.meet.rdb.fetch_bibstr(member)
-                            if trh is not None:
-                                tline = trh.get_line()
+                            tm = self._dispcache.member(member)
+                            if tm is not None:
+                                tline = list(tm[0])
                                 tline[0] = ' '  # suppress underline
-                                trno = trh['no']
+                                trno = tm[1]
                                 if self.series.startswith('tm'):  # pairs
                                     tline[1] = col  # override rider no
                                     col = 'red'
@@ -814,21 +804,15 @@ class ittt:
                 heat = str(hno) + '.' + str(lane)
                 dbrno = r[COL_NO]
                 rno = dbrno
-                rh = self.meet.rdb.get_rider(rno, self.series)
-                rname = ''
+                dbno, rname, rcls, nation, pr = self._dispcache.rider(
+                    rno, self.series)
                 info = ''
-                rcls = None
-                nation = None
                 members = []
                 mbnos = None
                 pilot = None
-                if rh is not None:
-                    dbrno = rh['no']
-                    rname = rh.resname()
-                    rcls = rh['class']
-                    nation = rh['nation']
+                if dbno is not None:
+                    dbrno = dbno
                     info = rcls
-                    pr = self.meet.rdb.get_pilot_line(rh)
                     if pr:
                         members.append(pr)
                         pilot = pr[2]
@@ -836,11 +820,11 @@ class ittt:
                         mbnos = []
                         col = 'black'
                         for member in r[COL_MEMBERS].split():
-                            trh = self.meet.rdb.fetch_bibstr(member)
-                            if trh is not None:
-                                tline = trh.get_line()
+                            tm = self._dispcache.member(member)
+                            if tm is not None:
+                                tline = list(tm[0])
                                 tline[0] = ' '  # suppress underline
-                                trno = trh['no']
+                                trno = tm[1]
                                 if self.series.startswith('tm'):  # pairs
                                     tline[1] = col  # override rider no
                                     col = 'red'
@@ -858,7 +842,7 @@ class ittt:
                     lane = 1
 
         # sort the heatlist into home/back heat 1, 2, 3 etc
-        hlist.sort(key=cmp_to_key(self.sort_heats))
+        hlist.sort(key=lambda h: seeding.heat_key(h[0]))
 
         lh = None
         lcnt = 0
@@ -882,7 +866,7 @@ class ittt:
             lcnt += 1
             lh = h
             if r[4]:
-                self._startlines.append({
+                startlines.append({
                     'competitor': r[4],
                     'nation': r[6],
                     'name': r[2],
@@ -893,7 +877,7 @@ class ittt:
 
         if len(rec) > 0:
             ret.append(rec)
-        return ret
+        return (tuple(ret), tuple(startlines))
 
     def get_startlist(self, reorder=True):
         """Return a list of bibs in the rider model."""
@@ -1936,6 +1920,10 @@ class ittt:
         if asplit is None and bsplit is None:
             return
 
+        if asplit is not None:
+            self._archive(e, self.fs)
+        if bsplit is not None:
+            self._archive(e, self.bs)
         self.autotime_arrival(asplit, bsplit, e)
 
     def timercb(self, e):
@@ -1943,6 +1931,8 @@ class ittt:
         chan = strops.chan2id(e.chan)
         if self.timerstat == 'armstart':
             if chan == self.chan_S:
+                self._archive(e, *(sp for sp in (self.fs, self.bs)
+                                   if sp.status == 'armstart'))
                 self.torunning(e)
         elif self.timerstat == 'autotime':
             if chan == self.chan_A:
@@ -1954,17 +1944,28 @@ class ittt:
                                        and self.chan_B):
                 stat = self.fs.getstatus()
                 if stat == 'armint':
+                    self._archive(e, self.fs)
                     self.lap_trig(self.fs, e)
                 elif stat == 'armfin':
+                    self._archive(e, self.fs)
                     self.fin_trig(self.fs, e)
             elif chan == self.chan_B:
                 stat = self.bs.getstatus()
                 if stat == 'armint':
+                    self._archive(e, self.bs)
                     self.lap_trig(self.bs, e)
                 elif stat == 'armfin':
+                    self._archive(e, self.bs)
                     self.fin_trig(self.bs, e)
         return False
 
+    def _archive(self, e, *lanes):
+        """Archive impulse e against the riders in the nominated lanes."""
+        for sp in lanes:
+            bib = sp.getrider()
+            if bib:
+                self.meet.archive.append(e, bib, self.evno)
+
     def timeout(self):
         """Update running time and emit to scoreboards."""
         if not self.winopen:
@@ -2036,23 +2037,15 @@ class ittt:
 
     def _getrider(self, bib):
         """Return temporary reference to model row."""
-        bib = bib.upper()
         ret = None
-        for r in self.riders:
-            if r[COL_NO] == bib:
-                ret = r
-                break
+        i = self._ridx.getiter(bib.upper())
+        if i is not None:
+            ret = self.riders[i]
         return ret
 
     def _getiter(self, bib):
         """Return temporary iterator to model row."""
-        bib = bib.upper()
-        i = self.riders.get_iter_first()
-        while i is not None:
-            if self.riders.get_value(i, COL_NO) == bib:
-                break
-            i = self.riders.iter_next(i)
-        return i
+        return self._ridx.getiter(bib.upper())
 
     def delrider(self, bib):
         # Issue warning if removed rider in result
@@ -2065,6 +2058,7 @@ class ittt:
                 split['data'].remove(bib)
             if bib in self.traces:
                 del self.traces[bib]
+            self.runs.pop(bib, None)
         elif 'fsbib' in self._winState and self._winState['fsbib'].upper(
         ) == bib:
             _log.warning('Removed rider %r in event %r home timer', bib,
@@ -2089,19 +2083,20 @@ class ittt:
                 dbr = self.meet.rdb.get_rider(newNo, self.series)
                 if dbr is not None:
                     name = dbr.listname()
-                for r in self.riders:
-                    if r[COL_NO] == oldNo:
-                        _log.debug('Updating number %s -> %s in event %s',
-                                   oldNo, newNo, self.evno)
-                        r[COL_NO] = newNo
-                        r[COL_NAME] = name
-                        break
+                r = self._getrider(oldNo)
+                if r is not None:
+                    _log.debug('Updating number %s -> %s in event %s', oldNo,
+                               newNo, self.evno)
+                    r[COL_NO] = newNo
+                    r[COL_NAME] = name
                 for split in self.splitmap.values():
                     split['data'].changeno(oldNo, newNo)
                 self.results.changeno(oldNo, newNo)
                 if oldNo in self.traces:
                     self.traces[newNo] = self.traces[oldNo]
                     del self.traces[oldNo]
+                if oldNo in self.runs:
+                    self.runs[newNo] = self.runs.pop(oldNo)
                 return True
         return False
 
@@ -2654,29 +2649,23 @@ class ittt:
             self.meet.delayimp('0.01')
             heatweather = self.meet.get_weather()
 
-            # connect home straight trace handler
+            # home straight
             astr = None
             abib = None
             if self.fs.status == 'armstart':
                 abib = self.fs.getrider()
-                if abib not in self.traces:
-                    self.traces[abib] = []
                 self.compweather[abib] = heatweather
-                self.fslog = uiutil.traceHandler(self.traces[abib])
-                logging.getLogger().addHandler(self.fslog)
+                self._startrun(abib)
                 self.meet.scbwin.sett1('       0.0     ')
                 astr = self.fs.biblbl.get_text()
 
-            # connect back straight trace handler
+            # back straight
             bstr = None
             bbib = None
             if self.bs.status == 'armstart':
                 bbib = self.bs.getrider()
-                if bbib not in self.traces:
-                    self.traces[bbib] = []
                 self.compweather[bbib] = heatweather
-                self.bslog = uiutil.traceHandler(self.traces[bbib])
-                logging.getLogger().addHandler(self.bslog)
+                self._startrun(bbib)
                 self.meet.scbwin.sett2('       0.0     ')
                 bstr = self.bs.biblbl.get_text()
 
@@ -2693,16 +2682,27 @@ class ittt:
                 self.bs.disable()
             GLib.idle_add(self.delayed_announce)
 
+    def _startrun(self, bib):
+        """Open the trace window for a timed run by bib."""
+        self.traces.pop(bib, None)  # trace is now archived
+        isodate, start = timestamp()
+        run = [isodate, start, None]
+        self.runs[bib] = run
+        self._openruns.append(run)
+
+    def _endruns(self):
+        """Close the trace windows of runs armed since the last idle."""
+        if self._openruns:
+            end = timestamp()[1]
+            for run in self._openruns:
+                run[2] = end
+            self._openruns = []
+
     def toidle(self, idletimers=True):
         """Set timer to idle state."""
+        self._endruns()
         if self.timerstat == 'autotime':
             self.disable_autotime()
-        if self.fslog is not None:
-            logging.getLogger().removeHandler(self.fslog)
-            self.fslog = None
-        if self.bslog is not None:
-            logging.getLogger().removeHandler(self.bslog)
-            self.bslog = None
         if idletimers:
             self.fs.toidle()
             self.bs.toidle()
@@ -3053,7 +3053,13 @@ class ittt:
         sel = self.view.get_selection().get_selected()
         if sel is not None:
             bib = self.riders.get_value(sel[1], COL_NO)
-            if bib in self.traces:
+            lines = self.traces.get(bib)
+            run = self.runs.get(bib)
+            if lines is None and run is not None:
+                isodate, start, end = run
+                lines = tracelines(
+                    bib, self.meet.archive.impulses(start, end, isodate))
+            if lines:
                 secid = 'trace-' + str(bib).translate(strops.WEBFILE_UTRANS)
                 sec = report.threecol_section(secid)
                 sec.heading = self.event.get_info(showevno=True)
@@ -3061,7 +3067,7 @@ class ittt:
 
                 sec.monospace = True
                 sec.nobreak = True
-                sec.lines = [[None, None, line] for line in self.traces[bib]]
+                sec.lines = [[None, None, line] for line in lines]
                 self.meet.print_report([sec],
                                        docstr='Chronometer Trace',
                                        exportfile='timing_trace')
@@ -3270,8 +3276,6 @@ class ittt:
         self.chan_S = 0
         self.fsvec = None
         self.bsvec = None
-        self.fslog = None
-        self.bslog = None
         self._inv_half = None  # 1 / half lap len
         self._winState = {}
 
@@ -3294,10 +3298,13 @@ class ittt:
         self.results = tod.todlist('FIN')
         self.context_menu = None
         self.traces = {}
+        self.runs = {}  # bib -> [isodate, start, end] of last timed run
+        self._openruns = []  # trace windows open on the timer
         self.compweather = {}  # per competitor weather record
         self._winState = {}  # cache ui settings for headless load/save
         self._status = None
         self._startlines = None
+        self._dispcache = seeding.riderCache(meet.rdb)
         self._reslines = None
         self._detail = None
         self._infoLine = None
@@ -3332,6 +3339,7 @@ class ittt:
             object,  # 8 Finish
             object,  # 9 Last Lap
             object)  # 10 Splits
+        self._ridx = uiutil.rowIndex(self.riders, COL_NO)
 
         if ui:
             b = uiutil.builder('ittt.ui')
@@ -79,20 +79,40 @@ class lapscore(threading.Thread):
             _log.debug('Invalid message: %r', msg)
         return ret
 
+    def _scan(self, buf):
+        """Split and parse complete messages in buf, return last laps."""
+        ret = None
+        start = 0
+        blen = len(buf)
+        with memoryview(buf) as mv:
+            while start < blen:
+                end = buf.find(unt4.EOT, start)
+                if end < 0:
+                    if blen - start > _MAXMSG:
+                        end = start + _MAXMSG
+                    else:
+                        break
+                msg = str(mv[start:end + 1], _ENCODING, 'ignore').lstrip()
+                start = end + 1
+                if msg:
+                    laps = self._parselaps(msg)
+                    if laps is not None:
+                        ret = laps
+        if start:
+            del buf[0:start]
+        return ret
+
     def _read(self, port):
         """Watch serial port for lap score updates."""
         buf = bytearray()
         while self._running:
-            c = port.read(1)
+            # block for at least one byte, then collect all waiting
+            c = port.read(max(1, port.in_waiting))
             if c:
                 buf.extend(c)
-                if c[0] == unt4.EOT[0] or len(buf) > _MAXMSG:
-                    msg = buf.decode(_ENCODING, 'ignore').lstrip()
-                    buf.clear()
-                    if msg:
-                        laps = self._parselaps(msg)
-                        if laps is not None and self._cb is not None:
-                            self._cb(laps)
+                laps = self._scan(buf)
+                if laps is not None and self._cb is not None:
+                    self._cb(laps)
 
     def run(self):
         _log.debug('Starting lapscore[%s]', self.native_id)
@@ -0,0 +1,247 @@
+# SPDX-License-Identifier: MIT
+"""Transponder lap tracking for bunch races.
+
+Count each competitor's progress around the track from transponder
+passings at one or more timing loops, and report each competitor's
+gap to the bunch in whole laps. Progress is counted in loop
+crossings, so with four loops a competitor gains a quarter lap on
+each passing. Missed reads are recovered from the loop order.
+
+In a madison, each team member is tracked separately and the team
+takes the progress of the member furthest around the track. When
+two members cross the same loop together (a hand sling) the
+resting member's count is brought up to the team.
+
+For elimination races, an elimination lap tracker records each
+remaining rider's finish line crossing on the current lap and
+reports the last wheel as soon as every rider has crossed.
+
+"""
+
+import logging
+from array import array
+
+from metarace import tod
+
+_log = logging.getLogger('laptrack')
+_log.setLevel(logging.DEBUG)
+
+# Ignore repeat reads on one loop within this interval
+_MINGAP = tod.tod('1.0')
+# Members crossing a loop within this interval are slinging
+_SLINGGAP = tod.tod('1.5')
+# Marker for no crossing on the current lap
+_NOPASS = -1.0
+
+
+class laptrack:
+    """Per-competitor lap counter driven by transponder passings."""
+
+    def __init__(self, loops=None):
+        self._loops = {}  # loop id -> index in riding order
+        self._count = 1
+        self._members = {}  # member no -> competitor no
+        self._riders = {}  # member no -> [progress, loop index, time]
+        self._progress = {}  # competitor no -> progress
+        self._bunch = None  # cached bunch progress
+        self.setloops(loops)
+
+    def setloops(self, loops=None):
+        """Set the ordered list of loop ids, starting at the lap line."""
+        self._loops = {}
+        if loops:
+            for idx, lid in enumerate(loops):
+                self._loops[lid] = idx
+        self._count = max(1, len(self._loops))
+        self.reset()
+
+    def enabled(self):
+        """Return True if loops are configured."""
+        return len(self._loops) > 0
+
+    def reset(self):
+        """Clear all progress counts."""
+        self._riders.clear()
+        self._progress.clear()
+        self._bunch = None
+
+    def setteams(self, members=None):
+        """Set the mapping of member numbers to competitor numbers."""
+        self._members = {}
+        if members:
+            self._members.update(members)
+
+    def competitor(self, rno):
+        """Return the competitor tracked for rider number rno."""
+        return self._members.get(rno, rno)
+
+    def passing(self, rno, loop, ptime):
+        """Record a passing for rider rno on loop at ptime.
+
+        Return the competitor number if its progress changed, or None.
+        """
+        if loop not in self._loops:
+            return None
+        lidx = self._loops[loop]
+        cno = self.competitor(rno)
+        rv = self._riders.get(rno)
+        if rv is None:
+            # first passing sets the count relative to the lap line
+            rv = [lidx, lidx, ptime]
+            self._riders[rno] = rv
+        else:
+            step = (lidx - rv[1]) % self._count
+            if step == 0:
+                if ptime - rv[2] < _MINGAP:
+                    rv[2] = ptime
+                    return None
+                step = self._count  # full lap with missed reads
+            rv[0] += step
+            rv[1] = lidx
+            rv[2] = ptime
+        best = rv[0]
+        if cno != rno:
+            self._sling(cno, rno, rv)
+            for mno, mv in self._riders.items():
+                if mv[0] > best and self.competitor(mno) == cno:
+                    best = mv[0]
+        if self._progress.get(cno) != best:
+            self._progress[cno] = best
+            self._bunch = None
+            return cno
+        return None
+
+    def _sling(self, cno, rno, rv):
+        """Align team member counts on a hand sling."""
+        for mno, mv in self._riders.items():
+            if mno != rno and self.competitor(mno) == cno:
+                if mv[1] == rv[1] and abs(rv[2] - mv[2]) < _SLINGGAP:
+                    top = max(rv[0], mv[0])
+                    rv[0] = top
+                    mv[0] = top
+
+    def progress(self, cno):
+        """Return the number of loop crossings for competitor cno."""
+        return self._progress.get(cno)
+
+    def bunch(self, active=None):
+        """Return the median progress of active competitors.
+
+        If active is None, all tracked competitors are included.
+        """
+        if active is None and self._bunch is not None:
+            return self._bunch
+        vals = []
+        for cno, prog in self._progress.items():
+            if active is None or cno in active:
+                vals.append(prog)
+        ret = None
+        if vals:
+            vals.sort()
+            ret = vals[len(vals) // 2]
+        if active is None:
+            self._bunch = ret
+        return ret
+
+    def bunchlaps(self, active=None):
+        """Return the number of laps completed by the bunch."""
+        ret = None
+        prog = self.bunch(active)
+        if prog is not None:
+            ret = prog // self._count
+        return ret
+
+    def gaps(self, active=None):
+        """Return a map of whole laps each competitor is ahead of the bunch.
+
+        A lap is only counted once the competitor has reached the
+        same loop as the bunch, one lap further on (or behind).
+        """
+        ret = {}
+        bunch = self.bunch(active)
+        if bunch is not None:
+            for cno, prog in self._progress.items():
+                if active is None or cno in active:
+                    ret[cno] = int((prog - bunch) / self._count)
+        return ret
+
+
+class elimlap:
+    """Finish line crossings of the riders remaining in an elimination."""
+
+    def __init__(self):
+        self._slots = {}  # rider no -> index into times
+        self._bibs = []  # rider no by index
+        self._times = array('d')  # crossing time by index
+        self._count = 0  # riders crossed on this lap
+        self._last = None  # index of last wheel on this lap
+        self.lap = 0
+
+    def start(self, biblist):
+        """Set the riders remaining, retaining any crossings this lap."""
+        otimes = {}
+        for bib, idx in self._slots.items():
+            otimes[bib] = self._times[idx]
+        self._bibs = list(biblist)
+        self._slots = {}
+        self._times = array('d', [_NOPASS] * len(self._bibs))
+        self._count = 0
+        self._last = None
+        for idx, bib in enumerate(self._bibs):
+            self._slots[bib] = idx
+            tv = otimes.get(bib, _NOPASS)
+            if tv != _NOPASS:
+                self._record(idx, tv)
+
+    def reset(self):
+        """Clear all riders and crossings."""
+        self.start(())
+        self.lap = 0
+
+    def _newlap(self):
+        """Clear crossings for a new lap."""
+        for idx in range(len(self._times)):
+            self._times[idx] = _NOPASS
+        self._count = 0
+        self._last = None
+        self.lap += 1
+
+    def _record(self, idx, tv):
+        """Record crossing time tv for rider at idx."""
+        self._times[idx] = tv
+        self._count += 1
+        if self._last is None or tv >= self._times[self._last]:
+            self._last = idx
+
+    def passing(self, bib, ptime):
+        """Record a finish line crossing for bib at ptime.
+
+        Return the last wheel rider no once all remaining riders have
+        crossed on this lap, otherwise None.
+        """
+        idx = self._slots.get(bib)
+        if idx is None:
+            return None
+        tv = float(ptime.timeval)
+        prev = self._times[idx]
+        if prev != _NOPASS:
+            if tv - prev < float(_MINGAP.timeval):
+                return None
+            # rider is back on the line, so the previous lap is over
+            missing = self.missing()
+            if missing:
+                _log.debug('No crossing on lap %r for: %s', self.lap,
+                           ' '.join(missing))
+            self._newlap()
+        self._record(idx, tv)
+        if self._count == len(self._bibs):
+            return self._bibs[self._last]
+        return None
+
+    def missing(self):
+        """Return a list of riders without a crossing on this lap."""
+        ret = []
+        for idx, tv in enumerate(self._times):
+            if tv == _NOPASS:
+                ret.append(self._bibs[idx])
+        return ret
@@ -0,0 +1,100 @@
+# SPDX-License-Identifier: MIT
+"""Queued meet log files for trackmeet.
+
+Log records are placed on a bounded queue by the calling thread and
+written to the meet folder by a listener thread, so a slow disk does
+not hold up the main loop or timing callbacks. The main log rotates
+by size, and timer level records are also written to a compact
+timing trace. When the queue is full, records are dropped and the
+number dropped is reported in the log once there is room again.
+
+"""
+
+import queue
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+import metarace
+from metarace.timy import _TIMER_LOG_LEVEL
+
+# Maximum number of records waiting to be written
+QUEUELEN = 8192
+# Rotate log files when they reach this size
+MAXBYTES = 32 * 1024 * 1024
+# Number of rotated log files to keep
+BACKUPS = 4
+# Compact timing trace line format
+TRACEFORMAT = '%(created).4f %(name)s %(message)s'
+
+
+class _traceFilter(logging.Filter):
+    """Pass timer level records only."""
+
+    def filter(self, record):
+        return record.levelno == _TIMER_LOG_LEVEL
+
+
+class logqueue(QueueHandler):
+    """Queue handler writing to rotating meet log files."""
+
+    def __init__(self, logfile, level=logging.DEBUG, tracefile=None):
+        super().__init__(queue.Queue(QUEUELEN))
+        self.setLevel(level)
+        self.dropped = 0
+        self._reported = 0
+        handlers = []
+        lh = RotatingFileHandler(logfile,
+                                 maxBytes=MAXBYTES,
+                                 backupCount=BACKUPS)
+        lh.setLevel(level)
+        lh.setFormatter(logging.Formatter(metarace.LOGFILEFORMAT))
+        handlers.append(lh)
+        if tracefile:
+            th = RotatingFileHandler(tracefile,
+                                     maxBytes=MAXBYTES,
+                                     backupCount=BACKUPS)
+            th.addFilter(_traceFilter())
+            th.setFormatter(logging.Formatter(TRACEFORMAT))
+            handlers.append(th)
+        self._handlers = handlers
+        self._listener = QueueListener(self.queue,
+                                       *handlers,
+                                       respect_handler_level=True)
+        self._listener.start()
+
+    def _dropnote(self):
+        """Return a record noting records dropped since the last note."""
+        count = self.dropped - self._reported
+        return logging.makeLogRecord({
+            'name': 'logqueue',
+            'levelno': logging.WARNING,
+            'levelname': logging.getLevelName(logging.WARNING),
+            'msg': 'Log queue full, %d records dropped (%d total)',
+            'args': (count, self.dropped),
+        })
+
+    def enqueue(self, record):
+        """Queue record, or count it as dropped if the queue is full."""
+        try:
+            if self.dropped != self._reported:
+                self.queue.put_nowait(self._dropnote())
+                self._reported = self.dropped
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """Write out queued records and close log files."""
+        listener = self._listener
+        self._listener = None
+        if listener is not None:
+            if self.dropped != self._reported:
+                try:
+                    self.queue.put(self._dropnote(), timeout=1.0)
+                    self._reported = self.dropped
+                except queue.Full:
+                    pass
+            listener.stop()
+            for h in self._handlers:
+                h.close()
+        super().close()
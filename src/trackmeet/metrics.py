@@ -0,0 +1,201 @@
+# SPDX-License-Identifier: MIT
+"""Runtime counters and local metrics endpoint for trackmeet.
+
+Worker threads and the main loop update named counters, timers and
+gauges as they run. When a metrics port is configured, the values
+are served over HTTP as Prometheus text on /metrics and as JSON on
+/metrics.json. The endpoint binds to the loopback interface unless
+a host is included in the port spec.
+
+"""
+
+import json
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+_log = logging.getLogger('metrics')
+_log.setLevel(logging.DEBUG)
+
+# Default endpoint address
+DEFAULT_HOST = '127.0.0.1'
+# Metric name prefix
+PREFIX = 'trackmeet_'
+
+_lock = threading.Lock()
+_counters = {}  # (name, label) -> value
+_timers = {}  # (name, label) -> [count, sum, max]
+_gauges = {}  # (name, label) -> value or callable
+_server = None
+
+
+def count(name, value=1, label=None):
+    """Add value to the named counter."""
+    key = (name, label)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, seconds, label=None):
+    """Record a duration in seconds for the named timer."""
+    key = (name, label)
+    with _lock:
+        tv = _timers.get(key)
+        if tv is None:
+            _timers[key] = [1, seconds, seconds]
+        else:
+            tv[0] += 1
+            tv[1] += seconds
+            if seconds > tv[2]:
+                tv[2] = seconds
+
+
+def gauge(name, value, label=None):
+    """Set the named gauge to value, or to a callable returning value."""
+    with _lock:
+        _gauges[(name, label)] = value
+
+
+def _keystr(key):
+    """Return a JSON key for (name, label)."""
+    if key[1] is None:
+        return key[0]
+    return '{}[{}]'.format(key[0], key[1])
+
+
+def _gaugevals():
+    """Return a list of (key, value) for all gauges."""
+    with _lock:
+        gauges = list(_gauges.items())
+    ret = []
+    for key, val in gauges:
+        if callable(val):
+            try:
+                val = val()
+            except Exception as e:
+                _log.debug('%s reading gauge %r: %s', e.__class__.__name__,
+                           key[0], e)
+                val = None
+        if val is not None:
+            ret.append((key, val))
+    return ret
+
+
+def snapshot():
+    """Return a dict of current metric values."""
+    ret = {'counters': {}, 'timers': {}, 'gauges': {}}
+    with _lock:
+        for key, val in _counters.items():
+            ret['counters'][_keystr(key)] = val
+        for key, tv in _timers.items():
+            ret['timers'][_keystr(key)] = {
+                'count': tv[0],
+                'sum': tv[1],
+                'max': tv[2],
+            }
+    for key, val in _gaugevals():
+        ret['gauges'][_keystr(key)] = val
+    return ret
+
+
+def _promline(name, label, value):
+    """Return a Prometheus text sample line."""
+    lstr = ''
+    if label is not None:
+        lstr = '{{id="{}"}}'.format(
+            str(label).replace('\\', '\\\\').replace('"', '\\"'))
+    return '{}{}{} {}'.format(PREFIX, name, lstr, value)
+
+
+def prometheus():
+    """Return current metric values in Prometheus text format."""
+    lines = []
+    typed = set()
+
+    def mktype(name, mtype):
+        if name not in typed:
+            typed.add(name)
+            lines.append('# TYPE {}{} {}'.format(PREFIX, name, mtype))
+
+    with _lock:
+        counters = sorted(_counters.items(), key=lambda i: _keystr(i[0]))
+        timers = sorted(((k, list(v)) for k, v in _timers.items()),
+                        key=lambda i: _keystr(i[0]))
+    for (name, label), val in counters:
+        mktype(name + '_total', 'counter')
+        lines.append(_promline(name + '_total', label, val))
+    for (name, label), tv in timers:
+        mktype(name + '_seconds', 'summary')
+        lines.append(_promline(name + '_seconds_count', label, tv[0]))
+        lines.append(_promline(name + '_seconds_sum', label, tv[1]))
+        mktype(name + '_seconds_max', 'gauge')
+        lines.append(_promline(name + '_seconds_max', label, tv[2]))
+    for (name, label), val in sorted(_gaugevals(),
+                                     key=lambda i: _keystr(i[0])):
+        mktype(name, 'gauge')
+        lines.append(_promline(name, label, float(val)))
+    lines.append('')
+    return '\n'.join(lines)
+
+
+class _handler(BaseHTTPRequestHandler):
+    """Metrics request handler."""
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path == '/metrics':
+            body = prometheus().encode('utf-8')
+            ctype = 'text/plain; version=0.0.4; charset=utf-8'
+        elif path == '/metrics.json':
+            body = json.dumps(snapshot()).encode('utf-8')
+            ctype = 'application/json'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _address(portspec):
+    """Return (host, port) for a port spec 'port' or 'host:port'."""
+    host = DEFAULT_HOST
+    port = portspec
+    if ':' in portspec:
+        host, port = portspec.rsplit(':', 1)
+    return (host or DEFAULT_HOST, int(port))
+
+
+def serve(portspec=None):
+    """Start or stop the metrics endpoint, return True if serving."""
+    global _server
+    shutdown()
+    if portspec:
+        try:
+            addr = _address(str(portspec))
+            _server = ThreadingHTTPServer(addr, _handler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever,
+                             name='metrics',
+                             daemon=True).start()
+            _log.info('Serving metrics on http://%s:%d/metrics', addr[0],
+                      addr[1])
+        except Exception as e:
+            _log.error('%s starting metrics endpoint: %s',
+                       e.__class__.__name__, e)
+            _server = None
+    return _server is not None
+
+
+def shutdown():
+    """Stop the metrics endpoint if running."""
+    global _server
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        _server = None
@@ -23,6 +23,7 @@ from metarace import jsonconfig
 
 from . import uiutil
 from . import scbwin
+from . import laptrack
 
 _log = logging.getLogger('ps')
 _log.setLevel(logging.DEBUG)
@@ -156,6 +157,9 @@ class ps:
 
     def ridercb(self, rider):
         """Rider change notification"""
+        self._namecache = {}
+        self._sprintreset()
+        self._lapteams = None
         if self.winopen:
             if rider is not None:
                 rno = rider[0]
@@ -173,6 +177,11 @@ class ps:
 
     def eventcb(self, event):
         """Event change notification function"""
+        if self.inomnium and self._issource(event):
+            if self.load_sources():
+                _log.debug('Omnium sources updated')
+                self.recalculate()
+                GLib.idle_add(self.delayed_announce)
         if self.winopen:
             if event is None or event == self.evno:
                 if self.prefix_ent.get_text() != self.event['pref']:
@@ -263,6 +272,7 @@ class ps:
                 'showinfo': False,
                 'scoring': defscoretype,
                 'weather': None,
+                'loops': '',
             }
         })
         cr.add_section('event')
@@ -414,6 +424,12 @@ class ps:
         self.reset_lappoints()
         slt = cr.get('event', 'sprintlaps')
         self.sprintlaps = strops.reformat_bibserlist(slt)
+        self.loops = []
+        for lid in cr.get('event', 'loops').split():
+            lval = strops.confopt_posint(lid, None)
+            if lval is not None:
+                self.loops.append(lval)
+        self._laps.setloops(self.loops)
 
         # load any special purpose sprint points
         for sid in cr.options('sprintpoints'):
@@ -441,15 +457,7 @@ class ps:
             s[SPRINT_COL_PLACES] = places
 
         # look up places from event links if present
-        if self.sprintsource:
-            for s in self.sprints:
-                sid = s[SPRINT_COL_ID]
-                if sid in self.sprintsource:
-                    splac = self.meet.autoplace_riders(self.sprintsource[sid])
-                    _log.debug('Loaded %r places from event %r: %r', sid,
-                               self.sprintsource[sid], splac)
-                    if splac:
-                        s[SPRINT_COL_PLACES] = splac
+        self.load_sources()
 
         # set entry
         if oft > 0:
@@ -529,6 +537,7 @@ class ps:
         cw.set('event', 'showinters', self.showinters)
         cw.set('event', 'inomnium', self.inomnium)
         cw.set('event', 'sprintlaps', self.sprintlaps)
+        cw.set('event', 'loops', ' '.join(str(l) for l in self.loops))
         cw.set('event', 'decisions', self.decisions)
         cw.set('event', 'weather', self._weather)
 
@@ -564,6 +573,51 @@ class ps:
         _log.debug('Saving points config %r', self.configfile)
         with metarace.savefile(self.configfile) as f:
             cw.write(f)
+        self.meet.riderindex.update(self.evno, self.series,
+                                    self.get_startlist())
+
+    def _issource(self, evno):
+        """Return True if evno may be a sprint source for this event."""
+        if evno is None:
+            return bool(self.sprintsource)
+        for spec in self.sprintsource.values():
+            for egroup in spec.split(';'):
+                if egroup.split(':')[0].strip() == evno:
+                    return True
+        return False
+
+    def _standingrows(self):
+        """Return a list of (row, place, total) in result order.
+
+        An omnium reads its places and totals from the shared
+        standings table, other events from the rider model.
+        """
+        ret = []
+        if self.evtype == 'omnium':
+            for place, bib, total, key in self.meet.standings.table(
+                    self.evno):
+                r = self._getrider(bib)
+                if r is not None:
+                    ret.append((r, place, total))
+        else:
+            for r in self.riders:
+                ret.append((r, r[RES_COL_PLACE], r[RES_COL_TOTAL]))
+        return ret
+
+    def load_sources(self):
+        """Update sprint places from linked events, return True if changed."""
+        ret = False
+        if self.sprintsource:
+            for s in self.sprints:
+                sid = s[SPRINT_COL_ID]
+                if sid in self.sprintsource:
+                    splac = self.meet.autoplace_riders(self.sprintsource[sid])
+                    if splac and splac != s[SPRINT_COL_PLACES]:
+                        _log.debug('Loaded %r places from event %r: %r', sid,
+                                   self.sprintsource[sid], splac)
+                        s[SPRINT_COL_PLACES] = splac
+                        ret = True
+        return ret
 
     def result_gen(self):
         """Generator function to export a final result."""
@@ -683,7 +737,7 @@ class ps:
         fl = None
         ll = None
         pcount = 1
-        for r in self.riders:
+        for r, place, total in self._standingrows():
             rno = ''
             dbrno = r[RES_COL_NO]
             if not self.noteamno:
@@ -704,15 +758,15 @@ class ps:
             if r[RES_COL_INFO]:
                 rcat = r[RES_COL_INFO]
             plstr = ''
-            if self.onestart and r[RES_COL_PLACE] is not None:
-                plstr = r[RES_COL_PLACE]
+            if self.onestart and place is not None:
+                plstr = place
                 qualified = self.qualified(plstr)
                 if r[RES_COL_INRACE]:
-                    if r[RES_COL_PLACE].isdigit():
+                    if place.isdigit():
                         plstr += '.'
                 ptstr = ''
-                if r[RES_COL_TOTAL] != 0 and r[RES_COL_INRACE]:
-                    ptstr = str(r[RES_COL_TOTAL])
+                if total != 0 and r[RES_COL_INRACE]:
+                    ptstr = str(total)
                 finplace = ''
                 if r[RES_COL_FINAL] >= 0:
                     finplace = str(r[RES_COL_FINAL] + 1)
@@ -851,23 +905,24 @@ class ps:
 
     def _getrider(self, bib):
         """Return temporary reference to model row."""
-        bib = bib.upper()
         ret = None
-        for r in self.riders:
-            if r[RES_COL_NO] == bib:
-                ret = r
-                break
+        i = self._ridx.getiter(bib.upper())
+        if i is not None:
+            ret = self.riders[i]
         return ret
 
+    def _riders_changed(self, *args):
+        """Drop the lap tracking team map on a rider model change."""
+        self._lapteams = None
+
+    def _riders_removed(self, *args):
+        """Drop applied sprints when a rider row is removed."""
+        self._riders_changed()
+        self._sprintreset()
+
     def _getiter(self, bib):
         """Return temporary iterator to model row."""
-        bib = bib.upper()
-        i = self.riders.get_iter_first()
-        while i is not None:
-            if self.riders.get_value(i, RES_COL_NO) == bib:
-                break
-            i = self.riders.iter_next(i)
-        return i
+        return self._ridx.getiter(bib.upper())
 
     def addrider(self, bib='', info=None):
         """Add specified rider to race model."""
@@ -904,13 +959,12 @@ class ps:
                 dbr = self.meet.rdb.get_rider(newNo, self.series)
                 if dbr is not None:
                     name = dbr.listname()
-                for r in self.riders:
-                    if r[RES_COL_NO] == oldNo:
-                        _log.debug('Updating number %s -> %s in event %s',
-                                   oldNo, newNo, self.evno)
-                        r[RES_COL_NO] = newNo
-                        r[RES_COL_NAME] = name
-                        break
+                r = self._getrider(oldNo)
+                if r is not None:
+                    _log.debug('Updating number %s -> %s in event %s', oldNo,
+                               newNo, self.evno)
+                    r[RES_COL_NO] = newNo
+                    r[RES_COL_NAME] = name
                 inRes = False
                 for s in self.sprints:
                     inSprint = False
@@ -985,8 +1039,14 @@ class ps:
         self._detail = None
         self._infoLine = None
         self._inters = {}
+        self._sprintreset()
+        self._namecache = {}  # rider display fields by number
+        self.standings = []  # (place, bib, total, sort key) in result order
         self._cursprint = None
         self._cursprintinfo = None
+        self._laps.reset()
+        self._lapsuggest = {}
+        self._bunchlaps = None
 
     def armstart(self):
         """Toggle timer arm start state."""
@@ -1518,7 +1578,7 @@ class ps:
             leaderboard = []
             hdr = ' # team' + ((self.meet.scb.linelen - 13) * ' ') + 'lap pt'
             llap = None  # leader's lap
-            for r in self.riders:
+            for r, place, total in self._standingrows():
                 if r[RES_COL_INRACE]:
                     name, club, cls = self._getname(r[RES_COL_NO])
                     bstr = r[RES_COL_NO]
@@ -1526,7 +1586,7 @@ class ps:
                         llap = r[RES_COL_LAPS]
                     lstr = str(r[RES_COL_LAPS] - llap)
                     if lstr == '0': lstr = ''
-                    pstr = str(r[RES_COL_TOTAL])
+                    pstr = str(total)
                     if pstr == '0': pstr = '-'
                     resvec.append((bstr, name, lstr, pstr))
         else:
@@ -1535,14 +1595,14 @@ class ps:
             #ldr = None
             bstr = ''
             leadlap = None
-            for r in self.riders:
+            for r, place, total in self._standingrows():
                 if r[RES_COL_INRACE]:
                     name, club, cls = self._getname(r[RES_COL_NO],
                                                     width=name_w)
-                    plstr = r[RES_COL_PLACE] + '.'
+                    plstr = place + '.'
                     if not self.noteamno:
                         bstr = r[RES_COL_NO]
-                    pstr = str(r[RES_COL_TOTAL])
+                    pstr = str(total)
                     if self.evtype == 'scratch':
                         if leadlap is None:
                             leadlap = r[RES_COL_LAPS]
@@ -1749,6 +1809,80 @@ class ps:
             self.fintrig(e)
         return False
 
+    def passingcb(self, e):
+        """Update lap tracking from a transponder passing."""
+        if not self._laps.enabled() or self.timerstat not in ('running',
+                                                              'armfinish'):
+            return False
+        dbr = self.meet.getrefid(e.refid)
+        if dbr is None:
+            return False
+        if self._lapteams is None:
+            self._lapteams = {}
+            if self.evtype == 'madison':
+                for r in self.riders:
+                    for m in r[RES_COL_MEMBERS].split():
+                        rbr = self.meet.rdb.fetch_bibstr(m)
+                        if rbr is not None:
+                            self._lapteams[rbr['no']] = r[RES_COL_NO]
+            self._laps.setteams(self._lapteams)
+        cno = self._laps.passing(dbr['no'], strops.chan2id(e.chan), e)
+        if cno is not None:
+            self._lapcheck()
+        return False
+
+    def _lapcheck(self):
+        """Compare tracked laps with the model and suggest changes."""
+        active = set()
+        for r in self.riders:
+            if r[RES_COL_INRACE]:
+                active.add(r[RES_COL_NO])
+        gains = []
+        losses = []
+        for cno, gap in self._laps.gaps(active).items():
+            r = self._getrider(cno)
+            if r is None:
+                continue
+            delta = gap - r[RES_COL_LAPS]
+            if delta == 0:
+                self._lapsuggest.pop(cno, None)
+            elif self._lapsuggest.get(cno) != gap:
+                self._lapsuggest[cno] = gap
+                if delta > 0:
+                    gains.append(cno)
+                else:
+                    losses.append(cno)
+        if gains:
+            _log.info('Suggest lap gain: %s', ' '.join(gains))
+            self._suggest_action('gain', gains)
+        if losses:
+            _log.info('Suggest lap loss: %s', ' '.join(losses))
+            self._suggest_action('lost', losses)
+
+        # select the sprint contested on this lap
+        blaps = self._laps.bunchlaps(active)
+        if blaps is not None and blaps != self._bunchlaps:
+            self._bunchlaps = blaps
+            if self.event['laps'] and self.winopen:
+                togo = str(self.event['laps'] - blaps)
+                idx = 0
+                for s in self.sprints:
+                    if s[SPRINT_COL_ID] == togo:
+                        _log.info('Bunch on sprint lap: %s to go', togo)
+                        self.ctrl_place_combo.set_active(idx)
+                        break
+                    idx += 1
+
+    def _suggest_action(self, acode, biblist):
+        """Load action entry with biblist for one-key confirmation."""
+        if not self.winopen or self.ctrl_action.get_text():
+            return
+        for i, a in enumerate(self.action_model):
+            if a[1] == acode:
+                self.ctrl_action_combo.set_active(i)
+                self.ctrl_action.set_text(' '.join(biblist))
+                break
+
     def timeout(self):
         """Update scoreboard and respond to timing events"""
         if not self.winopen:
@@ -2317,114 +2451,190 @@ class ps:
         except ValueError:
             _log.warning('Ignoring non-numeric lap count')
 
-    def zeropoints(self):
-        for r in self.riders:
-            r[RES_COL_POINTS] = 0
-            r[RES_COL_TOTAL] = 0
-            r[RES_COL_PLACE] = ''
-            r[RES_COL_FINAL] = -1  # Negative => Unplaced in final sprint
+    def _ridername(self, bib, name_w):
+        """Return cached display fields for bib from the rider db."""
+        key = (bib, name_w)
+        ret = self._namecache.get(key)
+        if ret is None:
+            name = ''
+            club = ''
+            cls = ''
+            nat = ''
+            rname = ''
+            pilot = None
+            dbr = self.meet.rdb.get_rider(bib, self.series)
+            if dbr is not None:
+                name = dbr.fitname(name_w)
+                rname = dbr.resname()
+                club = dbr['organisation']
+                cls = dbr['class']
+                nat = dbr['nation']
+                ph = self.meet.rdb.get_pilot(dbr)
+                if ph is not None:
+                    pilot = ph.resname()
+            ret = (name, rname, club, cls, nat, pilot)
+            self._namecache[key] = ret
+        return ret
 
-    def pointsxfer(self,
-                   placestr,
-                   final=False,
-                   index=0,
-                   points=None,
-                   sid=None):
-        """Transfer points from sprint placings to aggregate."""
+    def _sprintplaces(self, placestr, points, name_w):
+        """Return a list of placing entries for the sprint placestr."""
+        ret = []
         placeset = set()
-        if points is None:
-            points = [5, 3, 2, 1]  # Default is four places
-        self.sprintresults[index] = []
-        self._inters[sid] = []  # List of RESULTLINE objects for bridge
-        bridgeres = self._inters[sid]
         place = 0
         count = 0
-        name_w = self.meet.scb.linelen - 9
         for placegroup in placestr.split():
             for bib in placegroup.split('-'):
                 if bib != 'X':
                     if bib not in placeset:
                         placeset.add(bib)
-                        r = self._getrider(bib)
-                        if r is None:  # ensure rider exists at this point
-                            _log.info('Adding non-starter: %r', bib)
-                            self.addrider(bib)
-                            r = self._getrider(bib)
-                        name = ''
-                        club = ''
-                        cls = ''
-                        nat = ''
-                        rname = ''
-                        pilot = None
-                        dbr = self.meet.rdb.get_rider(bib, self.series)
-                        if dbr is not None:
-                            name = dbr.fitname(name_w)
-                            rname = dbr.resname()
-                            club = dbr['organisation']
-                            cls = dbr['class']
-                            nat = dbr['nation']
-                            ph = self.meet.rdb.get_pilot(dbr)
-                            if ph is not None:
-                                pilot = ph.resname()
+                        name, rname, club, cls, nat, pilot = self._ridername(
+                            bib, name_w)
+                        pts = None
                         ptsstr = ''
                         if place < len(points):
-                            ptsstr = str(points[place])
-                            r[RES_COL_POINTS] += points[place]
-                            if bib not in self.auxmap:
-                                self.auxmap[bib] = self.nopts[0:]
-                            self.auxmap[bib][index] = str(points[place])
-                        if final:
-                            r[RES_COL_FINAL] = place
+                            pts = points[place]
+                            ptsstr = str(pts)
                         plstr = str(place + 1) + '.'
-                        self.sprintresults[index].append(
-                            (plstr, r[RES_COL_NO], name, ptsstr,
-                             r[RES_COL_NAME]))
-                        bridgeres.append({
+                        ret.append((bib, place, pts, name, {
                             'rank': place + 1,
                             'class': plstr,
-                            'competitor': r[RES_COL_NO],
+                            'competitor': None,
                             'name': rname,
                             'pilot': pilot,
                             'nation': nat,
                             'info': cls,
                             'result': ptsstr,
-                        })
+                        }))
                     else:
                         _log.error('Ignoring duplicate no: %r', bib)
                 count += 1
             place = count
+        return (ret, count)
+
+    def _sprintreset(self):
+        """Drop all applied sprint placings and running totals."""
+        self._sprintcache = {}
+        self._sprinttotals = {}
+        self._sprintfinals = {}
+        self.auxmap = {}
+
+    def _sprintremove(self, index):
+        """Take the applied placings of sprint index off the totals."""
+        ckey, points, finals, bibs = self._sprintcache.pop(index)
+        totals = self._sprinttotals
+        for rno, pts in points.items():
+            totals[rno] -= pts
+            if not totals[rno]:
+                del totals[rno]
+        for rno in finals:
+            self._sprintfinals.pop(rno, None)
+        for bib in bibs:
+            aux = self.auxmap.get(bib)
+            if aux is not None:
+                aux[index] = ''
+                if not any(aux):
+                    del self.auxmap[bib]
+        if index < len(self.sprintresults):
+            self.sprintresults[index] = []
+        self._inters.pop(ckey[5], None)
+
+    def pointsxfer(self,
+                   placestr,
+                   final=False,
+                   index=0,
+                   points=None,
+                   sid=None):
+        """Apply sprint placings to the running points totals.
+
+        Each applied sprint is kept with its places, points and final
+        flag. An unchanged sprint is skipped, otherwise its previous
+        placings are taken off the running totals before the new
+        placings are added. Return True if the totals were changed.
+        """
+        if points is None:
+            points = [5, 3, 2, 1]  # Default is four places
+        name_w = self.meet.scb.linelen - 9
+        ckey = (placestr, tuple(points), name_w, self.series, final, sid)
+        sc = self._sprintcache.get(index)
+        if sc is not None:
+            if sc[0] == ckey:
+                return False
+            self._sprintremove(index)
+        entries, count = self._sprintplaces(placestr, points, name_w)
+
+        totals = self._sprinttotals
+        spoints = {}
+        sfinals = {}
+        sbibs = []
+        self.sprintresults[index] = []
+        self._inters[sid] = []  # List of RESULTLINE objects for bridge
+        bridgeres = self._inters[sid]
+        for bib, place, pts, name, bline in entries:
+            r = self._getrider(bib)
+            if r is None:  # ensure rider exists at this point
+                _log.info('Adding non-starter: %r', bib)
+                self.addrider(bib)
+                r = self._getrider(bib)
+            rno = r[RES_COL_NO]
+            if pts is not None:
+                totals[rno] = totals.get(rno, 0) + pts
+                spoints[rno] = spoints.get(rno, 0) + pts
+                if bib not in self.auxmap:
+                    self.auxmap[bib] = self.nopts[0:]
+                self.auxmap[bib][index] = bline['result']
+                sbibs.append(bib)
+            if final:
+                self._sprintfinals[rno] = place
+                sfinals[rno] = place
+            self.sprintresults[index].append(
+                (bline['class'], rno, name, bline['result'], r[RES_COL_NAME]))
+            bline = dict(bline)
+            bline['competitor'] = rno
+            bridgeres.append(bline)
         if count > 0:
             self.onestart = True
+        self._sprintcache[index] = (ckey, spoints, sfinals, sbibs)
+        return True
 
     def retotal(self, r):
         """Update totals"""
         if self.scoring == 'laps':
-            r[RES_COL_TOTAL] = r[RES_COL_STPTS] + r[RES_COL_POINTS]
+            total = r[RES_COL_STPTS] + r[RES_COL_POINTS]
         else:
-            r[RES_COL_TOTAL] = r[RES_COL_STPTS] + r[RES_COL_POINTS] + (
-                self.lappoints * r[RES_COL_LAPS])
+            total = r[RES_COL_STPTS] + r[RES_COL_POINTS] + (self.lappoints *
+                                                            r[RES_COL_LAPS])
+        if r[RES_COL_TOTAL] != total:
+            r[RES_COL_TOTAL] = total
 
     # result recalculation
     def recalculate(self):
         self._popcount = 0
-        self.zeropoints()
         self.finished = False
-        self.auxmap = {}
         idx = 0
         lidx = len(self.sprints) - 1
         for s in self.sprints:
             self.pointsxfer(s[SPRINT_COL_PLACES], idx == lidx, idx,
                             s[SPRINT_COL_POINTS], s[SPRINT_COL_ID])
             idx += 1
+        totals = self._sprinttotals
+        finals = self._sprintfinals
 
         if len(self.riders) == 0:
+            self._setstandings([])
             return
 
         aux = []
         idx = 0
         for r in self.riders:
+            rno = r[RES_COL_NO]
+            pts = totals.get(rno, 0)
+            if r[RES_COL_POINTS] != pts:
+                r[RES_COL_POINTS] = pts
+            final = finals.get(rno, -1)  # Negative => Unplaced in final
+            if r[RES_COL_FINAL] != final:
+                r[RES_COL_FINAL] = final
             self.retotal(r)
-            rno = strops.riderno_key(r[RES_COL_NO])
+            rno = strops.riderno_key(rno)
             ptotal = r[RES_COL_TOTAL]
             dnfcode = strops.dnfcode_key(None)
             laps = r[RES_COL_LAPS]
@@ -2471,10 +2681,14 @@ class ps:
             idx += 1
 
         aux.sort()
-        self.riders.reorder([a[5] for a in aux])
+        neworder = [a[5] for a in aux]
+        if neworder != list(range(len(neworder))):
+            self.riders.reorder(neworder)
         place = 1
         idx = 0
+        i = 0
         lr = None
+        standings = []
         for r in self.riders:
             if r[RES_COL_INRACE]:
                 nr = aux[idx]
@@ -2487,17 +2701,33 @@ class ps:
                     else:
                         if lr[0:3] != nr[0:3]:
                             place = idx + 1
-                r[RES_COL_PLACE] = str(place)
+                plstr = str(place)
                 idx += 1
                 lr = nr
             else:
                 if r[RES_COL_DNFCODE]:
-                    r[RES_COL_PLACE] = r[RES_COL_DNFCODE]
+                    plstr = r[RES_COL_DNFCODE]
                 else:
-                    r[RES_COL_PLACE] = 'dnf'
+                    plstr = 'dnf'
+            if r[RES_COL_PLACE] != plstr:
+                r[RES_COL_PLACE] = plstr
+            # tie-break key is the sort key without model indexes
+            if self.scoring == 'laps':
+                key = aux[i][0:5]
+            else:
+                key = aux[i][0:4]
+            standings.append((plstr, r[RES_COL_NO], r[RES_COL_TOTAL], key))
+            i += 1
+        self._setstandings(standings)
         if self.standingstr() == 'Result':
             self.finished = True
 
+    def _setstandings(self, standings):
+        """Save standings, and share an omnium's with the meet."""
+        self.standings = standings
+        if self.evtype == 'omnium':
+            self.meet.standings.update(self.evno, standings)
+
     def sprint_model_init(self, retain=False):
         """Initialise the sprint places model"""
         if self.winopen:
@@ -2513,7 +2743,7 @@ class ps:
                     'points': s[SPRINT_COL_POINTS],
                 }
         self.sprints.clear()
-        self.auxmap = {}
+        self._sprintreset()
         self.nopts = []
         isone = False
         self.sprintresults = []
@@ -2638,6 +2868,7 @@ class ps:
         self.laplabels = {}
         self.sprintsource = {}
         self.auxmap = {}
+        self.loops = []  # transponder loop ids from the lap line
 
         # race run time attributes
         self.onestart = False
@@ -2661,9 +2892,18 @@ class ps:
         self._detail = None
         self._infoLine = None
         self._inters = {}
+        self._sprintcache = {}  # applied sprint placings by sprint index
+        self._sprinttotals = {}  # running sprint points by rider number
+        self._sprintfinals = {}  # final sprint place by rider number
+        self._namecache = {}  # rider display fields by number
+        self.standings = []  # (place, bib, total, sort key) in result order
         self._cursprint = None
         self._cursprintinfo = None
         self._popcount = None
+        self._laps = laptrack.laptrack()
+        self._lapteams = None  # member no -> team no
+        self._lapsuggest = {}  # competitor no -> suggested laps
+        self._bunchlaps = None
 
         # data models
         self.sprints = Gtk.ListStore(
@@ -2689,6 +2929,9 @@ class ps:
             int,  # STPTS = 11
             str,  # DNFCODE = 12
             str)  # MEMBERS = 13
+        self._ridx = uiutil.rowIndex(self.riders, RES_COL_NO)
+        self.riders.connect('row-inserted', self._riders_changed)
+        self.riders.connect('row-deleted', self._riders_removed)
 
         if ui:
             b = uiutil.builder('ps.ui')
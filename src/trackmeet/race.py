@@ -23,6 +23,7 @@ from metarace import jsonconfig
 
 from . import uiutil
 from . import scbwin
+from . import laptrack
 
 _log = logging.getLogger('race')
 _log.setLevel(logging.DEBUG)
@@ -72,6 +73,38 @@ class race:
                 self.fintrig(start)
         self.resend_current()
 
+    def passingcb(self, e):
+        """Propose the last wheel from elimination finish line passings."""
+        if self.evtype != 'elimination' or self.finishloop is None:
+            return False
+        if self.timerstat not in ('running', 'armfinish'):
+            return False
+        if strops.chan2id(e.chan) != self.finishloop:
+            return False
+        dbr = self.meet.getrefid(e.refid)
+        if dbr is None:
+            return False
+        if self._elimdirty:
+            remain = []
+            for r in self.riders:
+                if r[COL_INRACE] and r[COL_NO] not in self.eliminated:
+                    remain.append(r[COL_NO])
+            self._elimlap.start(remain)
+            self._elimdirty = False
+        bib = self._elimlap.passing(dbr['no'].upper(), e)
+        if bib is not None:
+            _log.info('Last wheel lap %r: %r', self._elimlap.lap, bib)
+            if self.winopen:
+                cur = self.ctrl_action.get_text()
+                if not cur or cur == self._elimsuggest:
+                    for i, a in enumerate(self.action_model):
+                        if a[1] == 'out':
+                            self.ctrl_action_combo.set_active(i)
+                            self.ctrl_action.set_text(bib)
+                            break
+            self._elimsuggest = bib
+        return False
+
     def show_lapscore(self, laps, prev):
         """Accept laps when idle/running"""
 
@@ -151,13 +184,12 @@ class race:
                 dbr = self.meet.rdb.get_rider(newNo, self.series)
                 if dbr is not None:
                     name = dbr.listname()
-                for r in self.riders:
-                    if r[COL_NO] == oldNo:
-                        _log.debug('Updating number %s -> %s in event %s',
-                                   oldNo, newNo, self.evno)
-                        r[COL_NO] = newNo
-                        r[COL_NAME] = name
-                        break
+                r = self._getrider(oldNo)
+                if r is not None:
+                    _log.debug('Updating number %s -> %s in event %s', oldNo,
+                               newNo, self.evno)
+                    r[COL_NO] = newNo
+                    r[COL_NAME] = name
                 nelim = []
                 for r in self.eliminated:
                     if r == oldNo:
@@ -191,23 +223,19 @@ class race:
 
     def _getrider(self, bib):
         """Return temporary reference to model row."""
-        bib = bib.upper()
         ret = None
-        for r in self.riders:
-            if r[COL_NO] == bib:
-                ret = r
-                break
+        i = self._ridx.getiter(bib.upper())
+        if i is not None:
+            ret = self.riders[i]
         return ret
 
+    def _riders_changed(self, *args):
+        """Rebuild the elimination lap slots on a rider model change."""
+        self._elimdirty = True
+
     def _getiter(self, bib):
         """Return temporary iterator to model row."""
-        bib = bib.upper()
-        i = self.riders.get_iter_first()
-        while i is not None:
-            if self.riders.get_value(i, COL_NO) == bib:
-                break
-            i = self.riders.iter_next(i)
-        return i
+        return self._ridx.getiter(bib.upper())
 
     def delayed_reorder(self):
         """Call reorder if the flag is one."""
@@ -332,6 +360,7 @@ class race:
         if places is not None:
             self.places = places
         self.finished = False
+        self._elimdirty = True
         self.results = []
         placeset = set()
         # 12.456_[name]_123M
@@ -496,6 +525,7 @@ class race:
                 'inomnium': False,
                 'timetype': deftimetype,
                 'weather': None,
+                'finishloop': None,
             },
             'riders': {}
         })
@@ -540,6 +570,8 @@ class race:
         self.set_finish(cr.get('event', 'finish'))
         self.set_elapsed()
         self.eliminated = cr.get('event', 'eliminated')
+        self.finishloop = strops.confopt_posint(cr.get('event', 'finishloop'),
+                                                None)
         self.places = strops.reformat_placelist(cr.get('event', 'ctrl_places'))
 
         if self.winopen:
@@ -822,6 +854,7 @@ class race:
         cw.set('event', 'finish', self.finish)
         cw.set('event', 'ctrl_places', self.places)
         cw.set('event', 'eliminated', self.eliminated)
+        cw.set('event', 'finishloop', self.finishloop)
         cw.set('event', 'startlist', self.get_startlist())
         if self.winopen:
             cw.set('event', 'showinfo', self.info_expand.get_expanded())
@@ -842,6 +875,8 @@ class race:
         _log.debug('Saving event config %r', self.configfile)
         with metarace.savefile(self.configfile) as f:
             cw.write(f)
+        self.meet.riderindex.update(self.evno, self.series,
+                                    self.get_startlist())
 
     def do_properties(self):
         """Run event properties dialog."""
@@ -931,6 +966,9 @@ class race:
         self._reslines = None
         self._remain = None
         self._eliminated = None
+        self._elimlap.reset()
+        self._elimdirty = True
+        self._elimsuggest = None
         self.ctrl_places.set_text('')
         self.placexfer('')
         self.meet.main_timer.dearm(self.startchan)
@@ -1758,6 +1796,10 @@ class race:
         self._eliminated = None
         self._prevlap = None
         self._popcount = None
+        self.finishloop = None  # transponder loop id on the finish line
+        self._elimlap = laptrack.elimlap()
+        self._elimdirty = True
+        self._elimsuggest = None
 
         self.riders = Gtk.ListStore(
             str,  # 0 bib
@@ -1768,6 +1810,9 @@ class race:
             bool,  # 5 DNF/DNS
             str,  # 6 placing
             str)  # 7 dnfcode
+        self._ridx = uiutil.rowIndex(self.riders, COL_NO)
+        self.riders.connect('row-inserted', self._riders_changed)
+        self.riders.connect('row-deleted', self._riders_changed)
 
         # start timer and show window
         if ui:
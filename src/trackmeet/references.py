@@ -0,0 +1,280 @@
+# SPDX-License-Identifier: MIT
+"""Event number cross-reference index for trackmeet.
+
+Keep a map from each event number to the events that refer to it,
+through the auto starters, depends and reference columns of the
+event listing, or through source specs stored in an event's config.
+An entry is re-read only when the referring event's listing values
+or config file change, so renumbering an event only opens and
+rewrites the configs that actually refer to it.
+
+Changes made by a renumber are written as one transaction. Updated
+files are first saved under a staging name, then a journal listing
+the moves is saved, and only then are the files moved into place.
+If trackmeet stops part way through, recover() completes a
+journalled renumber or removes staged files that were never
+committed.
+
+"""
+
+import os
+import json
+import logging
+
+import metarace
+from metarace import jsonconfig
+
+from .eventdb import sub_autospec, sub_depend
+
+_log = logging.getLogger('references')
+_log.setLevel(logging.DEBUG)
+
+# Renumber transaction journal and staged file suffix
+JOURNAL = 'renumber.json'
+JOURNAL_ID = 'renumber-1.0'
+_STAGED = '.renumber'
+
+# Event listing references: column -> kind
+_EVENT_REFS = {
+    'auto': 'autospec',
+    'depend': 'depend',
+    'reference': 'evno',
+}
+
+# Event config references by event type: (section, option, kind)
+# An option of None includes every option in the section.
+_POINTS_REFS = (('sprintsource', None, 'autospec'), )
+_CLASS_REFS = (
+    ('event', 'showevents', 'depend'),
+    ('event', 'placesrc', 'autospec'),
+)
+_AGG_REFS = _CLASS_REFS + (
+    ('event', 'afinal', 'depend'),
+    ('event', 'bfinal', 'depend'),
+    ('event', 'aheat', 'depend'),
+    ('event', 'bheat', 'depend'),
+)
+_CONFIG_REFS = {
+    'classification': _CLASS_REFS,
+    'indiv aggregate': _AGG_REFS,
+    'team aggregate': _AGG_REFS,
+    'tempo': _POINTS_REFS,
+    'progressive': _POINTS_REFS,
+    'points': _POINTS_REFS,
+    'omnium': _POINTS_REFS,
+    'madison': _POINTS_REFS,
+}
+
+
+def _targets(value, kind):
+    """Return a list of event numbers referred to by value."""
+    ret = []
+    if value:
+        if kind == 'autospec':
+            for spec in value.split(';'):
+                if ':' in spec:
+                    ret.append(spec.split(':', 1)[0].strip())
+        elif kind == 'depend':
+            ret.extend(value.split())
+        else:
+            ret.append(value)
+    return ret
+
+
+def _substitute(value, kind, oldevno, newevno):
+    """Return value with references to oldevno replaced by newevno."""
+    if kind == 'autospec':
+        return sub_autospec(value, oldevno, newevno)
+    elif kind == 'depend':
+        return sub_depend(value, oldevno, newevno)
+    elif value == oldevno:
+        return newevno
+    return value
+
+
+class references:
+    """Cross-reference index of event numbers."""
+
+    def __init__(self, meet):
+        self._meet = meet
+        self._entries = {}  # referrer -> (key, [(target, where, kind)])
+        self._targets = {}  # target -> set of (referrer, where)
+
+    def clear(self):
+        """Drop all index entries."""
+        self._entries.clear()
+        self._targets.clear()
+
+    def _drop(self, evno):
+        """Remove the references made by evno."""
+        ent = self._entries.pop(evno, None)
+        if ent is not None:
+            for target, where, kind in ent[1]:
+                tset = self._targets.get(target)
+                if tset is not None:
+                    tset.discard((evno, where))
+                    if not tset:
+                        del self._targets[target]
+
+    def _scan(self, ev):
+        """Return a list of references made by event ev."""
+        evno = ev['evid']
+        ret = []
+        for col, kind in _EVENT_REFS.items():
+            for target in _targets(ev[col], kind):
+                ret.append((target, ('edb', col), kind))
+        if ev['type'] in _CONFIG_REFS:
+            cr = jsonconfig.config()
+            for section, option, kind in _CONFIG_REFS[ev['type']]:
+                cr.add_section(section)
+            cr.load(self._meet.event_configfile(evno))
+            for section, option, kind in _CONFIG_REFS[ev['type']]:
+                options = (option, )
+                if option is None:
+                    options = cr.options(section)
+                for opt in options:
+                    value = cr.get_value(section, opt)
+                    if isinstance(value, str):
+                        for target in _targets(value, kind):
+                            ret.append((target, (section, opt), kind))
+        return ret
+
+    def _refresh(self, ev):
+        """Re-index event ev if its listing or config has changed."""
+        evno = ev['evid']
+        mtime = None
+        if ev['type'] in _CONFIG_REFS:
+            try:
+                mtime = os.stat(
+                    self._meet.event_configfile(evno)).st_mtime_ns
+            except OSError:
+                pass
+        key = (ev['type'], mtime) + tuple(ev[c] for c in _EVENT_REFS)
+        ent = self._entries.get(evno)
+        if ent is None or ent[0] != key:
+            self._drop(evno)
+            refs = self._scan(ev)
+            self._entries[evno] = (key, refs)
+            for target, where, kind in refs:
+                if target not in self._targets:
+                    self._targets[target] = set()
+                self._targets[target].add((evno, where))
+
+    def referrers(self, evno):
+        """Return a sorted list of (referrer, where) pairs for evno.
+
+        Where is ('edb', column) for a reference in the event listing
+        or (section, option) for a reference in the event config.
+        """
+        for evid in list(self._entries):
+            if evid not in self._meet.edb:
+                self._drop(evid)
+        for ev in self._meet.edb:
+            self._refresh(ev)
+        return sorted(self._targets.get(evno, ()))
+
+    def renumber(self, oldevno, newevno):
+        """Change references to oldevno into newevno.
+
+        Call referrers(oldevno) to bring the index up to date before
+        changing the event listing, then renumber the listing. Listing
+        values are updated in memory, then the updated event configs,
+        the event listing and the renamed event config are committed
+        to disk together.
+        """
+        refs = self._targets.get(oldevno, ())
+        configs = {}
+        for referrer, where in sorted(refs):
+            if referrer == oldevno:
+                continue  # renamed event is not re-written
+            if referrer not in self._meet.edb:
+                continue
+            ev = self._meet.edb[referrer]
+            if where[0] == 'edb':
+                col = where[1]
+                nv = _substitute(ev[col], _EVENT_REFS[col], oldevno, newevno)
+                if nv != ev[col]:
+                    _log.debug('Update %s %r: %r', referrer, col, nv)
+                    ev.set_value(col, nv)
+            else:
+                if referrer not in configs:
+                    configs[referrer] = set()
+                configs[referrer].add(where)
+
+        # stage updated configs
+        moves = []
+        for referrer, wset in configs.items():
+            ev = self._meet.edb[referrer]
+            kinds = {}
+            for section, option, kind in _CONFIG_REFS.get(ev['type'], ()):
+                kinds[section, option] = kind
+            config = self._meet.event_configfile(referrer)
+            cr = jsonconfig.config()
+            for section, option in wset:
+                cr.add_section(section)
+            cr.load(config)
+            dosave = False
+            for section, option in wset:
+                kind = kinds.get((section, option), kinds.get(
+                    (section, None)))
+                ov = cr.get_value(section, option)
+                if kind is None or not isinstance(ov, str):
+                    continue
+                nv = _substitute(ov, kind, oldevno, newevno)
+                if nv != ov:
+                    _log.debug('Update %s %s/%s: %r', referrer, section,
+                               option, nv)
+                    cr.set(section, option, nv)
+                    dosave = True
+            if dosave:
+                with metarace.savefile(config + _STAGED) as f:
+                    cr.write(f)
+                moves.append((config + _STAGED, config))
+
+        # stage the event listing
+        self._meet.edb.save('events.csv' + _STAGED)
+        moves.append(('events.csv' + _STAGED, 'events.csv'))
+
+        # commit
+        rename = None
+        oldconf = self._meet.event_configfile(oldevno)
+        if os.path.isfile(oldconf):
+            rename = (oldconf, self._meet.event_configfile(newevno))
+        with metarace.savefile(JOURNAL) as f:
+            json.dump({
+                'id': JOURNAL_ID,
+                'rename': rename,
+                'moves': moves,
+            }, f)
+        _log.debug('Renumber %r to %r: %d configs updated', oldevno,
+                   newevno, len(moves) - 1)
+        self._apply(rename, moves)
+        self._drop(oldevno)
+
+    def _apply(self, rename, moves):
+        """Complete a journalled renumber."""
+        if rename is not None and os.path.isfile(rename[0]):
+            _log.debug('Moved event config from %r to %r', rename[0],
+                       rename[1])
+            os.replace(rename[0], rename[1])
+        for src, dst in moves:
+            if os.path.isfile(src):
+                os.replace(src, dst)
+        os.unlink(JOURNAL)
+
+    def recover(self):
+        """Complete or discard an interrupted renumber."""
+        if os.path.isfile(JOURNAL):
+            try:
+                with open(JOURNAL) as f:
+                    jd = json.load(f)
+                if jd.get('id') == JOURNAL_ID:
+                    _log.warning('Completing interrupted event renumber')
+                    self._apply(jd['rename'], jd['moves'])
+            except Exception as e:
+                _log.error('%s recovering renumber: %s', e.__class__.__name__,
+                           e)
+        for fname in os.listdir('.'):
+            if fname.endswith(_STAGED):
+                _log.warning('Removing uncommitted file %r', fname)
+                os.unlink(fname)
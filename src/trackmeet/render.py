@@ -0,0 +1,246 @@
+# SPDX-License-Identifier: MIT
+"""Report output fan-out for trackmeet exports.
+
+Write a report to each selected export format. The report's
+sections and document settings are pickled once and each format
+is rendered by a worker process. Output returns once the HTML and
+JSON files used by the website are written, while xlsx and PDF
+finish in the background. Without workers, the formats are written
+in turn: html, json, xlsx then pdf.
+
+"""
+
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+import metarace
+from metarace import report
+
+_log = logging.getLogger('render')
+_log.setLevel(logging.DEBUG)
+
+# Export formats in write order
+FORMATS = ('html', 'json', 'xlsx', 'pdf')
+
+# Formats written in binary mode
+_BINARY = ('xlsx', 'pdf')
+
+# Formats written before output returns
+_FOREGROUND = ('html', 'json')
+
+# Report attributes copied to worker processes
+_STATE = (
+    'provisional',
+    'reportstatus',
+    'id',
+    'serialno',
+    'eventid',
+    'customlinks',
+    'navbar',
+    'showcard',
+    'shortname',
+    'prevlink',
+    'nextlink',
+    'indexlink',
+    'resultlink',
+    'startlink',
+    'email',
+    'canonical',
+    'pagemarks',
+    'booklet',
+    'startpage',
+    'endpages',
+    'meetcode',
+    'keywords',
+    'strings',
+    'sections',
+)
+
+# Maximum number of render worker processes
+_WORKERS = len(FORMATS)
+
+_formats = set(FORMATS)
+_pool = None
+_pending = {}
+_plock = threading.Lock()
+
+
+def setformats(spec=None):
+    """Select export formats from a comma separated list.
+
+    None or an empty spec selects all formats. Return False if
+    spec names an unknown format.
+    """
+    global _formats
+    nf = set()
+    if spec:
+        for fmt in spec.lower().replace(',', ' ').split():
+            if fmt not in FORMATS:
+                _log.error('Unknown export format: %r', fmt)
+                return False
+            nf.add(fmt)
+    if not nf:
+        nf = set(FORMATS)
+    _formats = nf
+    _log.debug('Export formats: %s', ', '.join(formats()))
+    return True
+
+
+def formats():
+    """Return the selected export formats in write order."""
+    return tuple(f for f in FORMATS if f in _formats)
+
+
+def linktypes():
+    """Return the selected download formats linked from HTML."""
+    return [f for f in ('pdf', 'xlsx') if f in _formats]
+
+
+def _init(path):
+    """Prepare a worker process to render in the meet folder."""
+    os.chdir(path)
+    metarace.init()
+
+
+def _write(rep, fmt, ofile, kwargs):
+    """Write rep to ofile in the nominated format."""
+    mode = 't'
+    if fmt in _BINARY:
+        mode = 'b'
+    with metarace.savefile(ofile, mode=mode) as f:
+        getattr(rep, 'output_' + fmt)(f, **kwargs)
+
+
+def _render(template, state, fmt, ofile, kwargs):
+    """Rebuild a report from state and write it, return elapsed time."""
+    st = perf_counter()
+    rep = report.report(template)
+    for k, v in state.items():
+        setattr(rep, k, v)
+    _write(rep, fmt, ofile, kwargs)
+    return perf_counter() - st
+
+
+def _getpool():
+    """Return the shared worker pool, or None if unavailable."""
+    global _pool
+    if _pool is None:
+        try:
+            ctx = multiprocessing.get_context('spawn')
+            _pool = ProcessPoolExecutor(max_workers=_WORKERS,
+                                        mp_context=ctx,
+                                        initializer=_init,
+                                        initargs=(os.getcwd(), ))
+        except Exception as e:
+            _log.debug('%s starting render workers: %s', e.__class__.__name__,
+                       e)
+    return _pool
+
+
+def shutdown(wait=True):
+    """Stop any render worker processes.
+
+    If wait is True, background renders are completed first,
+    otherwise they are cancelled.
+    """
+    global _pool
+    if _pool is not None:
+        if wait:
+            _pool.shutdown(wait=True)
+        else:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _finished(ofile, fut):
+    """Log the outcome of a background render."""
+    with _plock:
+        if _pending.get(ofile) is fut:
+            del _pending[ofile]
+    if fut.cancelled():
+        _log.debug('Render of %s superseded', ofile)
+        return
+    try:
+        _log.debug('Rendered %s in %0.3fs', ofile, fut.result())
+    except Exception as e:
+        _log.error('%s rendering %s: %s', e.__class__.__name__, ofile, e)
+
+
+def _background(ofile, fut):
+    """Track fut as the latest render of ofile."""
+    with _plock:
+        prev = _pending.get(ofile)
+        _pending[ofile] = fut
+    if prev is not None:
+        # an older render still waiting for a worker is out of date
+        prev.cancel()
+    fut.add_done_callback(lambda f: _finished(ofile, f))
+
+
+def output(rep,
+           filebase,
+           template=None,
+           pdfargs={},
+           htmlargs={},
+           pdf=False):
+    """Write rep to filebase with each selected format extension.
+
+    Template must match the template used to create rep. Extra
+    keyword arguments to output_pdf and output_html are provided
+    in pdfargs and htmlargs. If pdf is True, a pdf file is written
+    even when not a selected format.
+
+    HTML and JSON are written before returning. When render workers
+    are available, xlsx and pdf are left to finish in the background
+    and any failure is logged.
+    """
+    args = {'pdf': pdfargs, 'html': htmlargs}
+    jobs = []
+    for fmt in FORMATS:
+        if fmt in _formats or (pdf and fmt == 'pdf'):
+            jobs.append((fmt, filebase + '.' + fmt, args.get(fmt, {})))
+
+    pool = None
+    state = None
+    if len(jobs) > 1:
+        pool = _getpool()
+        if pool is not None:
+            state = {}
+            for k in _STATE:
+                state[k] = getattr(rep, k)
+
+    if pool is not None:
+        futures = []
+        try:
+            for fmt, ofile, kwargs in jobs:
+                futures.append((fmt, ofile,
+                                pool.submit(_render, template, state, fmt,
+                                            ofile, kwargs)))
+        except Exception as e:
+            _log.debug('%s submitting render: %s', e.__class__.__name__, e)
+            shutdown(wait=False)
+            futures = []
+        done = set()
+        for fmt, ofile, fut in futures:
+            if fmt not in _FOREGROUND:
+                _background(ofile, fut)
+                done.add(fmt)
+                continue
+            try:
+                elap = fut.result()
+                done.add(fmt)
+                _log.debug('Rendered %s in %0.3fs', ofile, elap)
+            except Exception as e:
+                _log.debug('%s rendering %s: %s', e.__class__.__name__, ofile,
+                           e)
+        jobs = [j for j in jobs if j[0] not in done]
+
+    # fall back to rendering in this process
+    for fmt, ofile, kwargs in jobs:
+        st = perf_counter()
+        _write(rep, fmt, ofile, kwargs)
+        _log.debug('Wrote %s in %0.3fs', ofile, perf_counter() - st)
@@ -0,0 +1,144 @@
+# SPDX-License-Identifier: MIT
+"""Rider to event participation index for trackmeet.
+
+Record the startlist of each event as its handler saves config,
+so questions like "which events is this rider in" only need to
+open the events concerned. The index is stored in the meet folder
+and an entry is re-read from its event only when the event config
+file has changed since it was indexed.
+
+"""
+
+import os
+import json
+import logging
+
+import metarace
+
+_log = logging.getLogger('riderindex')
+_log.setLevel(logging.DEBUG)
+
+# Index file in meet folder
+INDEXFILE = 'riderindex.json'
+INDEX_ID = 'riderindex-1.0'
+
+
+class riderindex:
+    """Persistent map of riders to the events that list them."""
+
+    def __init__(self, meet):
+        self._meet = meet
+        self._events = {}  # evno -> (mtime, series, startlist)
+        self._riders = {}  # (no, series) -> set of evnos
+        self.dirty = False
+
+    def clear(self):
+        """Drop all index entries."""
+        self._events.clear()
+        self._riders.clear()
+        self.dirty = True
+
+    def _mtime(self, evno):
+        """Return the modification time of the config for evno."""
+        ret = None
+        try:
+            ret = os.stat(self._meet.event_configfile(evno)).st_mtime_ns
+        except OSError:
+            pass
+        return ret
+
+    def _set(self, evno, mtime, series, startlist):
+        """Replace the entry for evno."""
+        self._drop(evno)
+        series = series.lower()
+        self._events[evno] = (mtime, series, startlist)
+        for rno in startlist:
+            key = (rno, series)
+            if key not in self._riders:
+                self._riders[key] = set()
+            self._riders[key].add(evno)
+        self.dirty = True
+
+    def _drop(self, evno):
+        """Remove the entry for evno."""
+        ent = self._events.pop(evno, None)
+        if ent is not None:
+            for rno in ent[2]:
+                key = (rno, ent[1])
+                if key in self._riders:
+                    self._riders[key].discard(evno)
+                    if not self._riders[key]:
+                        del self._riders[key]
+            self.dirty = True
+
+    def update(self, evno, series, startlist):
+        """Record the startlist string saved for event evno."""
+        sl = tuple(rno.upper() for rno in startlist.split())
+        self._set(evno, self._mtime(evno), series, sl)
+
+    def _refresh(self, evno):
+        """Re-read evno from its config if the index is out of date."""
+        if evno not in self._meet.edb:
+            self._drop(evno)
+            return
+        ev = self._meet.edb[evno]
+        ent = self._events.get(evno)
+        mtime = self._mtime(evno)
+        if ent is None or ent[0] != mtime or ent[1] != ev['series'].lower():
+            _log.debug('Re-index event %r', evno)
+            h = self._meet.get_event(evno, False)
+            h.loadconfig()
+            self.update(evno, ev['series'], h.get_startlist())
+            h = None
+
+    def startlist(self, evno):
+        """Return a tuple of rider numbers listed in event evno."""
+        self._refresh(evno)
+        ent = self._events.get(evno)
+        if ent is not None:
+            return ent[2]
+        return ()
+
+    def events(self, rno, series):
+        """Return a list of event numbers in series that list rider rno."""
+        series = series.lower()
+        key = (rno.upper(), series)
+        ret = []
+        for e in self._meet.edb:
+            if e['series'].lower() == series:
+                evno = e['evid']
+                self._refresh(evno)
+                if evno in self._riders.get(key, ()):
+                    ret.append(evno)
+        return ret
+
+    def load(self, filename=INDEXFILE):
+        """Read index from filename, ignoring errors."""
+        self._events.clear()
+        self._riders.clear()
+        try:
+            if os.path.exists(filename):
+                with open(filename) as f:
+                    jd = json.load(f)
+                if jd.get('id') == INDEX_ID:
+                    for evno, ent in jd['events'].items():
+                        self._set(evno, ent['mtime'], ent['series'],
+                                  tuple(ent['startlist']))
+        except Exception as e:
+            _log.warning('%s reading index: %s', e.__class__.__name__, e)
+        self.dirty = False
+        _log.debug('Loaded %d event startlists', len(self._events))
+
+    def save(self, filename=INDEXFILE):
+        """Write index to filename if it has changed."""
+        if self.dirty:
+            events = {}
+            for evno, ent in self._events.items():
+                events[evno] = {
+                    'mtime': ent[0],
+                    'series': ent[1],
+                    'startlist': list(ent[2]),
+                }
+            with metarace.savefile(filename) as f:
+                json.dump({'id': INDEX_ID, 'events': events}, f)
+            self.dirty = False
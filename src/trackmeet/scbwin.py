@@ -11,8 +11,10 @@ interface:
  reset()	reset state to start (calls redraw)
  pause()	toggle paused state, returns next val
  redraw()	redraw fixed screen elements
- update()	advance animation by one 'frame', caller is
-		expected to repeatedly call update at ~20Hz
+ update()	advance animation to the current 'frame', caller is
+		expected to repeatedly call update at ~20Hz. Frames
+		are counted from a monotonic clock, so late calls
+		catch up rather than stretch the animation.
 
 Shared properties for all scbwins:
 
@@ -26,7 +28,7 @@ or first call to update() will emit anything to scb surface.
 import logging
 import unicodedata
 import random
-from time import strftime
+from time import strftime, monotonic
 from contextlib import suppress
 
 from metarace import strops
@@ -37,8 +39,10 @@ _log = logging.getLogger('scbwin')
 _log.setLevel(logging.DEBUG)
 
 # Constants
+_TICK = 0.05  # seconds per animation frame
 _PAGE_INIT = 10  # delay before table data starts displaying
 _PAGE_DELAY = 60  # def tenths of sec to hold each page of table
+_FLUSH_TICKS = 400  # frames between scoreboard keepalive flushes
 _DATE_FMT = '%a %d/%m/%y'
 
 
@@ -103,6 +107,20 @@ def fmt_row(coldesc, row):
     return ''.join(nr)
 
 
+def paginate(rows, pagesz):
+    """Split formatted rows into a list of pages of pagesz lines.
+
+    Missing rows on the last page are returned as empty strings.
+    """
+    ret = []
+    if pagesz > 0:
+        for i in range(0, max(len(rows), 1), pagesz):
+            page = rows[i:i + pagesz]
+            page.extend([''] * (pagesz - len(page)))
+            ret.append(page)
+    return ret
+
+
 class scbwin:
     """Base class for all scoreboard windows.
 
@@ -116,13 +134,59 @@ class scbwin:
         self.paused = False
         self.scb = scb
         self.count = 0
+        self._start = monotonic()
+        self._fclk = None
+        self._shown = {}
 
     def reset(self):
         """Reset scbwin to initial state."""
         self.count = 0
+        self._start = monotonic()
+        self._fclk = None
+        self._shown = {}
         self.redraw()
         self.paused = False
 
+    def tick(self):
+        """Update and return frame count from the monotonic clock.
+
+        While paused, the frame count is held at its current value.
+        """
+        now = monotonic()
+        if self.paused:
+            self._start = now - self.count * _TICK
+        else:
+            self.count = int((now - self._start) / _TICK)
+        return self.count
+
+    def keepalive(self):
+        """Flush scoreboard once every _FLUSH_TICKS frames."""
+        fclk = self.count // _FLUSH_TICKS
+        if fclk != self._fclk:
+            self._fclk = fclk
+            self.scb.flush()
+
+    def putline(self, line, text):
+        """Send text to line if it differs from the last value shown."""
+        if self._shown.get(line) != text:
+            if text:
+                self.scb.setline(line, text)
+            else:
+                self.scb.clrline(line)
+            self._shown[line] = text
+
+    def wipe(self, page, pclk, rowoft):
+        """Bring page wipe up to step pclk.
+
+        Lines before pclk show the page content, line pclk is
+        cleared and lines after pclk retain their previous content.
+        """
+        pagesz = len(page)
+        for j in range(min(pclk, pagesz)):
+            self.putline(rowoft + j, page[j])
+        if pclk < pagesz:
+            self.putline(rowoft + pclk, '')
+
     def pause(self, set=None):
         """Update the pause property.
 
@@ -142,7 +206,7 @@ class scbwin:
 
     def update(self):
         """Virtual update method."""
-        self.count += 1
+        self.tick()
 
 
 class scbclock(scbwin):
@@ -169,11 +233,24 @@ class scbclock(scbwin):
         if self.scb.pagelen > 4:
             self.bodyoft = 2
         self.header = get_dateline(self.scb.linelen)
+        self._hclk = None
+        self._next = 0
+
+        # body lines are animated at fixed frame numbers
+        w = self.scb.linelen
+        self._body = (
+            (14, self.bodyoft, self.line1.strip().center(w)),
+            (16, self.bodyoft + 1, self.line2.strip().center(w)),
+            (18, self.bodyoft + 2, self.line3.strip().center(w)),
+            (20, self.bodyoft + 4, self.locstr.strip().center(w)),
+        )
 
     def redraw(self):
         self.scb.setline(0, self.header)
         for i in range(1, self.scb.pagelen):
             self.scb.clrline(i)
+        self._next = 0
+        self._hclk = None
 
     def update(self):
         """Animate the clock window.
@@ -185,25 +262,21 @@ class scbclock(scbwin):
         from the system time.
 
         """
+        count = self.tick()
         if not self.paused:
-            if self.count == 14:
-                self.scb.setline(self.bodyoft,
-                                 self.line1.strip().center(self.scb.linelen))
-            if self.count == 16:
-                self.scb.setline(self.bodyoft + 1,
-                                 self.line2.strip().center(self.scb.linelen))
-            if self.count == 18:
-                self.scb.setline(self.bodyoft + 2,
-                                 self.line3.strip().center(self.scb.linelen))
-            if self.count == 20:
-                self.scb.setline(self.bodyoft + 4,
-                                 self.locstr.strip().center(self.scb.linelen))
-            if self.count % 2 == 0:
+            while self._next < len(self._body):
+                frame, line, text = self._body[self._next]
+                if frame > count:
+                    break
+                self.scb.setline(line, text)
+                self._next += 1
+            hclk = count // 2
+            if hclk != self._hclk:
+                self._hclk = hclk
                 next = get_dateline(self.scb.linelen)
                 if next != self.header:
                     self.scb.setline(0, next)
                     self.header = next
-            self.count += 1
 
 
 class scbtt(scbwin):
@@ -347,6 +420,7 @@ class scbtt(scbwin):
 
     def update(self):
         """If any time or ranks change, copy new value onto overlay."""
+        self.tick()
         if not self.paused:
             c1oft = 2 + self.singleoft
             teamoft = 1
@@ -375,9 +449,7 @@ class scbtt(scbwin):
             if self.line2 != self.nextline2:
                 self.line2 = self.nextline2
                 self.scb.setline(c2oft, self.nextline2)
-            if self.count % 400 == 0:
-                self.scb.flush()
-            self.count += 1
+            self.keepalive()
 
 
 class scbtimer(scbwin):
@@ -441,6 +513,7 @@ class scbtimer(scbwin):
 
     def update(self):
         """If time or avg change, copy new value onto overlay."""
+        self.tick()
         if not self.paused:
             if self.curtime != self.nexttime:
                 #self.scb.postxt(3, self.scb.linelen - 13,
@@ -456,7 +529,6 @@ class scbtimer(scbwin):
                     strops.truncpad(self.avgpfx, self.scb.linelen - 13, 'r') +
                     strops.truncpad(self.nextavg, 12, 'r'))
                 self.curavg = self.nextavg
-            self.count += 1
 
 
 class scbtest(scbwin):
@@ -476,10 +548,9 @@ class scbtest(scbwin):
             self.scb.setline(j, l)
 
     def update(self):
+        self.tick()
         if not self.paused:
-            if self.count % 400 == 0:
-                self.scb.flush()
-            self.count += 1
+            self.keepalive()
 
     def __init__(self, scb=None):
         scbwin.__init__(self, scb)
@@ -498,38 +569,29 @@ class scbintsprint(scbwin):
             for row in rows:
                 nr = fmt_row(coldesc, row)
                 self.rows.append(nr)
-        self.nrpages = len(self.rows) // self.pagesz + 1
-        if self.nrpages > 1 and len(self.rows) % self.pagesz == 0:
-            self.nrpages -= 1
         # avoid hanging residual by scooting 2nd last entry onto
         # last page with a 'dummy' row, or scoot single line down by one
         if len(self.rows) % self.pagesz == 1:
             self.rows.insert(len(self.rows) - 2, ' ')
+        self.pages = paginate(self.rows, self.pagesz)
+        self.nrpages = len(self.pages)
 
     def redraw(self):
         self.scb.setline(0, self.line1.strip().center(self.scb.linelen))
         self.scb.setline(1, self.line2.strip().center(self.scb.linelen))
         for i in range(2, self.scb.pagelen):
             self.scb.clrline(i)
+            self._shown[i] = ''
 
     def update(self):
-        if self.count % 2 == 0 and self.count > _PAGE_INIT:  # wait ~1/2 sec
-            lclk = (self.count - _PAGE_INIT) // 2
+        count = self.tick()
+        if count > _PAGE_INIT:  # wait ~1/2 sec
+            lclk = (count - _PAGE_INIT) // 2
+            if self.nrpages == 1:
+                lclk = min(lclk, self.pagesz)  # no animate on single page
             cpage = (lclk // self.delay) % self.nrpages
             pclk = lclk % self.delay
-            if pclk < self.pagesz + 1:
-                if pclk != self.pagesz:
-                    self.scb.clrline(self.rowoft + pclk)
-                elif self.nrpages == 1:
-                    self.count += 1
-                    self.paused = True  # no animate on single page
-                if pclk != 0:
-                    roft = self.pagesz * cpage + pclk - 1
-                    if roft < len(self.rows):
-                        self.scb.setline(self.rowoft + pclk - 1,
-                                         self.rows[roft])
-        if not self.paused:
-            self.count += 1
+            self.wipe(self.pages[cpage], pclk, self.rowoft)
 
     def __init__(self,
                  scb=None,
@@ -550,6 +612,7 @@ class scbintsprint(scbwin):
 
         # load rows
         self.rows = []  # formatted rows
+        self.pages = []  # rows split into pages
         self.loadrows(coldesc, rows)
 
 
@@ -565,13 +628,17 @@ class scbtable(scbwin):
             for row in rows:
                 nr = fmt_row(coldesc, row)
                 self.rows.append(nr)
-        self.nrpages = len(self.rows) // self.pagesz + 1
-        if self.nrpages > 1 and len(self.rows) % self.pagesz == 0:
-            self.nrpages -= 1
         # avoid hanging residual by scooting 2nd last entry onto
         # last page with a 'dummy' row, or scoot single line down by one
         if len(self.rows) % self.pagesz == 1:
             self.rows.insert(len(self.rows) - 2, ' ')
+        self.pages = paginate(self.rows, self.pagesz)
+        self.nrpages = len(self.pages)
+        self.timeline = None
+        if self.timestr is not None:
+            self.timeline = strops.truncpad(
+                self.timepfx, self.scb.linelen - 13,
+                'r') + ' ' + self.timestr[0:12]
 
     def redraw(self):
         self.scb.setline(0, self.header.center(self.scb.linelen))
@@ -581,38 +648,27 @@ class scbtable(scbwin):
             j = 2
         for i in range(j, self.scb.pagelen):
             self.scb.clrline(i)
+            self._shown[i] = ''
+        self._cycle = None
 
     def update(self):
         # if time field set and not a round number of rows, append
         # time line to last row of last page
-        if self.count % 2 == 0 and self.count > _PAGE_INIT:  # wait ~1/2 sec
-            lclk = (self.count - _PAGE_INIT) // 2
-            cpage = (lclk // self.delay) % self.nrpages
+        count = self.tick()
+        if count > _PAGE_INIT:  # wait ~1/2 sec
+            lclk = (count - _PAGE_INIT) // 2
+            cycle = lclk // self.delay
+            cpage = cycle % self.nrpages
             pclk = lclk % self.delay
             # special case for single page results to hold page w/ Caprica
-            if self.nrpages == 1 and lclk >= self.delay:
-                if pclk == 0:
+            if self.nrpages == 1 and cycle > 0:
+                if cycle != self._cycle:
                     self.scb.flush()
-            elif pclk < self.pagesz + 1:
-                if pclk != self.pagesz:
-                    self.scb.clrline(self.rowoft + pclk)
-                else:  # end of page
-                    #if self.nrpages == 1:
-                    #self.count += 1
-                    #self.paused = True # no further animate on single page
-                    if self.timestr is not None:
-                        self.scb.setline(
-                            self.rowoft + pclk,
-                            strops.truncpad(self.timepfx,
-                                            self.scb.linelen - 13, 'r') + ' ' +
-                            self.timestr[0:12])
-                if pclk != 0:
-                    roft = self.pagesz * cpage + pclk - 1
-                    if roft < len(self.rows):
-                        self.scb.setline(self.rowoft + pclk - 1,
-                                         self.rows[roft])
-        if not self.paused:
-            self.count += 1
+            else:
+                self.wipe(self.pages[cpage], pclk, self.rowoft)
+                if pclk >= self.pagesz and self.timeline is not None:
+                    self.putline(self.rowoft + self.pagesz, self.timeline)
+            self._cycle = cycle
 
     def __init__(self,
                  scb=None,
@@ -633,6 +689,7 @@ class scbtable(scbwin):
         self.delay = delay
         self.timestr = timestr
         self.timepfx = timepfx
+        self._cycle = None
         if pagesz and pagesz > 5:
             self.pagesz = 6  # grab a line from the top
             self.rowoft = 2
@@ -649,4 +706,5 @@ class scbtable(scbwin):
 
         # load rows
         self.rows = []  # formatted rows
+        self.pages = []  # rows split into pages
         self.loadrows(coldesc, rows)
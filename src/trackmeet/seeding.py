@@ -0,0 +1,76 @@
+# SPDX-License-Identifier: MIT
+"""Seeding and heat allocation helpers for trackmeet.
+
+Time trial and flying 200 handlers arrange starters by seed and
+build heats from the ordered model. This module provides key based
+ordering and a display cache for rider db lookups, so a startlist,
+program or bridge update can re-use one set of lookups.
+
+"""
+
+import logging
+
+from metarace import strops
+
+_log = logging.getLogger('seeding')
+_log.setLevel(logging.DEBUG)
+
+
+def seed_order(model, seedcol, nocol):
+    """Return a reorder list for model by seed then number, or None.
+
+    None is returned when the model is already in seeded order.
+    """
+    aux = []
+    for cnt, r in enumerate(model):
+        aux.append((strops.riderno_key(r[seedcol]),
+                    strops.riderno_key(r[nocol]), cnt))
+    aux.sort()
+    order = [a[2] for a in aux]
+    if order == list(range(len(order))):
+        return None
+    return order
+
+
+def heat_key(heat):
+    """Return a sort key for a heat string 'heat.lane'."""
+    return strops.heatsplit(heat)
+
+
+class riderCache:
+    """Cache of rider db display values."""
+
+    def __init__(self, rdb):
+        self._rdb = rdb
+        self._riders = {}
+        self._members = {}
+
+    def clear(self):
+        """Drop all cached values."""
+        self._riders.clear()
+        self._members.clear()
+
+    def rider(self, rno, series=''):
+        """Return (dbrno, resname, class, nation, pilotline) for rno.
+
+        Dbrno is None if rno is not in the rider db.
+        """
+        ret = self._riders.get((rno, series))
+        if ret is None:
+            ret = (None, '', None, None, None)
+            rh = self._rdb.get_rider(rno, series)
+            if rh is not None:
+                ret = (rh['no'], rh.resname(), rh['class'], rh['nation'],
+                       self._rdb.get_pilot_line(rh))
+            self._riders[(rno, series)] = ret
+        return ret
+
+    def member(self, bibstr):
+        """Return (line, no) for team member bibstr, or None."""
+        if bibstr not in self._members:
+            ret = None
+            trh = self._rdb.fetch_bibstr(bibstr)
+            if trh is not None:
+                ret = (tuple(trh.get_line()), trh['no'])
+            self._members[bibstr] = ret
+        return self._members[bibstr]
@@ -8,21 +8,27 @@ Caprica scoreboard.
 """
 
 import threading
-import queue
 import logging
 import socket
 import serial
+from collections import deque
+from time import monotonic
 
 from metarace import sysconf
 from metarace import unt4
 from metarace import strops
 
+from . import metrics
+
 # Caprica encoding is UTF-8, Galactica is undefined - probably CP1252
 _DEFENCODING = 'utf-8'
 _DEFLINELEN = 24
 _DEFPAGELEN = 7
 _DEFBAUDRATE = 115200
 _DEFPORT = 2004 - 58
+_QUEUELEN = 128  # maximum number of pending messages
+_MAXBATCH = 1024  # maximum characters per port write
+_MAXBACKOFF = 30  # maximum seconds between port reconnect attempts
 
 # module log object
 _log = logging.getLogger('sender')
@@ -82,6 +88,132 @@ OVERLAY_BLANK = unt4.unt4(header='OVERLAY 03')
 OVERLAY_BRIDGE = unt4.unt4(header='OVERLAY 04')
 
 
+class cmdqueue:
+    """Bounded, coalescing sender command queue.
+
+    Messages may be queued with a key identifying their destination,
+    eg a scoreboard line. A newer message for the same key replaces
+    any older message still waiting to be sent. When the queue is
+    full, the oldest waiting keyed message is dropped. Unkeyed
+    messages and control commands are never dropped, so the queue
+    may grow past maxlen if it holds no keyed messages.
+    """
+
+    def __init__(self, maxlen=_QUEUELEN):
+        self._maxlen = maxlen
+        self._cv = threading.Condition()
+        self._q = deque()
+        self._keys = {}
+        self._depth = 0
+        self._lag = 0.0
+        self._drops = 0
+        self._coalesced = 0
+        self._sent = 0
+
+    def put(self, cmd, data=None, key=None):
+        """Append command to queue, replacing any pending message for key."""
+        with self._cv:
+            if cmd == 'MSG':
+                if key is not None and key in self._keys:
+                    self._q.remove(self._keys[key])
+                    self._coalesced += 1
+                    self._depth -= 1
+                if self._depth >= self._maxlen:
+                    for e in self._q:
+                        if e[2] is not None:
+                            self._discard(e)
+                            self._drops += 1
+                            break
+                e = [cmd, data, key, monotonic()]
+                if key is not None:
+                    self._keys[key] = e
+                self._depth += 1
+            else:
+                e = [cmd, data, None, None]
+            self._q.append(e)
+            self._cv.notify()
+
+    def purge(self):
+        """Discard all keyed messages waiting in the queue."""
+        with self._cv:
+            for e in list(self._keys.values()):
+                self._discard(e)
+                self._coalesced += 1
+
+    def clear(self):
+        """Remove all queued commands."""
+        with self._cv:
+            self._q.clear()
+            self._keys.clear()
+            self._depth = 0
+            self._cv.notify_all()
+
+    def get(self, maxlen=_MAXBATCH):
+        """Wait for the next command and return (cmd, data).
+
+        Contiguous messages are joined into a single data string
+        of at most maxlen characters.
+        """
+        with self._cv:
+            while not self._q:
+                self._cv.wait()
+            e = self._q.popleft()
+            if e[0] != 'MSG':
+                return (e[0], e[1])
+            self._release(e)
+            lag = monotonic() - e[3]
+            buf = [e[1]]
+            blen = len(e[1])
+            while self._q and self._q[0][0] == 'MSG':
+                nlen = len(self._q[0][1])
+                if blen + nlen > maxlen:
+                    break
+                e = self._q.popleft()
+                self._release(e)
+                buf.append(e[1])
+                blen += nlen
+            self._sent += len(buf)
+            if lag > self._lag:
+                self._lag = lag
+            if not self._q:
+                self._cv.notify_all()
+            return ('MSG', ''.join(buf))
+
+    def depth(self):
+        """Return the number of messages waiting in the queue."""
+        return self._depth
+
+    def join(self):
+        """Suspend calling thread until queue is empty."""
+        with self._cv:
+            while self._q:
+                self._cv.wait()
+
+    def stats(self):
+        """Return a dict of queue statistics and reset peak lag."""
+        with self._cv:
+            ret = {
+                'depth': self._depth,
+                'lag': self._lag,
+                'drops': self._drops,
+                'coalesced': self._coalesced,
+                'sent': self._sent,
+            }
+            self._lag = 0.0
+        return ret
+
+    def _release(self, e):
+        """Remove key reference for a dequeued message."""
+        self._depth -= 1
+        if e[2] is not None:
+            del self._keys[e[2]]
+
+    def _discard(self, e):
+        """Drop the waiting message e from the queue."""
+        self._q.remove(e)
+        self._release(e)
+
+
 class serialport:
     """Serial port wrapper"""
 
@@ -97,6 +229,7 @@ class serialport:
         _log.debug('Serial connection %s @ %d baud.', addr, baudrate)
         self._s = serial.Serial(addr, baudrate, rtscts=False)
         self.send = self._s.write
+        self.batch = _MAXBATCH
 
     def sendall(self, buf):
         """Send all of buf to port."""
@@ -127,7 +260,9 @@ class scbport:
 
         """
         self._s = socket.socket(socket.AF_INET, protocol)
+        self.batch = 0  # one message per datagram
         if protocol == socket.SOCK_STREAM:
+            self.batch = _MAXBATCH
             try:
                 self._s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
                 self._s.setsockopt(socket.IPPROTO_TCP, socket.TCP_USER_TIMEOUT,
@@ -238,16 +373,54 @@ def mkport(port):
 
 
 def sender(port=None):
-    """Return a sender of the configured type"""
+    """Return a scoreboard sender for one or more ports.
+
+    Port may list several destinations separated by commas,
+    each with an optional scoreboard type prefix:
+
+        [TYPE@][PROTOCOL:]ADDRESS[:PORT], ...
+
+    Where TYPE is one of DHI or DAK. Destinations without a type
+    use the configured default scoreboard type.
+
+    """
+    return fansender(port)
+
+
+def sendertype():
+    """Return the configured default scoreboard type."""
     stype = 'dhi'
     if sysconf.has_option('sender', 'scoreboard'):
         ntype = sysconf.get('sender', 'scoreboard')
         if ntype in ('dhi', 'dak'):
             stype = ntype
-    if stype == 'dak':
-        return daksender(port)
-    else:
-        return basesender(port)
+    return stype
+
+
+def splitports(port=None):
+    """Return a list of (type, portspec) from a multi-port string."""
+    ret = []
+    if port and port.strip().upper() == 'DEFAULT':
+        if sysconf.has_option('sender', 'portspec'):
+            defport = sysconf.get('sender', 'portspec')
+            if defport:
+                port = defport
+    if port:
+        deftype = sendertype()
+        for spec in port.split(','):
+            spec = spec.strip()
+            if spec:
+                stype = deftype
+                if '@' in spec:
+                    ntype, spec = spec.split('@', 1)
+                    ntype = ntype.strip().lower()
+                    spec = spec.strip()
+                    if ntype in _SENDERS:
+                        stype = ntype
+                    else:
+                        _log.warning('Unknown scoreboard type %r', ntype)
+                ret.append((stype, spec))
+    return ret
 
 
 class basesender(threading.Thread):
@@ -259,12 +432,14 @@ class basesender(threading.Thread):
 
     def clrline(self, line):
         """Clear the specified line in DHI database."""
-        self.sendmsg(unt4.unt4(xx=0, yy=int(line), erl=True))
+        line = int(line)
+        self.sendmsg(unt4.unt4(xx=0, yy=line, erl=True), key=line)
 
     def setline(self, line, msg):
         """Set the specified DHI database line to msg."""
+        line = int(line)
         msg = strops.truncpad(msg, self.linelen, 'l', False)
-        self.sendmsg(unt4.unt4(xx=0, yy=int(line), erl=True, text=msg))
+        self.sendmsg(unt4.unt4(xx=0, yy=line, erl=True, text=msg), key=line)
 
     def flush(self):
         """Send an empty update to force timeout clock to zero."""
@@ -272,8 +447,9 @@ class basesender(threading.Thread):
 
     def linefill(self, line, char='_'):
         """Use char to fill the specified line."""
+        line = int(line)
         msg = char * self.linelen
-        self.sendmsg(unt4.unt4(xx=0, yy=int(line), text=msg))
+        self.sendmsg(unt4.unt4(xx=0, yy=line, text=msg), key=line)
 
     def postxt(self, line, oft, msg):
         """Position msg at oft on line in DHI database."""
@@ -287,35 +463,91 @@ class basesender(threading.Thread):
         """Constructor."""
         threading.Thread.__init__(self, daemon=True)
         self._port = None
+        self._portspec = None
         self._encoding = _DEFENCODING
 
         self.linelen = _DEFLINELEN
         self.pagelen = _DEFPAGELEN
+        self._loadconf()
 
         self._ignore = False
-        self._queue = queue.Queue()
+        self._queue = cmdqueue()
         self._running = False
 
+        # reconnect backoff and port metrics
+        self._retry = None
+        self._backoff = 0
+        self._txbytes = 0
+        self._wtime = 0.0
+        self._statbytes = 0
+        self._stattime = monotonic()
+
         if port is not None:
             self.setport(port)
 
-    def sendmsg(self, unt4msg=None):
-        """Pack and send a unt4 message to the DHI."""
-        self._queue.put_nowait(('MSG', unt4msg.pack()))
+    def _loadconf(self):
+        """Import site defaults from sysconf."""
+        if sysconf.has_option('sender', 'linelen'):
+            self.linelen = sysconf.get('sender', 'linelen')
+        if sysconf.has_option('sender', 'pagelen'):
+            self.pagelen = sysconf.get('sender', 'pagelen')
+        if sysconf.has_option('sender', 'encoding'):
+            self._encoding = sysconf.get('sender', 'encoding')
+
+    def _encode(self, unt4msg):
+        """Return the DHI message string for unt4msg."""
+        return unt4msg.pack()
+
+    def sendmsg(self, unt4msg=None, key=None):
+        """Pack and send a unt4 message to the DHI.
+
+        If key is provided, the message replaces any pending
+        message with the same key.
+        """
+        self.queuemsg(self._encode(unt4msg), key, unt4msg.erp)
+
+    def queuemsg(self, msg, key=None, clear=False):
+        """Queue an encoded message, clear discards pending line updates."""
+        if clear:
+            self._queue.purge()
+        if msg is not None:
+            self._queue.put('MSG', msg, key)
 
     def write(self, msg=None):
         """Send the provided raw msg to the DHI."""
-        self._queue.put_nowait(('MSG', msg))
+        self._queue.put('MSG', msg)
 
     def exit(self, msg=None):
         """Request thread termination."""
         self._running = False
-        self._queue.put_nowait(('EXIT', msg))
+        self._queue.put('EXIT', msg)
 
     def wait(self):
         """Suspend calling thread until cqueue is empty."""
         self._queue.join()
 
+    def stats(self):
+        """Return command queue and port statistics."""
+        ret = self._queue.stats()
+        now = monotonic()
+        elap = now - self._stattime
+        txbytes = self._txbytes
+        ret['port'] = self._portspec
+        ret['connected'] = self.connected()
+        ret['bytes'] = txbytes
+        ret['rate'] = 0.0
+        if elap > 0:
+            ret['rate'] = (txbytes - self._statbytes) / elap
+        ret['wtime'] = self._wtime
+        self._wtime = 0.0
+        self._statbytes = txbytes
+        self._stattime = now
+        return ret
+
+    def portstats(self):
+        """Return a list of statistics for each connected port."""
+        return [self.stats()]
+
     def setport(self, port=None):
         """Dump command queue contents and (re)open DHI port.
 
@@ -328,13 +560,8 @@ class basesender(threading.Thread):
 	    UDP:localhost:5060
 
         """
-        try:
-            while True:
-                self._queue.get_nowait()
-                self._queue.task_done()
-        except queue.Empty:
-            pass
-        self._queue.put_nowait(('PORT', port))
+        self._queue.clear()
+        self._queue.put('PORT', port)
 
     def set_ignore(self, ignval=False):
         """Set or clear the ignore flag."""
@@ -344,51 +571,81 @@ class basesender(threading.Thread):
         """Return true if SCB connected."""
         return self._port is not None and self._running
 
-    def run(self):
+    def _closeport(self):
+        """Close the current port if open."""
+        if self._port is not None:
+            self._port.close()
+            self._port = None
 
-        # import site defaults from sysconf
-        if sysconf.has_option('sender', 'linelen'):
-            self.linelen = sysconf.get('sender', 'linelen')
-        if sysconf.has_option('sender', 'pagelen'):
-            self.pagelen = sysconf.get('sender', 'pagelen')
-        if sysconf.has_option('sender', 'encoding'):
-            self._encoding = sysconf.get('sender', 'encoding')
+    def _reconnect(self):
+        """Re-open a failed port after backoff expires."""
+        if self._retry is not None and monotonic() > self._retry:
+            self._retry = None
+            _log.debug('Retry port: %s', self._portspec)
+            self._port = mkport(self._portspec)
+            self._backoff = 0
 
+    def run(self):
+        self._loadconf()
         self._running = True
         _log.debug('Starting')
         while self._running:
-            m = self._queue.get()
-            self._queue.task_done()
+            batch = 0
+            if self._port is not None:
+                batch = self._port.batch
+            m = self._queue.get(batch)
             try:
-                if m[0] == 'MSG' and not self._ignore and self._port:
-                    #_log.debug('SEND: ' + repr(m[1]))
-                    self._port.sendall(m[1].encode(self._encoding, 'replace'))
+                if m[0] == 'MSG' and not self._ignore:
+                    if self._port is None:
+                        self._reconnect()
+                    if self._port is not None:
+                        #_log.debug('SEND: ' + repr(m[1]))
+                        buf = m[1].encode(self._encoding, 'replace')
+                        st = monotonic()
+                        self._port.sendall(buf)
+                        wtime = monotonic() - st
+                        self._txbytes += len(buf)
+                        if wtime > self._wtime:
+                            self._wtime = wtime
+                        metrics.count('sender_bytes', len(buf),
+                                      self._portspec)
+                        metrics.observe('sender_write', wtime,
+                                        self._portspec)
                 elif m[0] == 'EXIT':
                     _log.debug('Request to close: %s', m[1])
                     self._running = False
                 elif m[0] == 'PORT':
-                    if self._port is not None:
-                        self._port.close()
-                        self._port = None
+                    metrics.gauge('sender_queue', None, self._portspec)
+                    self._closeport()
+                    self._retry = None
+                    self._backoff = 0
+                    self._portspec = None
                     if m[1] not in [None, '', 'none', 'NULL']:
                         _log.debug('Re-Connect port: %s', m[1])
+                        self._portspec = m[1]
                         self._port = mkport(m[1])
+                        metrics.gauge('sender_queue', self._queue.depth,
+                                      self._portspec)
                     else:
                         _log.debug('Not connected.')
 
             except IOError as e:
-                _log.error('IO Error: %s', e)
-                if self._port is not None:
-                    self._port.close()
-                self._port = None
+                _log.error('IO Error %s: %s', self._portspec, e)
+                self._closeport()
+                if self._portspec is not None:
+                    self._backoff = min(max(1, 2 * self._backoff),
+                                        _MAXBACKOFF)
+                    self._retry = monotonic() + self._backoff
+                    _log.debug('Reconnect %s in %ds', self._portspec,
+                               self._backoff)
             except Exception as e:
                 _log.error('%s: %s', e.__class__.__name__, e)
-        if self._port is not None:
-            self._port.close()
+        self._closeport()
         _log.info('Exiting')
 
 
 class daksender(basesender):
+    """Daktronics (Venus) sender thread."""
 
     def _daksum(self, msg):
         sum = 0x00
@@ -396,20 +653,32 @@ class daksender(basesender):
             sum += c
         return '{0:02X}'.format(sum & 0xff)
 
-    def sendmsg(self, unt4msg=None):
-        """Pack and send a DAK (Venus) message."""
-        msg = None
+    def _encode(self, unt4msg):
+        """Return a DAK (Venus) message string for unt4msg."""
         oft = 0
         text = ''
         if unt4msg.erp:
             # emit full page of spaces
             text = ' ' * self.linelen * self.pagelen
-        elif unt4msg.xx is not None and unt4msg.yy is not None and unt4msg.text:
-            # place chars at board offset
+        elif unt4msg.xx is not None and unt4msg.yy is not None:
+            # place chars at board offset, upper case below line 1
+            if unt4msg.xx >= self.linelen:
+                return None
+            text = unt4msg.text
+            if unt4msg.yy > 1:
+                text = text.upper()
+            maxlen = self.linelen - unt4msg.xx
+            if unt4msg.erl:
+                text = strops.truncpad(text, maxlen, 'l', False)
+            else:
+                text = text[0:maxlen]
+            if not text:
+                return None
             oft = unt4msg.yy * self.linelen + unt4msg.xx
-            text = unt4msg.text.replace('\u2006', ' ')
+            text = text.replace('\u2006', ' ')
         else:
-            pass
+            # overlay and other commands are not supported
+            return None
         control = '004010%04d' % (oft, )
         msg = ''.join((
             '20000000',
@@ -419,13 +688,12 @@ class daksender(basesender):
             text,
             chr(unt4.EOT[0]),
         ))
-        ob = ''.join((
+        return ''.join((
             chr(unt4.SYN[0]),
             msg,
             self._daksum(msg),
             chr(unt4.ETB[0]),
         ))
-        self._queue.put_nowait(('MSG', ob))
 
     def setoverlay(self, newov):
         """Ignore overlay change."""
@@ -435,22 +703,113 @@ class daksender(basesender):
         """Ignore flush."""
         pass
 
-    def postxt(self, line, oft, msg):
-        """Position msg at oft on line."""
-        if oft < self.linelen:
-            if line > 1:
-                msg = msg.upper()
-            msg = msg[0:(self.linelen - oft)]
-            self.sendmsg(unt4.unt4(xx=int(oft), yy=int(line), text=msg))
 
-    def setline(self, line, msg):
-        """Set the specified line to msg."""
-        if line > 1:
-            msg = msg.upper()
-        msg = strops.truncpad(msg, self.linelen, 'l', False)
-        self.sendmsg(unt4.unt4(xx=0, yy=int(line), text=msg))
+class fansender(basesender):
+    """Scoreboard sender fan-out thread.
 
-    def clrline(self, line):
-        """Clear the specified line."""
-        msg = ' ' * self.linelen
-        self.sendmsg(unt4.unt4(xx=0, yy=int(line), text=msg))
+    Each update is encoded once per scoreboard type and queued
+    to a separate sender thread for each configured port, so that
+    a slow or failed port does not stall the others.
+    """
+
+    def __init__(self, port=None):
+        self._senders = ()
+        basesender.__init__(self, port)
+
+    def sendmsg(self, unt4msg=None, key=None):
+        """Encode unt4msg once for each type and send to all ports."""
+        enc = {}
+        for s in self._senders:
+            stype = type(s)
+            if stype not in enc:
+                enc[stype] = s._encode(unt4msg)
+            s.queuemsg(enc[stype], key, unt4msg.erp)
+
+    def write(self, msg=None):
+        """Send the provided raw msg to all ports."""
+        for s in self._senders:
+            s.write(msg)
+
+    def wait(self):
+        """Suspend calling thread until all port queues are empty."""
+        self._queue.join()
+        for s in self._senders:
+            s.wait()
+
+    def set_ignore(self, ignval=False):
+        """Set or clear the ignore flag on all ports."""
+        self._ignore = bool(ignval)
+        for s in self._senders:
+            s.set_ignore(ignval)
+
+    def connected(self):
+        """Return true if any port is connected."""
+        for s in self._senders:
+            if s.connected():
+                return True
+        return False
+
+    def stats(self):
+        """Return combined statistics for all ports."""
+        ret = {
+            'depth': 0,
+            'lag': 0.0,
+            'drops': 0,
+            'coalesced': 0,
+            'sent': 0,
+            'bytes': 0,
+            'rate': 0.0,
+            'wtime': 0.0,
+        }
+        for st in self.portstats():
+            for k in ('depth', 'lag', 'wtime'):
+                ret[k] = max(ret[k], st[k])
+            for k in ('drops', 'coalesced', 'sent', 'bytes', 'rate'):
+                ret[k] += st[k]
+        return ret
+
+    def portstats(self):
+        """Return a list of statistics for each port."""
+        return [s.stats() for s in self._senders]
+
+    def _setports(self, port=None):
+        """Replace port senders with new ones for port."""
+        oldsenders = self._senders
+        newsenders = []
+        for stype, spec in splitports(port):
+            _log.debug('Adding %s sender: %s', stype, spec)
+            s = _SENDERS[stype]()
+            s.set_ignore(self._ignore)
+            s.setport(spec)
+            s.start()
+            newsenders.append(s)
+        self._senders = tuple(newsenders)
+        for s in oldsenders:
+            s.exit('Port change')
+
+    def run(self):
+        self._loadconf()
+        self._running = True
+        _log.debug('Starting fan-out')
+        while self._running:
+            m = self._queue.get(0)
+            try:
+                if m[0] == 'EXIT':
+                    _log.debug('Request to close: %s', m[1])
+                    self._running = False
+                elif m[0] == 'PORT':
+                    if m[1] in [None, '', 'none', 'NULL']:
+                        m = (m[0], None)
+                    self._setports(m[1])
+            except Exception as e:
+                _log.error('%s: %s', e.__class__.__name__, e)
+        for s in self._senders:
+            s.exit('Fan-out exit')
+        self._senders = ()
+        _log.info('Exiting fan-out')
+
+
+_SENDERS = {
+    'dhi': basesender,
+    'dak': daksender,
+}
@@ -99,6 +99,79 @@ _STD_CONTESTS = {
      '10v23', '11v22', '12v21', '13v20', '14v19', '15v18', '16v17'),
 }
 
+# Pre-defined medal contests for sprint finals
+_FINAL_CONTESTS = {
+    2: ('Gold', ),
+    4: ('Bronze', 'Gold'),
+}
+
+
+def _defcontests(event):
+    """Return the pre-defined contest list for event, or None."""
+    ret = None
+    if event['info'] == 'Final' and event['plac'] in _FINAL_CONTESTS:
+        ret = _FINAL_CONTESTS[event['plac']]
+    elif event['plac'] in _STD_CONTESTS:
+        ret = _STD_CONTESTS[event['plac']]
+    return ret
+
+
+class bracket:
+    """Compiled contest graph for a sprint round or final.
+
+    Seeds are the incoming ranks of competitors, allocated to
+    contests in the order addrider fills them: A riders in contest
+    order, then B riders in reverse. The winner of contest n takes
+    rank n in the result. When others are not ordered by qualifying
+    time, losers are ranked after all winners, last contest first.
+    """
+
+    def __init__(self, contestlist):
+        contests = []
+        for idx, cid in enumerate(contestlist):
+            bye = False
+            if cid == 'bye':
+                cid = str(idx + 1) + ' bye'
+                bye = True
+            elif 'bye' in cid:
+                cid = cid.replace('-', ' ')
+                bye = True
+            contests.append((cid, bye))
+        self.contests = tuple(contests)
+        self.seedmap = {}  # seed -> contest
+        self.winrank = {}  # contest -> rank of winner
+        self.loserank = {}  # contest -> rank of loser
+        for idx, c in enumerate(self.contests):
+            self.seedmap[idx + 1] = c[0]
+            self.winrank[c[0]] = idx + 1
+        seed = len(self.contests)
+        for c in reversed(self.contests):
+            if not c[1]:
+                seed += 1
+                self.seedmap[seed] = c[0]
+                self.loserank[c[0]] = seed
+
+    def contest(self, seed):
+        """Return the contest label for the nominated seed, or None."""
+        return self.seedmap.get(seed)
+
+
+# Compiled contest graphs for pre-defined contests
+_BRACKETS = {
+    c: bracket(c)
+    for c in tuple(_STD_CONTESTS.values()) + tuple(_FINAL_CONTESTS.values())
+}
+
+
+def _bracket(contestlist):
+    """Return a compiled contest graph for contestlist."""
+    contestlist = tuple(contestlist)
+    ret = _BRACKETS.get(contestlist)
+    if ret is None:
+        ret = bracket(contestlist)
+    return ret
+
+
 _CONFIG_SCHEMA = {
     'etype': {
         'prompt': 'Sprint Round/Final',
@@ -329,6 +402,7 @@ class sprnd:
                 heattype = 'heats'
                 # in the case of final - this should not be possible
             data[subtype] = {}  # in parent fragment
+            graph = self.contestgraph()
             for cid, contest in self._sprintres.items(
             ):  # visit filled contests
                 # add the label entry
@@ -361,6 +435,16 @@ class sprnd:
                 if contest['competitors']:
                     subdata['competitors'] = contest['competitors']
 
+                # add progression from contest graph
+                if cid in graph:
+                    win, lose = graph[cid]
+                    winpath = self._contestpath(win)
+                    if winpath is not None:
+                        subdata['winnerNext'] = winpath
+                    losepath = self._contestpath(lose)
+                    if losepath is not None:
+                        subdata['loserNext'] = losepath
+
                 # duplicate weather from event
                 if 'weather' in data:
                     subdata['weather'] = data['weather']
@@ -370,8 +454,13 @@ class sprnd:
                 self.meet.db.updateFragment(self.event, subfrag, subdata)
             self.meet.db.updateFragment(self.event, fragment, data)
 
+    def _contest_changed(self, model, path, i=None):
+        """Invalidate cached results on a contest model change."""
+        self._cver += 1
+
     def ridercb(self, rider):
         """Rider change notification"""
+        self._infocache = {}
         if self.winopen:
             if rider is not None:
                 rno = rider[0]
@@ -389,6 +478,7 @@ class sprnd:
 
     def eventcb(self, event):
         """Event change notification function"""
+        self._nextround = None  # downstream autospecs may have changed
         if self.winopen:
             if event is None or event == self.evno:
                 if self.prefix_ent.get_text() != self.event['pref']:
@@ -402,6 +492,7 @@ class sprnd:
         self._standingstat = ''
         self._status = None
         self._rescache = {}
+        self._rcver += 1
         self.finished = False
         ccount = 0
         dcount = 0
@@ -476,6 +567,8 @@ class sprnd:
                         'bname': cr[COL_B_STR],
                         'aqual': aqual,
                         'bqual': bqual,
+                        'atime': tod.mktod(aqual),
+                        'btime': tod.mktod(bqual),
                         'ares': {
                             '1': None,
                             '2': None,
@@ -874,14 +967,9 @@ class sprnd:
         contestlist = cr.get('event', 'contests')
         if not contestlist and self.event['plac']:
             # placeholders is set and contests are not
-            if self.event['info'] == 'Final' and self.event['plac'] == 4:
-                contestlist = ('Bronze', 'Gold')
-            elif self.event['info'] == 'Final' and self.event['plac'] == 2:
-                contestlist = ('Gold', )
-            else:
-                if self.event['plac'] in _STD_CONTESTS:
-                    contestlist = _STD_CONTESTS[self.event['plac']]
+            contestlist = _defcontests(self.event) or contestlist
         self.contestlist = contestlist
+        self._nextround = None
 
         # restore contest details
         oft = 0
@@ -942,12 +1030,24 @@ class sprnd:
         if eid and eid != EVENT_ID:
             _log.info('Event config mismatch: %r != %r', eid, EVENT_ID)
 
-    def _resname(self, bib):
-        ret = ''
-        if bib.strip():
-            ret = self._get_rider(bib).resname()
+    def _riderinfo(self, bib):
+        """Return cached (name, nation, class, pilot) for bib."""
+        ret = self._infocache.get(bib)
+        if ret is None:
+            ret = ('', '', '', None)
+            rh = self._get_rider(bib)
+            if rh is not None:
+                pilot = None
+                ph = self.meet.rdb.get_pilot(rh)
+                if ph is not None:
+                    pilot = ph.resname()
+                ret = (rh.resname(), rh['nation'], rh['class'], pilot)
+            self._infocache[bib] = ret
         return ret
 
+    def _resname(self, bib):
+        return self._riderinfo(bib)[0]
+
     def _listname(self, bib):
         ret = ''
         if bib.strip():
@@ -1030,32 +1130,10 @@ class sprnd:
                 byeflag = None
 
                 ano = cr[COL_A_NO]
-                aname = ''
-                anat = ''
-                acls = ''
-                apilot = None
-                rh = self._get_rider(ano)
-                if rh is not None:
-                    aname = rh.resname()
-                    anat = rh['nation']
-                    acls = rh['class']
-                    ph = self.meet.rdb.get_pilot(rh)
-                    if ph is not None:
-                        apilot = ph.resname()
+                aname, anat, acls, apilot = self._riderinfo(ano)
 
                 bno = cr[COL_B_NO].upper().strip()  # may be ' ' for bye
-                bname = ''
-                bnat = ''
-                bcls = ''
-                bpilot = None
-                rh = self._get_rider(bno)
-                if rh is not None:
-                    bname = rh.resname()
-                    bnat = rh['nation']
-                    bcls = rh['class']
-                    ph = self.meet.rdb.get_pilot(rh)
-                    if ph is not None:
-                        bpilot = ph.resname()
+                bname, bnat, bcls, bpilot = self._riderinfo(bno)
 
                 aqual = None
                 raqual = None
@@ -1167,6 +1245,8 @@ class sprnd:
         _log.debug('Saving event config %r', self.configfile)
         with metarace.savefile(self.configfile) as f:
             cw.write(f)
+        self.meet.riderindex.update(self.evno, self.series,
+                                    self.get_startlist())
 
     def do_properties(self):
         """Run race properties dialog."""
@@ -1800,6 +1880,91 @@ class sprnd:
 
     def result_gen(self):
         """Generator function to export a final result."""
+        key = (self._cver, self._rcver, self.otherstime)
+        if self._results is None or self._results[0] != key:
+            res = tuple(self._result_gen())
+            ranks = {}
+            for r in res:
+                if r[0] and r[1] is not None:
+                    ranks[r[0]] = r[1]
+            self._results = (key, res, ranks)
+        return iter(self._results[1])
+
+    def _downstream(self):
+        """Return a map of rank in this event to (evno, contest).
+
+        Ranks are followed into each sprint round or final that draws
+        starters from this event, seeded in the order its autospec
+        adds them. Downstream events use their pre-defined contests.
+        """
+        if self._nextround is None:
+            self._nextround = {}
+            for e in self.meet.edb:
+                if e['evid'] == self.evno:
+                    continue
+                if e['type'] not in ('sprint round', 'sprint final'):
+                    continue
+                contests = _defcontests(e)
+                if not contests:
+                    continue
+                br = _bracket(contests)
+                autospec = e['auto'].strip()
+                if (contests == _FINAL_CONTESTS[4]
+                        and autospec.endswith(':1-4')):
+                    # medal finals are seeded 3,1,2,4, see reload_riders
+                    autospec = autospec[0:-3] + '3,1,2,4'
+                seed = 0
+                for egroup in autospec.split(';'):
+                    specvec = egroup.split(':')
+                    if len(specvec) != 2 or specvec[1].upper() == 'Q':
+                        continue
+                    evno = specvec[0].strip()
+                    for rank in strops.placeset(specvec[1]):
+                        seed += 1
+                        if evno == self.evno:
+                            contest = br.contest(seed)
+                            if contest is not None:
+                                self._nextround.setdefault(
+                                    rank, (e['evid'], contest))
+        return self._nextround
+
+    def contestgraph(self):
+        """Return a map of contest to (winner, loser) next contests.
+
+        Each next contest is an (evno, contest) pair or None. Loser
+        edges are None when others are ordered by qualifying time,
+        their rank is then only known from the result.
+        """
+        ret = {}
+        nr = self._downstream()
+        br = _bracket(self.contestlist)
+        for cid, bye in br.contests:
+            win = nr.get(br.winrank[cid])
+            lose = None
+            if not self.otherstime and cid in br.loserank:
+                lose = nr.get(br.loserank[cid])
+            ret[cid] = (win, lose)
+        return ret
+
+    def nextcontest(self, bib):
+        """Return (evno, contest) of the next contest for bib, or None."""
+        self.result_gen()  # refresh result cache
+        rank = self._results[2].get(bib)
+        return self._downstream().get(rank)
+
+    def _contestpath(self, nc):
+        """Return the data bridge path for next contest nc, or None."""
+        ret = None
+        if nc is not None:
+            evno, contest = nc
+            if evno in self.meet.edb:
+                fragment = self.meet.edb[evno].get_fragment()
+                if fragment:
+                    ret = '/'.join((fragment, contest))
+        return ret
+
+    def _result_gen(self):
+        """Generate result lines from contests."""
         # Note: "Others" are placed according to qualifying time,
         #       (ref UCI 3.2.050) with a fall back to incoming rank
         others = []
@@ -1817,14 +1982,14 @@ class sprnd:
                 lr = False
                 if cm['a'] > 1:
                     win = cm['ano']
-                    wtime = tod.mktod(cm['aqual'])
+                    wtime = cm['atime']
                     lose = cm['bno']
-                    ltime = tod.mktod(cm['bqual'])
+                    ltime = cm['btime']
                 elif cm['b'] > 1:
                     win = cm['bno']
-                    wtime = tod.mktod(cm['bqual'])
+                    wtime = cm['btime']
                     lose = cm['ano']
-                    ltime = tod.mktod(cm['aqual'])
+                    ltime = cm['atime']
                 if win is not None:
                     rank = placeoft
                     lr = True  # include rank on loser rider
@@ -1904,6 +2069,9 @@ class sprnd:
                     'name': rname,
                     'info': rcls,
                 })
+                nextpath = self._contestpath(self.nextcontest(res[0]))
+                if nextpath is not None:
+                    self._reslines[-1]['nextContest'] = nextpath
 
     def _fill_competitor(self, obj):
         """Fill in the db infor for a competitor line/result line"""
@@ -2102,6 +2270,11 @@ class sprnd:
         self._cursprint = None
         self._sprintres = None
         self._prevNext = {}
+        self._cver = 0  # contest model change count
+        self._rcver = 0  # result cache rebuild count
+        self._results = None  # (key, result lines, rank map)
+        self._nextround = None  # rank -> (evno, contest) downstream
+        self._infocache = {}  # rider display fields by number
 
         self.contests = Gtk.ListStore(
             str,  # COL_CONTEST = 0
@@ -2118,6 +2291,9 @@ class sprnd:
             object,  # COL_B_QUAL = 11
             bool,  # COL_BYE = 12
         )
+        self.contests.connect('row-changed', self._contest_changed)
+        self.contests.connect('row-inserted', self._contest_changed)
+        self.contests.connect('row-deleted', self._contest_changed)
 
         # start timer and show window
         if ui:
@@ -0,0 +1,271 @@
+# SPDX-License-Identifier: MIT
+"""Omnium standings service for trackmeet.
+
+This module keeps an in-memory copy of event results for autospec
+place lookups, and a standings table for each omnium built from
+them. An event is reloaded from disk only when its config file
+changes or the meet notifies a change, so omnium handlers, reports,
+the data bridge and scoreboard can all share one copy of each
+component result and omnium standing.
+
+Report sections built for the program and final result are kept
+too, and re-used while the event, its config, the events it reads,
+the riders it lists and the meet settings are unchanged.
+
+"""
+
+import os
+import logging
+import threading
+
+from .eventdb import _EVENT_COLUMNS
+
+_log = logging.getLogger('standings')
+_log.setLevel(logging.DEBUG)
+
+# Event columns that affect report sections
+_SECTION_COLUMNS = tuple(c for c in _EVENT_COLUMNS if c != 'dirt')
+
+
+class standings:
+    """Shared cache of component results and omnium standings."""
+
+    def __init__(self, meet):
+        self._meet = meet
+        self._lock = threading.RLock()
+        self._versions = {}  # change count by event no
+        self._results = {}  # evno -> (key, final, finished, places)
+        self._omnia = {}  # evno -> (key, handler)
+        self._tables = {}  # evno -> (key, standings rows)
+        self._depends = {}  # source evno -> set of loaded omnium evnos
+        self._sources = {}  # evno -> set of events read while loading
+        self._loading = []  # stack of events being loaded
+        self._memo = {}  # name -> (key, value)
+        self._sections = {}  # (evno, kind) -> (key, sections, riders)
+        self._riderver = {}  # change count by rider id
+        self._rdbver = 0  # change count for whole rider db
+
+    def clear(self):
+        """Drop all cached results and standings."""
+        with self._lock:
+            self._versions.clear()
+            self._results.clear()
+            self._omnia.clear()
+            self._tables.clear()
+            self._depends.clear()
+            self._sources.clear()
+            self._memo.clear()
+            self._sections.clear()
+
+    def changed(self, evno=None):
+        """Notify a change to the result of event evno.
+
+        Omnium events that draw on evno are marked dirty so the next
+        export publishes their updated virtual standings.
+        """
+        if evno is None:
+            self.clear()
+            return
+        with self._lock:
+            self._versions[evno] = self._versions.get(evno, 0) + 1
+            for omno in sorted(self._dependents(evno)):
+                _log.debug('Omnium %r dirty by source %r', omno, evno)
+                self._meet.edb[omno].set_value('dirty', True)
+
+    def _dependents(self, evno):
+        """Return the set of omnium events that draw on evno.
+
+        Sources listed in an omnium's config are found through the
+        meet's reference index, so an omnium need not have been
+        loaded to be marked dirty. Sources found by a loaded omnium
+        handler are added from its sprint source list.
+        """
+        ret = set()
+        edb = self._meet.edb
+        for omno, where in self._meet.references.referrers(evno):
+            if where[0] == 'sprintsource' and omno in edb:
+                if edb[omno]['type'] == 'omnium':
+                    ret.add(omno)
+        for omno in self._depends.get(evno, ()):
+            if omno in edb:
+                ret.add(omno)
+        return ret
+
+    def riderchanged(self, rider=None):
+        """Drop memoized values that may include rider details.
+
+        If rider is None, the whole rider db is assumed changed.
+        """
+        with self._lock:
+            self._memo.clear()
+            if rider is None:
+                self._rdbver += 1
+            else:
+                self._riderver[rider] = self._riderver.get(rider, 0) + 1
+
+    def version(self, evno, visited=None):
+        """Return a key that changes whenever event evno changes.
+
+        The key includes the keys of any events read while evno was
+        last loaded, so a change to a source event also changes the
+        key of every event derived from it. An event whose version
+        is checked while another is loading is recorded as one of
+        its sources, so a memoized source is tracked as if read.
+        """
+        if visited is None:
+            visited = set()
+            with self._lock:
+                if self._loading and self._loading[-1] != evno:
+                    self._sources[self._loading[-1]].add(evno)
+        visited.add(evno)
+        mtime = None
+        try:
+            mtime = os.stat(self._meet.event_configfile(evno)).st_mtime_ns
+        except OSError:
+            pass
+        srckeys = []
+        for srcno in sorted(self._sources.get(evno, ())):
+            if srcno not in visited:
+                srckeys.append(self.version(srcno, visited))
+        return (self._versions.get(evno, 0), mtime, tuple(srckeys))
+
+    def result(self, evno):
+        """Return a tuple (final, finished, places) for event evno.
+
+        Final is True if the event's standing is 'Result', finished
+        is the handler's finished flag and places is a list of
+        (bib, rank) pairs for ranked competitors in result order.
+        None is returned if evno is not an event.
+        """
+        if evno not in self._meet.edb:
+            return None
+        with self._lock:
+            if self._loading:
+                self._sources[self._loading[-1]].add(evno)
+            key = self.version(evno)
+            ent = self._results.get(evno)
+            if ent is None or ent[0] != key:
+                _log.debug('Loading result for event %r', evno)
+                self._sources[evno] = set()
+                self._loading.append(evno)
+                try:
+                    h = self._meet.get_event(evno, False)
+                    h.loadconfig()
+                    final = h.standingstr() == 'Result'
+                    finished = bool(h.finished)
+                    places = []
+                    for ri in h.result_gen():
+                        if isinstance(ri[1], int):
+                            places.append((ri[0], ri[1]))
+                    h = None
+                finally:
+                    self._loading.pop()
+                ent = (self.version(evno), final, finished, places)
+                self._results[evno] = ent
+            return ent[1:]
+
+    def memo(self, name, keyfunc, func):
+        """Return a tuple (value, hit) for func() memoized by keyfunc().
+
+        The value stored under name is re-used while the key is
+        unchanged, otherwise func is called and the new value stored.
+        """
+        with self._lock:
+            ent = self._memo.get(name)
+            if ent is not None and ent[0] == keyfunc():
+                return (ent[1], True)
+            value = func()
+            self._memo[name] = (keyfunc(), value)
+            return (value, False)
+
+    def handler(self, evno):
+        """Return a headless handler for omnium evno with current sources.
+
+        The handler is loaded once, and again whenever the omnium
+        or one of its sprint sources changes version.
+        """
+        if evno not in self._meet.edb:
+            return None
+        with self._lock:
+            key = self.version(evno)
+            ent = self._omnia.get(evno)
+            if ent is None or ent[0] != key:
+                _log.debug('Loading omnium standings for event %r', evno)
+                self._sources[evno] = set()
+                self._loading.append(evno)
+                try:
+                    h = self._meet.get_event(evno, False)
+                    h.loadconfig()
+                    for spec in h.sprintsource.values():
+                        for egroup in spec.split(';'):
+                            srcno = egroup.split(':')[0].strip()
+                            if srcno in self._meet.edb:
+                                self._sources[evno].add(srcno)
+                            if srcno not in self._depends:
+                                self._depends[srcno] = set()
+                            self._depends[srcno].add(evno)
+                finally:
+                    self._loading.pop()
+                ent = (self.version(evno), h)
+                self._omnia[evno] = ent
+            return ent[1]
+
+    def table(self, evno):
+        """Return the standings table for omnium evno.
+
+        Each row is a tuple (place, bib, total, key) in standings
+        order. Key holds the tie-break values the rows are sorted on:
+        laps down when scored on laps, then points total, place in
+        the final sprint, dnf code and rider number. The table is
+        rebuilt only when the omnium or one of its sources changes
+        version, otherwise the copy from the last recalculation of
+        any handler for the omnium is returned.
+        """
+        if evno not in self._meet.edb:
+            return []
+        with self._lock:
+            ent = self._tables.get(evno)
+            if ent is None or ent[0] != self.version(evno):
+                h = self.handler(evno)
+                h.recalculate()  # stores a new table with update()
+                ent = self._tables.get(evno, (None, []))
+            return ent[1]
+
+    def update(self, evno, rows):
+        """Store the standings table rows for omnium evno."""
+        with self._lock:
+            self._tables[evno] = (self.version(evno), list(rows))
+
+    def _sectionkey(self, event, riders):
+        """Return a key that changes with any input to event's sections."""
+        rvers = []
+        for rid in sorted(riders):
+            rvers.append(self._riderver.get(rid, 0))
+        return (self.version(event['evid']),
+                tuple(event.get_row(_SECTION_COLUMNS)), self._rdbver,
+                tuple(rvers), self._meet.settings_key())
+
+    def sections(self, event, kind, build):
+        """Return a tuple (sections, hit) for report kind of event.
+
+        Build is called with the event when the cached sections are
+        out of date, and returns a list of report sections with the
+        set of rider ids read to make them. Results of other events
+        read during the build are recorded as sources of the event,
+        so a change to any of them also rebuilds its sections.
+        """
+        evno = event['evid']
+        with self._lock:
+            ent = self._sections.get((evno, kind))
+            if ent is not None and ent[0] == self._sectionkey(
+                    event, ent[2]):
+                return (ent[1], True)
+            self._sources[evno] = set()
+            self._loading.append(evno)
+            try:
+                secs, riders = build(event)
+            finally:
+                self._loading.pop()
+            self._sections[(evno, kind)] = (self._sectionkey(event, riders),
+                                            secs, riders)
+            return (secs, False)
@@ -0,0 +1,103 @@
+# SPDX-License-Identifier: MIT
+"""Text announcer page buffer.
+
+This module provides a virtual text page for the DHI style
+announcer screen. Handlers draw onto the page with unt4 messages
+and the meet periodically flushes the page, emitting only rows
+that have changed since the last flush.
+
+"""
+
+from metarace import unt4
+
+# Constants
+_DEFWIDTH = 80
+_DEFHEIGHT = 24
+_MAXADDR = 100  # unt4 addresses are two digits
+
+
+class txtpage:
+    """Virtual announcer screen with change-only output."""
+
+    def __init__(self, width=_DEFWIDTH, height=_DEFHEIGHT):
+        self.width = width
+        self._blank = ' ' * width
+        self._rows = [self._blank] * height
+        self._sent = list(self._rows)
+        self.dirty = False
+
+    def clear(self):
+        """Blank all rows on the page."""
+        for i in range(len(self._rows)):
+            self._rows[i] = self._blank
+        self.dirty = True
+
+    def row(self, line):
+        """Return the current text of the nominated row."""
+        if 0 <= line < len(self._rows):
+            return self._rows[line]
+        return self._blank
+
+    def write(self, umsg):
+        """Draw unt4 message umsg onto page, return False if not drawable."""
+        if umsg.erp:
+            self.clear()
+            return True
+        if umsg.xx is None or umsg.yy is None:
+            return False
+        line = umsg.yy % _MAXADDR
+        oft = umsg.xx % _MAXADDR
+        if line >= len(self._rows):
+            self._rows.extend([self._blank] * (line + 1 - len(self._rows)))
+        text = umsg.text[0:max(0, self.width - oft)]
+        cur = self._rows[line]
+        tail = cur[oft + len(text):]
+        if umsg.erl:
+            tail = ''
+        nrow = (cur[0:oft] + text + tail).ljust(self.width)
+        if nrow != cur:
+            self._rows[line] = nrow
+            self.dirty = True
+        return True
+
+    def flush(self):
+        """Return a list of unt4 messages for rows changed since last flush."""
+        ret = []
+        if self.dirty:
+            if len(self._sent) < len(self._rows):
+                self._sent.extend([self._blank] *
+                                  (len(self._rows) - len(self._sent)))
+            changed = [
+                i for i, r in enumerate(self._rows) if r != self._sent[i]
+            ]
+            if changed:
+                blank = True
+                for r in self._rows:
+                    if r != self._blank:
+                        blank = False
+                        break
+                if blank:
+                    ret.append(unt4.GENERAL_CLEARING)
+                else:
+                    for i in changed:
+                        ret.append(self._rowmsg(i))
+                self._sent = list(self._rows)
+            self.dirty = False
+        return ret
+
+    def keyframe(self):
+        """Return a list of unt4 messages to redraw the whole page."""
+        ret = [unt4.GENERAL_CLEARING]
+        for i, r in enumerate(self._rows):
+            if r != self._blank:
+                ret.append(self._rowmsg(i))
+        self._sent = list(self._rows)
+        self.dirty = False
+        return ret
+
+    def _rowmsg(self, line):
+        """Return a unt4 message to overwrite the nominated row."""
+        return unt4.unt4(xx=0,
+                         yy=line,
+                         erl=True,
+                         text=self._rows[line].rstrip())
@@ -0,0 +1,150 @@
+# SPDX-License-Identifier: MIT
+"""Main loop stall watchdog.
+
+The meet's 50 ms timeout calls tick() on each pass through the main
+loop. A watchdog thread checks the time since the last tick, and
+when it exceeds the stall threshold it samples the main thread's
+stack. Once the main loop recovers, the stall is logged with its
+duration and the callback that was running when it was sampled.
+
+Tick intervals are collected in a histogram of lateness over the
+expected period.
+
+"""
+
+import sys
+import threading
+import logging
+import traceback
+from time import perf_counter, sleep
+
+# module logger
+_log = logging.getLogger('watchdog')
+_log.setLevel(logging.DEBUG)
+
+# constants
+_PERIOD = 0.05  # expected tick interval
+_THRESHOLD = 0.25  # report ticks later than this
+_POLL = 0.05  # watchdog thread poll interval
+_MAXSTALLS = 20  # number of recent stalls retained
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _callback(stack):
+    """Return the frame summary of the main loop callback in stack."""
+    for idx, fs in enumerate(stack):
+        if 'Gtk.main' in (fs.line or '') and idx + 1 < len(stack):
+            return stack[idx + 1]
+    if stack:
+        return stack[-1]
+    return None
+
+
+def _where(fs):
+    """Return a short description of frame summary fs."""
+    if fs is None:
+        return 'unknown'
+    return '{} ({}:{})'.format(fs.name, fs.filename.rsplit('/', 1)[-1],
+                               fs.lineno)
+
+
+class watchdog(threading.Thread):
+    """Main loop stall watchdog thread."""
+
+    def __init__(self, period=_PERIOD, threshold=_THRESHOLD):
+        threading.Thread.__init__(self, daemon=True)
+        self._period = period
+        self._threshold = threshold
+        self._mainid = threading.main_thread().ident
+        self._running = False
+        self._last = None
+        self._sample = None  # main thread stack for the current stall
+        self._counts = [0] * (len(_BUCKETS) + 1)
+        self._ticks = 0
+        self._worst = 0.0
+        self.stalls = []  # recent (duration, callback, stack)
+
+    def exit(self):
+        """Request thread termination."""
+        self._running = False
+
+    def tick(self):
+        """Record a pass through the main loop."""
+        now = perf_counter()
+        last = self._last
+        self._last = now
+        if last is None:
+            return
+        interval = now - last
+        late = max(0.0, interval - self._period)
+        idx = 0
+        while idx < len(_BUCKETS) and late > _BUCKETS[idx]:
+            idx += 1
+        self._counts[idx] += 1
+        self._ticks += 1
+        if interval > self._worst:
+            self._worst = interval
+        stack = self._sample
+        self._sample = None
+        if late > self._threshold:
+            cb = None
+            if stack is not None:
+                cb = _where(_callback(stack))
+            self.stalls.append((interval, cb, stack))
+            del self.stalls[0:-_MAXSTALLS]
+            _log.warning('Main loop stalled %0.3fs in %s', interval, cb)
+            if stack:
+                _log.debug('Stall stack:\n%s',
+                           ''.join(traceback.format_list(stack)))
+
+    def histogram(self):
+        """Return a list of (label, count) tick lateness buckets."""
+        ret = []
+        lo = 0.0
+        for hi, count in zip(_BUCKETS, self._counts):
+            ret.append(('{:0.0f}-{:0.0f} ms'.format(lo * 1000, hi * 1000),
+                        count))
+            lo = hi
+        ret.append(('> {:0.0f} ms'.format(lo * 1000), self._counts[-1]))
+        return ret
+
+    def summary(self):
+        """Return a text summary of tick lateness and recent stalls."""
+        lines = [
+            'Ticks: {}, worst interval: {:0.3f}s'.format(
+                self._ticks, self._worst), ''
+        ]
+        for label, count in self.histogram():
+            lines.append('{: >12}: {}'.format(label, count))
+        if self.stalls:
+            lines.append('')
+            lines.append('Recent stalls:')
+            for interval, cb, stack in reversed(self.stalls):
+                lines.append('{:0.3f}s {}'.format(interval, cb))
+        return '\n'.join(lines)
+
+    def _check(self):
+        """Sample the main thread stack if the main loop has stalled."""
+        last = self._last
+        if last is None or self._sample is not None:
+            return
+        elapsed = perf_counter() - last
+        if elapsed > self._period + self._threshold:
+            frame = sys._current_frames().get(self._mainid)
+            if frame is not None:
+                stack = traceback.extract_stack(frame)
+                frame = None
+                if self._last == last:
+                    self._sample = stack
+
+    def run(self):
+        """Called via threading.Thread.start()."""
+        self._running = True
+        _log.debug('Starting')
+        while self._running:
+            try:
+                self._check()
+            except Exception as e:
+                _log.error('%s: %s', e.__class__.__name__, e)
+            sleep(_POLL)
+        _log.debug('Exiting')